@@ -15,6 +15,8 @@ import sys
 from dotenv import load_dotenv
 from app import create_app, db
 from app.models.user import User
+from app.models.credit_ledger import CreditLedgerEntry
+from app.utils.credits import add_credits as grant_credits
 
 def add_credits(user_id, credits_to_add):
     """Add credits to a user"""
@@ -35,17 +37,15 @@ def add_credits(user_id, credits_to_add):
         # Store original credits for reporting
         original_credits = user.credits
         
-        # Add credits
-        user.credits += credits_to_add
-        
-        # Commit changes
-        db.session.commit()
+        # Add credits and record the grant in the ledger
+        new_total = grant_credits(user.id, credits_to_add, CreditLedgerEntry.TYPE_ADMIN_GRANT,
+                                  description='Credits added by admin')
         
         print(f"\nCredits added successfully!")
         print(f"User: {user.email}")
         print(f"Original credits: {original_credits}")
         print(f"Added credits: {credits_to_add}")
-        print(f"New total: {user.credits}")
+        print(f"New total: {new_total}")
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
@@ -12,12 +12,23 @@ import copy
 # Import db globally now
 from app.extensions import db, login_manager, init_extensions
 from flask_mail import Mail
-from celery_worker import celery
 from flask_cors import CORS
 
+# Interval between cleanup cycles; the leader lock lives slightly shorter so
+# a crashed leader never blocks the next cycle
+CLEANUP_INTERVAL_SECONDS = 3600
+CLEANUP_LOCK_KEY = 'lock:cleanup_expired_progress'
+
 # Background task for cleaning up expired progress records
 def cleanup_expired_progress(app):
-    """Background task to clean up expired progress records"""
+    """
+    Background task to clean up expired progress records.
+
+    Every web and worker process runs this thread, but only the process that
+    wins the Redis lock for the current cycle actually deletes rows.
+    """
+    from app.utils.redis import get_redis
+    
     while True:
         try:
             # Create a fresh app context for each cleanup cycle
@@ -25,18 +36,31 @@ def cleanup_expired_progress(app):
                 # Import here to avoid circular imports
                 from app.models.task_progress import TaskProgress
                 
-                # Use the app's db instance
-                TaskProgress.cleanup_expired()
-                print("Cleaned up expired progress records")
-                db.session.remove()
+                # Single leader per cycle: non-blocking lock that expires on its own
+                lock = get_redis().lock(CLEANUP_LOCK_KEY, timeout=CLEANUP_INTERVAL_SECONDS - 60, blocking=False)
+                if lock.acquire(blocking=False):
+                    # Use the app's db instance
+                    deleted = TaskProgress.cleanup_expired()
+                    print(f"Cleaned up {deleted} expired progress records")
+                    db.session.remove()
+                    # Keep holding the lock until it expires so other processes skip this cycle
+                else:
+                    app.logger.debug("Another process holds the cleanup lock, skipping this cycle")
         except Exception as e:
             # Log the error outside the app context
             print(f"Error cleaning up expired progress records: {str(e)}")
         
         # Sleep for 1 hour between cleanup cycles
-        time.sleep(3600)
+        time.sleep(CLEANUP_INTERVAL_SECONDS)
 
-def create_app():
+def create_app(start_background_tasks=True):
+    """
+    Build and configure the Flask application.
+
+    Args:
+        start_background_tasks: Start the expired-progress cleanup thread.
+            Worker processes pass False; the web processes handle cleanup.
+    """
     app = Flask(__name__)
     load_dotenv()  # Ensure environment variables are loaded
     
@@ -101,7 +125,7 @@ def create_app():
     
     # Start background task for cleaning up expired progress records
     # Only start in non-debug mode or when running the main thread in debug mode
-    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    if start_background_tasks and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
         # Create a separate thread for cleanup
         cleanup_thread = threading.Thread(target=cleanup_expired_progress, args=(app,))
         cleanup_thread.daemon = True
@@ -129,63 +153,51 @@ def create_app():
         """Download a file by UUID with type parameter"""
         # Check for query parameter first, then assume audio as default
         file_type = request.args.get('type', 'audio')
-        output_dir = app.config.get('OUTPUT_FOLDER', '.')
         
         app.logger.info(f"Download request for {uuid}, type={file_type}")
         
-        # List files in the output directory
         try:
-            if not os.path.exists(output_dir):
-                app.logger.error(f"Output directory does not exist: {output_dir}")
-                return redirect(url_for('main.downloads_page', _external=True))
-            
-            files = os.listdir(output_dir)
-            app.logger.info(f"Files in output directory: {files}")
-            
-            # Look for files matching the UUID or containing it
-            matching_files = []
-            for file in files:
-                if uuid in file:
-                    matching_files.append(file)
-                    
-            app.logger.info(f"Matching files for UUID {uuid}: {matching_files}")
+            # Resolve through the artifact registry written by the worker
+            from app.utils.artifacts import get_artifact, serve_artifact
             
-            # Find file matching the requested type
-            target_file = None
-            for file in matching_files:
-                if file_type == 'audio' and file.endswith('.mp3'):
-                    target_file = file
-                    break
-                elif file_type == 'pdf' and file.endswith('.pdf'):
-                    target_file = file
-                    break
+            artifact = get_artifact(uuid, file_type)
+            response = serve_artifact(artifact) if artifact else None
             
-            if target_file:
-                app.logger.info(f"Found matching file: {target_file}")
-                return send_from_directory(output_dir, target_file, as_attachment=True)
+            if response:
+                app.logger.info(f"Found {file_type} artifact for UUID {uuid} in {artifact.storage}")
+                return response
             else:
-                app.logger.warning(f"No matching {file_type} file in filesystem for UUID {uuid}, checking Redis")
-                # If no file found on filesystem, try getting from Redis
+                app.logger.warning(f"No registered {file_type} artifact for UUID {uuid}, checking Redis")
+                # Outputs published before the registry existed only live in Redis
                 from app.utils.redis import get_redis
                 from io import BytesIO
                 from flask import send_file
                 
+                from app.utils.blob_store import blob_key, blob_response
+                
                 # Try to get from Redis
                 try:
                     redis_client = get_redis()
-                    content_key = f"file_content:{uuid}:{file_type}"
+                    content_key = blob_key(uuid, file_type)
                     app.logger.info(f"Trying Redis key: {content_key}")
                     
+                    # Determine filename and mimetype
+                    file_extension = 'mp3' if file_type == 'audio' else ('pdf' if file_type == 'pdf' else 'txt')
+                    download_filename = f"docecho_{uuid}.{file_extension}"
+                    mimetype = 'audio/mpeg' if file_type == 'audio' else ('application/pdf' if file_type == 'pdf' else 'text/plain')
+                    
+                    # Stream chunked blobs without loading them into memory
+                    response = blob_response(redis_client, content_key, download_filename, mimetype)
+                    if response:
+                        app.logger.info(f"Streaming chunked blob {content_key}")
+                        return response
+                    
+                    # Fall back to the legacy single-key format
                     file_content = redis_client.get(content_key)
                     
                     if file_content:
                         app.logger.info(f"Found file content in Redis for {uuid}, size: {len(file_content)} bytes")
                         
-                        # Determine filename and mimetype
-                        file_extension = 'mp3' if file_type == 'audio' else ('pdf' if file_type == 'pdf' else 'txt')
-                        download_filename = f"docecho_{uuid}.{file_extension}"
-                        mimetype = 'audio/mpeg' if file_type == 'audio' else ('application/pdf' if file_type == 'pdf' else 'text/plain')
-                        
                         # Send the file content from memory
                         return send_file(
                             BytesIO(file_content), 
@@ -285,16 +297,20 @@ def register_blueprints_and_models(app):
     """Register blueprints and initialize models"""
     from app.models.user import User
     from app.models.task_progress import TaskProgress
+    from app.models.credit_reservation import CreditReservation
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.artifact import Artifact
     
     # Register blueprints
     from app.routes.auth import bp as auth_bp
     from app.routes.main import bp as main_bp
+    from app.routes.uploads import bp as uploads_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(main_bp) 
+    app.register_blueprint(uploads_bp, url_prefix='/uploads')
 
-# Create Flask app
-app = create_app()
-
-# Initialize Celery with Flask app context
-celery.conf.update(app.config) 
\ No newline at end of file
+# No app is created at import time. Entry points (wsgi.py, app.py, scripts)
+# call create_app() themselves, and the Celery worker builds one lazily per
+# process (see get_worker_app in app/utils/pdf_processor.py). Celery reads
+# its broker/backend settings from the environment in celery_worker.py.
@@ -30,6 +30,36 @@ class Config:
     CELERY_BROKER_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     
+    # Redis connection pool (per process; use memory:// as REDIS_URL for an in-memory client)
+    REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 20))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))  # Seconds
+    REDIS_SOCKET_TIMEOUT = int(os.environ.get('REDIS_SOCKET_TIMEOUT', 10))  # Seconds
+    
+    # Seconds a user row may be served from the per-process user_loader cache
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    
+    # Chunked Redis blob storage for generated outputs
+    REDIS_BLOB_CHUNK_SIZE = int(os.environ.get('REDIS_BLOB_CHUNK_SIZE', 512 * 1024))  # Bytes per segment
+    REDIS_BLOB_PIPELINE_DEPTH = int(os.environ.get('REDIS_BLOB_PIPELINE_DEPTH', 8))  # Segments per pipeline flush
+    REDIS_BLOB_TTL = int(os.environ.get('REDIS_BLOB_TTL', 604800))  # 7 days
+    
+    # Remote (S3-compatible) storage for generated outputs
+    # Leave S3_BUCKET_NAME unset to keep outputs in Redis
+    S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    S3_MULTIPART_THRESHOLD = int(os.environ.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+    S3_MULTIPART_CHUNK_SIZE = int(os.environ.get('S3_MULTIPART_CHUNK_SIZE', 8 * 1024 * 1024))
+    S3_MAX_CONCURRENCY = int(os.environ.get('S3_MAX_CONCURRENCY', 4))
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 10))
+    S3_PRESIGNED_URL_EXPIRY = int(os.environ.get('S3_PRESIGNED_URL_EXPIRY', 900))  # 15 minutes
+    
+    # Storage janitor (Celery beat task); sizes in bytes, ages in seconds
+    STORAGE_JANITOR_INTERVAL = int(os.environ.get('STORAGE_JANITOR_INTERVAL', 3600))
+    STORAGE_DISK_BUDGET = int(os.environ.get('STORAGE_DISK_BUDGET', 2 * 1024 * 1024 * 1024))  # All outputs together
+    STORAGE_USER_QUOTA = int(os.environ.get('STORAGE_USER_QUOTA', 200 * 1024 * 1024))  # Outputs per user
+    STORAGE_UPLOAD_MAX_AGE = int(os.environ.get('STORAGE_UPLOAD_MAX_AGE', 7200))  # Unregistered outputs; longer than the task time limit
+    STORAGE_TEMP_MAX_AGE = int(os.environ.get('STORAGE_TEMP_MAX_AGE', 7200))  # Longer than the task time limit
+    
     # JWT Settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
@@ -51,7 +81,49 @@ class Config:
     # Application environment
     APP_ENV = os.environ.get('APP_ENV', 'development')
 
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size (single-request uploads and upload parts)
+    
+    # Resumable chunked uploads (/uploads); parts must fit in MAX_CONTENT_LENGTH and are
+    # rounded down to a multiple of REDIS_BLOB_CHUNK_SIZE, the size each part is stored in
+    UPLOAD_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', 4 * 1024 * 1024))
+    UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 200 * 1024 * 1024))
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 86400))  # Unfinished uploads can be resumed for a day
+    
+    # Duplicate submissions (same file and settings, or same Idempotency-Key) join the existing job
+    JOB_COALESCE_WINDOW = int(os.environ.get('JOB_COALESCE_WINDOW', 600))  # Seconds
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))  # Seconds
+    
+    # Preview conversions (preview=1) convert only the opening text on their own Celery queue
+    PREVIEW_MAX_CHARS = int(os.environ.get('PREVIEW_MAX_CHARS', 1500))
+    PREVIEW_CREDITS = int(os.environ.get('PREVIEW_CREDITS', 1))  # Reserved per preview
+    PREVIEW_QUEUE = os.environ.get('PREVIEW_QUEUE', 'fast')
+    
+    # Multi-language jobs (languages=en,es,...) extract once and convert each language in parallel
+    MAX_JOB_LANGUAGES = int(os.environ.get('MAX_JOB_LANGUAGES', 8))
+    JOB_GROUP_TTL = int(os.environ.get('JOB_GROUP_TTL', 604800))  # How long /jobs/<id> stays available
+    MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 100))  # PDFs per /batch request
+    
+    # Completion callbacks (callback_url on submit), signed with HMAC-SHA256 in X-DocEcho-Signature
+    CALLBACK_SIGNING_SECRET = os.environ.get('CALLBACK_SIGNING_SECRET')  # Defaults to SECRET_KEY
+    CALLBACK_MAX_RETRIES = int(os.environ.get('CALLBACK_MAX_RETRIES', 6))
+    CALLBACK_RETRY_DELAY = int(os.environ.get('CALLBACK_RETRY_DELAY', 30))  # Seconds, doubled on each retry
+    CALLBACK_ALLOW_PRIVATE = os.environ.get('CALLBACK_ALLOW_PRIVATE', 'false').lower() in ['true', 't', '1']  # Local testing only
+    
+    # Progressive audio: each synthesized chunk is published as an HLS segment (/stream/<task_id>/playlist.m3u8)
+    HLS_ENABLED = os.environ.get('HLS_ENABLED', 'true').lower() in ['true', 't', '1']
+    HLS_SEGMENT_TTL = int(os.environ.get('HLS_SEGMENT_TTL', 86400))  # Seconds, while the job runs
+    HLS_RETIRE_GRACE = int(os.environ.get('HLS_RETIRE_GRACE', 600))  # Seconds segments outlive the job once it finishes
+    
+    # "both" jobs render the translated PDF in a separate process while the audio is synthesized
+    CONCURRENT_PDF_RENDERING = os.environ.get('CONCURRENT_PDF_RENDERING', 'true').lower() in ['true', 't', '1']
+    
+    # Default audio output encoding: passthrough, mp3, mp3_low, opus or aac (see app/utils/audio_encoding.py)
+    AUDIO_ENCODING = os.environ.get('AUDIO_ENCODING', 'mp3')
+    
+    # Completed jobs can keep translated text and raw audio in Redis so /jobs/<task_id>/derive can re-export
+    # them; opt-in, since that is another copy of every job's audio (0, the default, keeps nothing)
+    INTERMEDIATE_TTL = int(os.environ.get('INTERMEDIATE_TTL', 0))  # Seconds
+    DERIVE_CREDITS = int(os.environ.get('DERIVE_CREDITS', 0))  # Credits per derivation
     
     # Stripe configuration
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
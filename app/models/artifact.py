@@ -0,0 +1,35 @@
+from app.extensions import db
+from datetime import datetime
+
+class Artifact(db.Model):
+    """
+    A finished output of a job (audio, PDF, ...) and where it is stored.
+
+    Written by the worker when it publishes an output, so download and
+    listing routes resolve files with an index lookup instead of scanning
+    output directories.
+    """
+    __tablename__ = 'artifacts'
+
+    STORAGE_S3 = 's3'
+    STORAGE_REDIS = 'redis'
+    STORAGE_LOCAL = 'local'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.String(64), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    file_type = db.Column(db.String(16), nullable=False)  # 'audio', 'pdf', ...
+    storage = db.Column(db.String(16), nullable=False)
+    location = db.Column(db.String(512), nullable=False)  # S3 key, Redis blob key or file path
+    local_path = db.Column(db.String(512))  # Path on the worker volume, if it is shared
+    filename = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.BigInteger)
+    checksum = db.Column(db.String(64))  # SHA-256 hex digest
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_accessed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)  # Last download, for LRU eviction
+
+    __table_args__ = (
+        db.UniqueConstraint('task_id', 'file_type', name='uq_artifacts_task_id_file_type'),
+        # A user's downloads, newest first
+        db.Index('ix_artifacts_user_id_created_at', 'user_id', 'created_at'),
+    )
@@ -0,0 +1,36 @@
+from app.extensions import db
+from datetime import datetime
+
+class CreditLedgerEntry(db.Model):
+    """
+    Append-only record of every change to a user's credits.
+
+    users.credits is the materialized balance; each entry stores the balance
+    right after it was applied, and both are written in one transaction.
+    """
+    __tablename__ = 'credit_ledger'
+
+    TYPE_PURCHASE = 'purchase'
+    TYPE_JOB_RESERVATION = 'job_reservation'
+    TYPE_REFUND = 'refund'
+    TYPE_ADMIN_GRANT = 'admin_grant'
+    TYPE_SIGNUP_GRANT = 'signup_grant'
+    TYPE_ADJUSTMENT = 'adjustment'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)  # Positive for credits added, negative for credits spent
+    balance_after = db.Column(db.Integer, nullable=False)
+    entry_type = db.Column(db.String(32), nullable=False)
+    reference = db.Column(db.String(255))  # Task id, Stripe session id, ...
+    description = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        db.Index('ix_credit_ledger_user_id_created_at', 'user_id', 'created_at', 'id'),
+        # A Stripe checkout session is credited at most once, however often the webhook is retried
+        db.Index('uq_credit_ledger_purchase_reference', 'entry_type', 'reference', unique=True,
+                 postgresql_where=db.text("entry_type = 'purchase'"),
+                 sqlite_where=db.text("entry_type = 'purchase'")),
+    )
@@ -0,0 +1,18 @@
+from app.extensions import db
+from datetime import datetime
+
+class CreditReservation(db.Model):
+    """Credits held for a submitted job until the worker commits or releases them."""
+    __tablename__ = 'credit_reservations'
+
+    STATUS_RESERVED = 'reserved'
+    STATUS_COMMITTED = 'committed'
+    STATUS_RELEASED = 'released'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    credits = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=STATUS_RESERVED)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,5 @@
 from app.extensions import db
+from sqlalchemy import select, delete
 from datetime import datetime, timedelta
 import json
 from flask import current_app
@@ -9,7 +10,7 @@ class TaskProgress(db.Model):
     task_id = db.Column(db.String(64), primary_key=True)
     data = db.Column(db.Text, nullable=False)  # JSON data
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(hours=1))
+    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(hours=1), index=True)
     
     def __init__(self, task_id, data, expires_at=None):
         self.task_id = task_id
@@ -22,8 +23,14 @@ class TaskProgress(db.Model):
         return datetime.utcnow() > self.expires_at
     
     @classmethod
-    def cleanup_expired(cls):
-        """Delete expired progress records"""
+    def cleanup_expired(cls, batch_size=1000):
+        """
+        Delete expired progress records in set-based batches.
+
+        Each batch is a single DELETE of at most batch_size rows, selected
+        through the expires_at index, and is committed on its own so locks
+        are held briefly regardless of how many rows have expired.
+        """
         try:
             # Ensure we're in an app context
             if not current_app:
@@ -31,24 +38,33 @@ class TaskProgress(db.Model):
                 
             # Get current time once to ensure consistency
             now = datetime.utcnow()
+            total_deleted = 0
             
-            # Find expired records
-            expired_records = cls.query.filter(cls.expires_at < now).all()
-            
-            # Log how many records will be deleted
-            if expired_records:
-                current_app.logger.info(f"Deleting {len(expired_records)} expired progress records")
-                
-                # Delete records one by one to avoid potential issues
-                for record in expired_records:
-                    db.session.delete(record)
-                
-                # Commit the changes
+            while True:
+                # DELETE ... WHERE task_id IN (SELECT ... LIMIT n) works on both PostgreSQL and SQLite
+                expired_ids = (
+                    select(cls.task_id)
+                    .where(cls.expires_at < now)
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                result = db.session.execute(
+                    delete(cls)
+                    .where(cls.task_id.in_(expired_ids))
+                    .execution_options(synchronize_session=False)
+                )
                 db.session.commit()
-                return len(expired_records)
+                
+                deleted = result.rowcount or 0
+                total_deleted += deleted
+                if deleted < batch_size:
+                    break
+            
+            if total_deleted:
+                current_app.logger.info(f"Deleted {total_deleted} expired progress records")
             else:
                 current_app.logger.info("No expired progress records found")
-                return 0
+            return total_deleted
                 
         except Exception as e:
             # Rollback in case of error
@@ -57,4 +73,4 @@ class TaskProgress(db.Model):
             except:
                 pass
             current_app.logger.error(f"Error cleaning up expired records: {str(e)}")
-            return 0 
\ No newline at end of file
+            return 0 
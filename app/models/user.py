@@ -1,10 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin
 from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import event, func
+from sqlalchemy.orm import declarative_base, make_transient_to_detached, object_session, Session
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 from app.extensions import db, login_manager
+from app.utils.user_cache import get_cached_user, cache_user, invalidate_user
 import jwt
 from flask import current_app
 
@@ -59,6 +61,44 @@ class User(UserMixin, db.Model):
         self.uq_verification_token = None
         db.session.commit()
 
+    __table_args__ = (
+        # Serves the case-insensitive lookups in auth.register and auth.forgot_password
+        db.Index('ix_users_email_lower', func.lower(email)),
+    )
+
+def _user_to_dict(user):
+    """Column values of a user, as stored in the identity cache."""
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
\ No newline at end of file
+    user_id = int(user_id)
+    data = get_cached_user(user_id)
+    if data is None:
+        user = User.query.get(user_id)
+        if user is not None:
+            cache_user(user_id, _user_to_dict(user))
+        return user
+
+    # Rebuild the row without a query and attach it to the session as a
+    # clean persistent object, so changes made through current_user still flush
+    user = User(**data)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _mark_user_changed(mapper, connection, target):
+    """Remember changed users so their cache entries are dropped once the change is committed."""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
\ No newline at end of file
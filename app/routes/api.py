@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
-from app.utils.pdf_processor import process_pdf
-from app.utils.redis import get_redis
+from werkzeug.utils import secure_filename
+from app.tasks import enqueue_process_pdf
+from app.utils.ingest import ingest_upload, InvalidUpload
+from app.utils.jobs import parse_output_format
+from app.utils.progress import get_progress_many
 import os
 import time
 
@@ -21,19 +24,26 @@ def process_file():
         
         # Get request parameters
         voice = request.form.get('voice', 'en')
-        output_format = request.form.get('output_format', 'audio')
         user_id = request.form.get('user_id')
         audio_speed = float(request.form.get('audio_speed', 1.0))
         
         if not user_id:
             return jsonify({'error': 'User ID is required'}), 400
+        try:
+            output_format = parse_output_format(request.form)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Read file content
-        file_content = file.read()
+        # Stream the upload into the blob store and hand the worker its key
+        try:
+            source_key, manifest = ingest_upload(file.stream, secure_filename(file.filename))
+        except InvalidUpload as e:
+            return jsonify({'error': str(e)}), 400
         
         # Start Celery task
-        task = process_pdf.delay(
-            file_content=file_content,
+        task = enqueue_process_pdf(
+            file_content=None,
+            source_key=source_key,
             filename=file.filename,
             voice={'language': voice},
             output_format=output_format,
@@ -52,13 +62,12 @@ def process_file():
 @bp.route('/progress/<task_id>', methods=['GET'])
 def get_progress(task_id):
     try:
-        redis = get_redis()
-        progress = redis.get(f'progress:{task_id}')
-        
+        # Progress is written by the worker through app.utils.progress, not to a Redis key.
+        # get_progress_many leaves unknown tasks out instead of reporting them as initializing
+        progress = get_progress_many([task_id]).get(task_id)
         if progress is None:
             return jsonify({'error': 'Task not found'}), 404
-        
-        return jsonify(progress.decode('utf-8')), 200
+        return jsonify(progress), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
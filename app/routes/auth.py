@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models.user import User
+from app.models.credit_ledger import CreditLedgerEntry
 from app.forms import RegistrationForm, LoginForm, PasswordUpdateForm
 from app import db
 import jwt
@@ -58,6 +59,15 @@ def register():
             new_user.set_password(form.password.data)
             
             db.session.add(new_user)
+            db.session.flush()
+            # Open the user's ledger with the free signup credits
+            db.session.add(CreditLedgerEntry(
+                user_id=new_user.id,
+                amount=new_user.credits,
+                balance_after=new_user.credits,
+                entry_type=CreditLedgerEntry.TYPE_SIGNUP_GRANT,
+                description='Welcome credits'
+            ))
             db.session.commit()
             print(f"User created with ID: {new_user.id} and {new_user.credits} credits")
             
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, send_file, url_for, redirect, flash, current_app, abort
+from flask import Blueprint, render_template, request, jsonify, send_file, url_for, redirect, flash, current_app, abort, Response
 from flask_login import login_required, current_user
 from app.models.user import User
 from app import db
@@ -6,13 +6,27 @@ from app.utils.progress import get_progress, update_progress, delete_progress
 import os
 import uuid
 import threading
-from app.utils.pdf_processor import process_pdf, language_map
+from app.utils.jobs import (
+    submit_conversion, submit_multilingual, submit_batch, get_job_metrics, parse_page_options, parse_languages,
+    parse_callback_url, get_job_group, job_group_status, get_task_states, parse_derive_options, submit_derivation,
+    parse_output_format, DEFAULT_MAX_BATCH_FILES, MAX_STATUS_TASK_IDS, OUTPUT_FILE_TYPES
+)
+from app.utils.intermediates import get_intermediates
+from app.utils.ingest import ingest_upload, ingest_zip, discard_upload, InvalidUpload
+from app.models.credit_ledger import CreditLedgerEntry
+from app.utils.credits import add_credits, get_credit_history
 import stripe
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 import copy
 import json
 from datetime import datetime, timezone
-from app.utils.redis import get_redis
+from app.utils.redis import get_redis, get_redis_pool_stats
+from app.utils.blob_store import blob_key, blob_response
+from app.utils.file_storage import get_presigned_url
+from app.utils.artifacts import get_artifact, list_user_artifacts, serve_artifact, evict_user_artifacts
+from app.utils.audio_encoding import parse_audio_encoding
+from app.utils import hls
 import shutil
 import logging
 from io import BytesIO # Import BytesIO
@@ -45,75 +59,69 @@ def process_file():
             return jsonify({"error": "No selected file"}), 400
             
         if file and file.filename.endswith(".pdf"):
-            # Get the current app
-            app = current_app._get_current_object()
-            
-            # Save the uploaded file using the configured UPLOAD_FOLDER
+            # Stream the upload once into the blob store, hashing and validating it
+            # on the way; the worker reads it from there, so no shared volume is needed
             safe_filename = secure_filename(file.filename)
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            # Ensure the upload folder exists (especially for local dev)
-            os.makedirs(upload_folder, exist_ok=True)
-            file_path = os.path.join(upload_folder, safe_filename)
-            file.save(file_path)
-            current_app.logger.info(f"File saved to: {file_path}")
-            
-            # Read the file content into memory to pass directly to the task
-            # This avoids needing shared volumes between the web and worker processes
-            pdf_content = None
             try:
-                with open(file_path, 'rb') as f:
-                    pdf_content = f.read()
-                current_app.logger.info(f"File content read: {len(pdf_content)} bytes")
-            except Exception as e:
-                current_app.logger.error(f"Error reading file content: {str(e)}")
-                return jsonify({"error": f"Error reading file: {str(e)}"}), 500
+                source_key, manifest = ingest_upload(file.stream, safe_filename)
+            except InvalidUpload as e:
+                return jsonify({"error": str(e)}), 400
+            current_app.logger.info(f"Upload stored as {source_key}: {manifest['size']} bytes, ~{manifest['page_count_hint']} pages")
             
-            voice = request.form.get("voice", "en")
-            output_format = request.form.get("output_format", "audio")
             audio_speed = float(request.form.get("audio_speed", "1.0"))
-            
-            # Check if this language only supports audio
-            lang_details = language_map.get(voice, {})
-            if lang_details.get("audio_only", False) and output_format in ["pdf", "both"]:
-                current_app.logger.info(f"Language {voice} only supports audio output. Overriding format {output_format} to 'audio'")
-                output_format = "audio"
-            
-            # Calculate required credits
-            required_credits = 1
-            if output_format in ["audio", "both"]:
-                required_credits += 1  # Add 1 more for audio (2 total for audio, 3 for both)
-            
-            if current_user.credits < required_credits:
-                return jsonify({"error": "Insufficient credits"}), 402
-            
-            # Deduct credits and commit before starting the task
-            user_id = current_user.id
-            with app.app_context():
-                user = User.query.get(user_id)
-                if user:
-                    user.credits -= required_credits
-                    db.session.commit()
-                    current_app.logger.info(f"Deducted {required_credits} credits from user {user_id}")
-            
-            # Let's define the intended final output directory using config
-            final_output_dir = current_app.config['OUTPUT_FOLDER']
-            # Define the temporary directory using config
-            temp_dir = current_app.config['TEMP_FOLDER'] 
-            # Ensure the output and temp folders exist
-            os.makedirs(final_output_dir, exist_ok=True)
-            os.makedirs(temp_dir, exist_ok=True) 
-            # The final filename will be constructed within the task based on this dir.
-
-            # Store parameters needed for processing
-            task = process_pdf.delay(
-                file_content=pdf_content,
-                filename=safe_filename,
-                voice={'language': voice},
-                output_format=output_format,
-                user_id=user_id,
-                audio_speed=audio_speed
+            try:
+                output_format = parse_output_format(request.form)
+                page_start, page_end, preview = parse_page_options(request.form)
+                languages = parse_languages(request.form)
+                callback_url = parse_callback_url(request.form)
+                audio_encoding = parse_audio_encoding(request.form)
+            except ValueError as e:
+                discard_upload(source_key)
+                return jsonify({"error": str(e)}), 400
+            
+            if len(languages) > 1:
+                # One extraction, then a concurrent branch per language
+                job_id, tasks = submit_multilingual(
+                    current_user.id,
+                    safe_filename,
+                    languages,
+                    output_format,
+                    audio_speed=audio_speed,
+                    source_key=source_key,
+                    page_start=page_start,
+                    page_end=page_end,
+                    preview=preview,
+                    callback_url=callback_url,
+                    audio_encoding=audio_encoding
+                )
+                if job_id is None:
+                    discard_upload(source_key)
+                    return jsonify({"error": "Insufficient credits"}), 402
+                return jsonify({'job_id': job_id, 'tasks': tasks, 'status': 'processing'}), 202
+            voice = languages[0]
+
+            # Reserve credits and enqueue the conversion, or join an identical job
+            task_id, coalesced = submit_conversion(
+                current_user.id,
+                safe_filename,
+                voice,
+                output_format,
+                audio_speed=audio_speed,
+                source_key=source_key,
+                content_sha256=manifest['sha256'],
+                idempotency_key=request.headers.get('Idempotency-Key'),
+                page_start=page_start,
+                page_end=page_end,
+                preview=preview,
+                callback_url=callback_url,
+                audio_encoding=audio_encoding
             )
-            return jsonify({'task_id': task.id, 'status': 'processing'}), 202
+            if task_id is None or coalesced:
+                # The upload won't be processed, so free it now
+                discard_upload(source_key)
+            if task_id is None:
+                return jsonify({"error": "Insufficient credits"}), 402
+            return jsonify({'task_id': task_id, 'status': 'processing', 'coalesced': coalesced}), 202
             
         return jsonify({"error": "Invalid file type"}), 400
         
@@ -123,6 +131,150 @@ def process_file():
         current_app.logger.error(f"Error processing file: {str(e)}\n{error_details}")
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/batch', methods=['POST'])
+@login_required
+def process_batch():
+    """
+    Convert many PDFs in one request.
+
+    Accepts any number of `pdf_files` parts, each a PDF or a ZIP of PDFs,
+    plus the usual voice, output_format, audio_speed, audio_encoding,
+    page_start, page_end and preview fields, which apply to every file. Each PDF is streamed
+    once into the blob store; credits for the whole batch are reserved
+    together. Progress is available from /jobs/<batch_id>.
+    """
+    files = [file for file in request.files.getlist("pdf_files") if file.filename]
+    if not files:
+        return jsonify({"error": "No files in the request"}), 400
+
+    max_files = int(current_app.config.get('MAX_BATCH_FILES', DEFAULT_MAX_BATCH_FILES))
+    max_size = int(current_app.config.get('UPLOAD_MAX_SIZE', 200 * 1024 * 1024))
+    voice = request.form.get("voice", "en")
+    audio_speed = float(request.form.get("audio_speed", "1.0"))
+    try:
+        output_format = parse_output_format(request.form)
+        page_start, page_end, preview = parse_page_options(request.form)
+        callback_url = parse_callback_url(request.form)
+        audio_encoding = parse_audio_encoding(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ingested = []
+    try:
+        for file in files:
+            name = file.filename.lower()
+            if name.endswith(".zip"):
+                ingested.extend(ingest_zip(file.stream, max_files - len(ingested), max_size))
+            elif name.endswith(".pdf"):
+                safe_filename = secure_filename(file.filename)
+                source_key, manifest = ingest_upload(file.stream, safe_filename)
+                ingested.append((safe_filename, source_key, manifest))
+            else:
+                raise InvalidUpload(f"{file.filename} is not a PDF or ZIP file")
+            if len(ingested) > max_files:
+                raise InvalidUpload(f"A batch may hold at most {max_files} PDF files")
+
+        batch_id, tasks = submit_batch(
+            current_user.id,
+            ingested,
+            voice,
+            output_format,
+            audio_speed=audio_speed,
+            page_start=page_start,
+            page_end=page_end,
+            preview=preview,
+            callback_url=callback_url,
+            audio_encoding=audio_encoding
+        )
+    except InvalidUpload as e:
+        for _filename, source_key, _manifest in ingested:
+            discard_upload(source_key)
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        for _filename, source_key, _manifest in ingested:
+            discard_upload(source_key)
+        current_app.logger.error(f"Error submitting batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+    if batch_id is None:
+        for _filename, source_key, _manifest in ingested:
+            discard_upload(source_key)
+        return jsonify({"error": "Insufficient credits"}), 402
+    current_app.logger.info(f"Batch {batch_id} submitted with {len(tasks)} files")
+    return jsonify({'batch_id': batch_id, 'tasks': tasks, 'status': 'processing'}), 202
+
+@bp.route('/jobs/status', methods=['POST'])
+@login_required
+def bulk_job_status():
+    """
+    Status of many tasks in one request.
+
+    JSON body: {"task_ids": [...]}. The response maps every id to its
+    status, progress, error and downloadable outputs.
+    """
+    data = request.get_json(silent=True) or {}
+    task_ids = data.get('task_ids')
+    if not isinstance(task_ids, list) or not all(isinstance(task_id, str) for task_id in task_ids):
+        return jsonify({"error": "task_ids must be a list of task ids"}), 400
+    task_ids = list(dict.fromkeys(task_ids))
+    if len(task_ids) > MAX_STATUS_TASK_IDS:
+        return jsonify({"error": f"At most {MAX_STATUS_TASK_IDS} task ids per request"}), 400
+
+    response = jsonify({'tasks': get_task_states(current_user.id, task_ids)})
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
+
+@bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Overall and per-task progress of a multi-language job or a batch."""
+    group = get_job_group(job_id, user_id=current_user.id)
+    if group is None:
+        return jsonify({"error": "Job not found"}), 404
+    response = jsonify(job_group_status(group))
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
+
+@bp.route('/jobs/<task_id>/derive', methods=['POST'])
+@login_required
+def derive_job(task_id):
+    """
+    Make another speed, encoding or PDF layout of a completed job without re-synthesis.
+
+    Accepts output_format, audio_speed, audio_encoding, pdf_page_size,
+    pdf_font_size and callback_url (as form data or JSON). Only works if
+    intermediate retention is turned on with INTERMEDIATE_TTL (0, the
+    default, keeps nothing) and only while they are kept. Returns the task
+    id of the derivation, whose progress and downloads work like any task's.
+    """
+    record = get_intermediates(task_id, user_id=current_user.id)
+    if record is None:
+        return jsonify({"error": "No intermediates kept for this task; submit the PDF again"}), 404
+
+    params = request.get_json(silent=True) or request.form
+    try:
+        output_format, audio_speed, page_size, font_size = parse_derive_options(params)
+        audio_encoding = parse_audio_encoding(params)
+        callback_url = parse_callback_url(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if output_format in ('audio', 'both') and not record.get('has_audio'):
+        return jsonify({"error": "This task kept no audio; only a PDF can be derived"}), 409
+
+    derived_id = submit_derivation(
+        current_user.id,
+        task_id,
+        output_format,
+        audio_speed=audio_speed,
+        audio_encoding=audio_encoding,
+        page_size=page_size,
+        font_size=font_size,
+        callback_url=callback_url
+    )
+    if derived_id is None:
+        return jsonify({"error": "Insufficient credits"}), 402
+    return jsonify({'task_id': derived_id, 'derived_from': task_id, 'status': 'processing'}), 202
+
 @bp.route('/progress/<task_id>')
 def progress(task_id):
     try:
@@ -180,6 +332,41 @@ def progress(task_id):
             'task_id': task_id
         }), 202
 
+@bp.route('/stream/<task_id>/playlist.m3u8')
+@login_required
+def stream_playlist(task_id):
+    """
+    HLS playlist of a task's audio, growing while the job runs.
+
+    Each synthesized chunk is listed as soon as the worker publishes it, so
+    playback can start within seconds of submitting a long document.
+    """
+    stream = hls.get_stream(task_id)
+    if stream is None or stream['user_id'] != current_user.id:
+        return jsonify({"error": "Stream not found"}), 404
+
+    playlist = hls.render_playlist(stream, lambda index: url_for('main.stream_segment', task_id=task_id, index=index))
+    response = Response(playlist, mimetype='application/vnd.apple.mpegurl')
+    # A growing playlist must be re-fetched on every reload
+    response.headers['Cache-Control'] = 'max-age=300' if stream['ended'] else 'no-cache'
+    return response
+
+@bp.route('/stream/<task_id>/<int:index>.mp3')
+@login_required
+def stream_segment(task_id, index):
+    """One HLS segment (a synthesized chunk of MP3 audio)."""
+    stream = hls.get_stream(task_id)
+    if stream is None or stream['user_id'] != current_user.id or index >= len(stream['durations']):
+        return jsonify({"error": "Segment not found"}), 404
+
+    data = hls.get_segment(task_id, index)
+    if data is None:
+        return jsonify({"error": "Segment expired"}), 404
+    response = Response(data, mimetype='audio/mpeg')
+    # Segments never change once published
+    response.headers['Cache-Control'] = 'private, max-age=86400, immutable'
+    return response
+
 @bp.route('/download/<task_id>/<file_type>', methods=['GET'])
 def download_file(task_id, file_type):
     """Download a processed file via Redis or S3 redirect with improved robustness"""
@@ -218,8 +405,27 @@ def download_file(task_id, file_type):
         # Even if the task is not completed according to progress data, we'll try to get the file anyway
         # The file might already be in Redis or Storage but the progress update is delayed
         
-        # 2. Check for Remote S3 URL first
+        # 2. Resolve through the artifact registry written by the worker
+        artifact = get_artifact(task_id, file_type)
+        if artifact:
+            extension = os.path.splitext(artifact.filename)[1]
+            response = serve_artifact(artifact, download_name=f"docecho_{task_id}{extension}")
+            if response:
+                logger.info(f"[{task_id}] Serving {file_type} from artifact registry ({artifact.storage})")
+                response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+                return response
+        
+        # 3. Jobs from before the registry: check remote storage recorded in progress data
         if progress_data:
+            # Private objects recorded by the worker are served via presigned URLs
+            remote_key = (progress_data.get('remote_keys') or {}).get(file_type)
+            if remote_key:
+                presigned_url = get_presigned_url(remote_key, download_name=os.path.basename(remote_key))
+                if presigned_url:
+                    logger.info(f"[{task_id}] Redirecting to presigned URL for {file_type} (key {remote_key})")
+                    return redirect(presigned_url)
+                logger.warning(f"[{task_id}] Could not presign remote key {remote_key}")
+
             remote_urls = progress_data.get('remote_urls', {})
             remote_url = remote_urls.get(file_type)
             # Fallback check for older keys if needed
@@ -234,11 +440,30 @@ def download_file(task_id, file_type):
         else:
             logger.warning(f"[{task_id}] No progress data found, will try direct Redis access")
         
-        # 3. If no S3 URL, try getting content from Redis
+        # 4. If no S3 URL, try getting content from Redis
         logger.info(f"[{task_id}] Attempting Redis fetch for type: {file_type}")
         redis_client = get_redis()
-        content_key = f"file_content:{task_id}:{file_type}"
+        content_key = blob_key(task_id, file_type)
         logger.info(f"[{task_id}] Constructed Redis key: {content_key}")
+
+        # Determine filename and mimetype
+        file_extension = 'mp3' if file_type == 'audio' else ('pdf' if file_type == 'pdf' else 'txt')
+        download_filename = f"docecho_{task_id}.{file_extension}"
+        mimetype = 'audio/mpeg' if file_type == 'audio' else ('application/pdf' if file_type == 'pdf' else 'text/plain')
+
+        # Chunked blobs are streamed segment by segment to keep memory bounded
+        try:
+            response = blob_response(redis_client, content_key, download_filename, mimetype)
+            if response:
+                logger.info(f"[{task_id}] Streaming chunked blob {content_key} as {download_filename}")
+                response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+                response.headers["Pragma"] = "no-cache"
+                response.headers["Expires"] = "0"
+                return response
+        except Exception as e:
+            logger.error(f"[{task_id}] Error reading chunked blob {content_key}: {str(e)}")
+
+        # Fall back to the legacy single-key format
         file_content = None
         try:
             file_content = redis_client.get(content_key)
@@ -251,11 +476,6 @@ def download_file(task_id, file_type):
             file_content = None
 
         if file_content:
-            # Determine filename and mimetype
-            file_extension = 'mp3' if file_type == 'audio' else ('pdf' if file_type == 'pdf' else 'txt')
-            download_filename = f"docecho_{task_id}.{file_extension}"
-            mimetype = 'audio/mpeg' if file_type == 'audio' else ('application/pdf' if file_type == 'pdf' else 'text/plain')
-            
             logger.info(f"[{task_id}] Sending file from Redis content as {download_filename} with mimetype {mimetype}")
 
             # Send the file content from memory
@@ -271,7 +491,7 @@ def download_file(task_id, file_type):
             
             return response
         
-        # 4. If no direct file content found, let's check if we should do a waiting page or error
+        # 5. If no direct file content found, let's check if we should do a waiting page or error
         if progress_data:
             status = progress_data.get('status', '')
             progress = progress_data.get('progress', 0)
@@ -438,16 +658,20 @@ def webhook():
                 user_id = int(user_id)
                 credits_to_add = int(credits_to_add)
                 
-                # Update the user's credits
-                with current_app.app_context():
-                    user = User.query.get(user_id)
-                    if user:
-                        user.credits += credits_to_add
-                        db.session.commit()
-                        current_app.logger.info(f"Added {credits_to_add} credits to user {user_id}")
-                    else:
-                        current_app.logger.error(f"User {user_id} not found")
-                        return jsonify(error=f"User {user_id} not found"), 404
+                # Update the user's credits and record the purchase in the ledger. Stripe retries
+                # webhooks, and the unique purchase reference makes a repeat delivery fail atomically
+                try:
+                    balance = add_credits(
+                        user_id, credits_to_add, CreditLedgerEntry.TYPE_PURCHASE,
+                        reference=session.id, description=f'{credits_to_add} Credits Package'
+                    )
+                except IntegrityError:
+                    current_app.logger.info(f"Checkout session {session.id} already credited, skipping")
+                    return jsonify(success=True)
+                if balance is None:
+                    current_app.logger.error(f"User {user_id} not found")
+                    return jsonify(error=f"User {user_id} not found"), 404
+                current_app.logger.info(f"Added {credits_to_add} credits to user {user_id}")
             except Exception as e:
                 current_app.logger.error(f"Error updating user credits: {str(e)}")
                 return jsonify(error=str(e)), 500
@@ -473,7 +697,9 @@ def clear_users():
         confirmation = request.form.get('confirmation')
         if confirmation == 'DELETE_ALL_USERS':
             try:
-                # Delete all users except the current one
+                # Delete all users except the current one, with their stored outputs
+                for (user_id,) in db.session.query(User.id).filter(User.id != current_user.id).all():
+                    evict_user_artifacts(user_id)
                 User.query.filter(User.id != current_user.id).delete()
                 db.session.commit()
                 flash('All users except your account have been deleted.', 'success')
@@ -492,9 +718,12 @@ def clear_users():
 @login_required
 def dashboard():
     """User dashboard showing credits and transaction history"""
+    history, next_cursor = get_credit_history(current_user.id, limit=20, cursor=request.args.get('before'))
     return render_template('dashboard.html', 
                           user=current_user,
-                          credit_packages=CREDIT_PACKAGES)
+                          credit_packages=CREDIT_PACKAGES,
+                          history=history,
+                          next_cursor=next_cursor)
 
 @bp.route('/admin/users')
 @login_required
@@ -507,6 +736,24 @@ def admin_users():
     users = User.query.all()
     return render_template('admin/users.html', users=users)
 
+@bp.route('/admin/redis-stats')
+@login_required
+def admin_redis_stats():
+    """Admin route exposing Redis connection pool statistics for this process"""
+    if not (os.environ.get('FLASK_ENV') == 'development' or current_user.is_admin):
+        abort(403, "Unauthorized access")
+
+    return jsonify(get_redis_pool_stats())
+
+@bp.route('/admin/job-stats')
+@login_required
+def admin_job_stats():
+    """Admin route exposing submission counters, including coalesced duplicates"""
+    if not (os.environ.get('FLASK_ENV') == 'development' or current_user.is_admin):
+        abort(403, "Unauthorized access")
+
+    return jsonify(get_job_metrics())
+
 @bp.route('/downloads/<task_id>')
 @login_required
 def download_page(task_id):
@@ -527,23 +774,15 @@ def download_page(task_id):
             flash("Files are still being processed. Please wait until they're ready.", "warning")
             return redirect(url_for('main.index'))
         
-        # Prepare download links
+        # Prepare download links for the outputs registered for this task
         download_links = {}
         
-        if 'audio_file' in data:
-            audio_path = data['audio_file']
-            if os.path.exists(audio_path):
-                download_links['audio'] = {
-                    'url': url_for('main.download', task_id=task_id, type='audio', final='false', t=int(datetime.now().timestamp())),
-                    'filename': os.path.basename(audio_path)
-                }
-        
-        if 'pdf_file' in data:
-            pdf_path = data['pdf_file']
-            if os.path.exists(pdf_path):
-                download_links['pdf'] = {
-                    'url': url_for('main.download', task_id=task_id, type='pdf', final='true', t=int(datetime.now().timestamp())),
-                    'filename': os.path.basename(pdf_path)
+        for file_type, final in (('audio', 'false'), ('pdf', 'true')):
+            artifact = get_artifact(task_id, file_type, user_id=current_user.id)
+            if artifact:
+                download_links[file_type] = {
+                    'url': url_for('main.download', task_id=task_id, type=file_type, final=final, t=int(datetime.now().timestamp())),
+                    'filename': artifact.filename
                 }
                 
         if not download_links:
@@ -570,72 +809,26 @@ def direct_download(task_id, file_type):
     try:
         current_app.logger.info(f"Direct download requested for task {task_id}, file type {file_type}")
         
-        if file_type not in ['audio', 'pdf']:
-            return "Invalid file type. Must be 'audio' or 'pdf'.", 400
-            
-        data = get_progress(task_id)
-        if not data:
-            return "Task not found. It may have expired.", 404
+        if file_type not in OUTPUT_FILE_TYPES:
+            return f"Invalid file type. Must be one of {', '.join(OUTPUT_FILE_TYPES)}.", 400
             
-        # Check both capitalized and lowercased version of 'completed'
-        status = data.get('status', '')
-        if status.lower() != 'completed' and not status.startswith('Warning'):
-            return f"Task not ready. Current status: {status}", 400
+        # Outputs are registered once published, so a registered artifact is ready to download
+        artifact = get_artifact(task_id, file_type, user_id=current_user.id)
+        if not artifact:
+            data = get_progress(task_id)
+            if not data:
+                return "Task not found. It may have expired.", 404
             
-        file_key = f"{file_type}_file"
-        if file_key not in data:
+            # Check both capitalized and lowercased version of 'completed'
+            status = data.get('status', '')
+            if status.lower() != 'completed' and not status.startswith('Warning'):
+                return f"Task not ready. Current status: {status}", 400
             return f"No {file_type} file available for this task.", 404
-            
-        original_file_path = data[file_key]
-        current_app.logger.info(f"Original file path for {file_type}: {original_file_path}")
-        
-        # Try the original path first
-        file_path = original_file_path
         
-        # If the file doesn't exist at the original path, try finding it by filename in the output directory
-        if not os.path.exists(file_path):
-            current_app.logger.warning(f"File not found at original path: {file_path}")
-            
-            # Extract just the filename
-            filename = os.path.basename(file_path)
-            output_dir = current_app.config['OUTPUT_FOLDER']
-            
-            # Alternative path - look in the output directory
-            alternative_path = os.path.join(output_dir, filename)
-            current_app.logger.info(f"Trying alternative path: {alternative_path}")
-            
-            if os.path.exists(alternative_path):
-                current_app.logger.info(f"File found at alternative path!")
-                file_path = alternative_path
-            else:
-                # Try one more approach - list all files in the output directory and look for similar names
-                try:
-                    output_files = os.listdir(output_dir)
-                    current_app.logger.info(f"Files in output directory: {output_files}")
-                    
-                    # Look for files with similar names (e.g., without specific path components)
-                    filename_base = os.path.splitext(filename)[0]
-                    for output_file in output_files:
-                        if filename_base in output_file:
-                            matching_path = os.path.join(output_dir, output_file)
-                            current_app.logger.info(f"Found matching file: {matching_path}")
-                            file_path = matching_path
-                            break
-                except Exception as e:
-                    current_app.logger.error(f"Error listing output directory: {e}")
-        
-        if not os.path.exists(file_path):
-            return f"File does not exist at path: {file_path}", 404
-            
-        original_filename = os.path.basename(file_path)
-        download_name = f"{os.path.splitext(original_filename)[0]}_{task_id[:6]}{os.path.splitext(original_filename)[1]}"
-        
-        return send_file(
-            file_path,
-            mimetype='audio/mpeg' if file_type == 'audio' else 'application/pdf',
-            as_attachment=True,
-            download_name=download_name
-        )
+        response = serve_artifact(artifact)
+        if not response:
+            return f"The {file_type} file for this task is no longer available.", 404
+        return response
         
     except Exception as e:
         current_app.logger.error(f"Error in direct download: {e}")
@@ -727,31 +920,18 @@ def downloads_page():
     # Get info about files available for this user
     user_id = current_user.id
     
-    # Get the output directory from config
-    output_dir = current_app.config.get('OUTPUT_FOLDER', '.')
-    
     # This will store file information to display
     available_files = []
     
     try:
-        # Check for files in the output directory
-        if os.path.exists(output_dir):
-            files = os.listdir(output_dir)
-            
-            # Filter files for this user (using a naming convention or metadata)
-            for filename in files:
-                # Your logic to determine if file belongs to user
-                # For example, check for user_id in filename or metadata
-                # This is a placeholder logic - adapt to your actual file naming convention
-                if f"user_{user_id}_" in filename or f"_{user_id}_" in filename:
-                    file_path = os.path.join(output_dir, filename)
-                    file_info = {
-                        'name': filename,
-                        'size': os.path.getsize(file_path),
-                        'created': datetime.fromtimestamp(os.path.getctime(file_path)).strftime('%Y-%m-%d %H:%M'),
-                        'url': url_for('main.download_file', task_id=filename.split('.')[0])
-                    }
-                    available_files.append(file_info)
+        # Index lookup on (user_id, created_at) in the artifact registry
+        for artifact in list_user_artifacts(user_id):
+            available_files.append({
+                'name': artifact.filename,
+                'size': artifact.size or 0,
+                'created': artifact.created_at.strftime('%Y-%m-%d %H:%M'),
+                'url': url_for('main.download_file', task_id=artifact.task_id, file_type=artifact.file_type)
+            })
     except Exception as e:
         current_app.logger.error(f"Error listing files: {str(e)}")
     
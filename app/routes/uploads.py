@@ -0,0 +1,175 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from werkzeug.utils import secure_filename
+from app.utils.uploads import (
+    UploadError, create_upload, get_upload, store_part, complete_upload, delete_upload, upload_blob_key,
+    upload_lock, mark_upload_submitted
+)
+from app.utils.jobs import (
+    submit_conversion, submit_multilingual, parse_page_options, parse_languages, parse_callback_url, parse_output_format
+)
+from app.utils.audio_encoding import parse_audio_encoding
+
+bp = Blueprint('uploads', __name__)
+
+def _upload_status(session):
+    """Public view of an upload session, used by clients to resume."""
+    return {
+        'upload_id': session['upload_id'],
+        'filename': session['filename'],
+        'size': session['size'],
+        'part_size': session['part_size'],
+        'parts': session['parts'],
+        'next_part': session['next_part']
+    }
+
+@bp.errorhandler(UploadError)
+def handle_upload_error(error):
+    return jsonify({"error": str(error)}), error.status_code
+
+@bp.route('', methods=['POST'])
+@login_required
+def init_upload():
+    """
+    Start a resumable upload.
+
+    JSON body: filename, size (bytes) and optionally sha256 of the whole file.
+    The response tells the client the part size and how many parts to PUT.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    if not filename.lower().endswith('.pdf'):
+        return jsonify({"error": "Only PDF files are supported"}), 400
+
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid size"}), 400
+
+    session = create_upload(current_user.id, filename, size, sha256=data.get('sha256'))
+    return jsonify(_upload_status(session)), 201
+
+@bp.route('/<upload_id>', methods=['GET'])
+@login_required
+def upload_status(upload_id):
+    """Report how far an upload got, so an interrupted client can resume at next_part."""
+    session = get_upload(upload_id, user_id=current_user.id)
+    if session is None:
+        return jsonify({"error": "Upload not found or expired"}), 404
+    return jsonify(_upload_status(session))
+
+@bp.route('/<upload_id>/parts/<int:index>', methods=['PUT'])
+@login_required
+def upload_part(upload_id, index):
+    """
+    Store one part. The body is the raw part bytes and the X-Part-SHA256
+    header carries its hex SHA-256.
+    """
+    session = get_upload(upload_id, user_id=current_user.id)
+    if session is None:
+        return jsonify({"error": "Upload not found or expired"}), 404
+
+    next_part = store_part(session, index, request.stream, request.headers.get('X-Part-SHA256'))
+    return jsonify({'upload_id': upload_id, 'next_part': next_part, 'parts': session['parts']})
+
+@bp.route('/<upload_id>/complete', methods=['POST'])
+@login_required
+def finish_upload(upload_id):
+    """
+    Verify the assembled file and start the conversion.
+
+    Accepts the same voice (or languages), output_format, audio_speed,
+    audio_encoding, page_start, page_end, preview and callback_url fields
+    as the single-request upload form (as form data or JSON).
+    """
+    session = get_upload(upload_id, user_id=current_user.id)
+    if session is None:
+        return jsonify({"error": "Upload not found or expired"}), 404
+
+    params = request.get_json(silent=True) or request.form
+    try:
+        audio_speed = float(params.get("audio_speed", "1.0"))
+        output_format = parse_output_format(params)
+        page_start, page_end, preview = parse_page_options(params)
+        languages = parse_languages(params)
+        callback_url = parse_callback_url(params)
+        audio_encoding = parse_audio_encoding(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    lock = upload_lock(upload_id)
+    if not lock.acquire(blocking=False):
+        return jsonify({"error": "Upload is busy, retry shortly"}), 409
+
+    try:
+        # Completing twice (e.g. a retried request) returns the job already started
+        session = get_upload(upload_id)
+        if session is None:
+            # Aborted or expired since the check above
+            return jsonify({"error": "Upload not found or expired"}), 404
+        if session.get('task_id'):
+            return jsonify({'task_id': session['task_id'], 'status': 'processing'}), 202
+        if session.get('job_id'):
+            return jsonify({'job_id': session['job_id'], 'status': 'processing'}), 202
+
+        manifest = complete_upload(session)
+        current_app.logger.info(f"Upload {upload_id} complete: {manifest['size']} bytes")
+
+        if len(languages) > 1:
+            job_id, tasks = submit_multilingual(
+                current_user.id,
+                session['filename'],
+                languages,
+                output_format,
+                audio_speed=audio_speed,
+                source_key=upload_blob_key(upload_id),
+                page_start=page_start,
+                page_end=page_end,
+                preview=preview,
+                callback_url=callback_url,
+                audio_encoding=audio_encoding
+            )
+            if job_id is None:
+                return jsonify({"error": "Insufficient credits"}), 402
+            mark_upload_submitted(upload_id, job_id, field='job_id')
+            return jsonify({'job_id': job_id, 'tasks': tasks, 'status': 'processing'}), 202
+
+        # The worker reads the assembled blob and deletes it when done
+        task_id, coalesced = submit_conversion(
+            current_user.id,
+            session['filename'],
+            languages[0],
+            output_format,
+            audio_speed=audio_speed,
+            source_key=upload_blob_key(upload_id),
+            content_sha256=manifest['sha256'],
+            idempotency_key=request.headers.get('Idempotency-Key'),
+            page_start=page_start,
+            page_end=page_end,
+            preview=preview,
+            callback_url=callback_url,
+            audio_encoding=audio_encoding
+        )
+        if task_id is None:
+            return jsonify({"error": "Insufficient credits"}), 402
+        if coalesced:
+            # An identical job is already running; this copy of the file is not needed
+            delete_upload(session)
+        else:
+            mark_upload_submitted(upload_id, task_id)
+        return jsonify({'task_id': task_id, 'status': 'processing', 'coalesced': coalesced}), 202
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+@bp.route('/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_upload(upload_id):
+    """Abandon an upload and free the parts stored so far."""
+    session = get_upload(upload_id, user_id=current_user.id)
+    if session is None:
+        return jsonify({"error": "Upload not found or expired"}), 404
+    delete_upload(session)
+    return jsonify({'upload_id': upload_id, 'status': 'deleted'})
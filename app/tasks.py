@@ -0,0 +1,113 @@
+"""
+Thin task signatures for enqueueing Celery work from the web tier.
+
+Tasks are sent by name so that web processes never import the worker
+modules (and with them PyPDF2, gTTS, pydub, googletrans, reportlab, PIL).
+The worker registers the real implementations via the `include` list in
+celery_worker.py.
+"""
+from celery import group
+from celery_worker import celery
+
+PROCESS_PDF_TASK = 'app.utils.pdf_processor.process_pdf'
+PREPARE_DOCUMENT_TASK = 'app.utils.pdf_processor.prepare_document'
+DERIVE_OUTPUTS_TASK = 'app.utils.pdf_processor.derive_outputs'
+
+def enqueue_process_pdf(file_content, filename, voice, output_format, user_id, audio_speed=1.0, task_id=None,
+                        source_key=None, page_start=None, page_end=None, preview=False, queue=None,
+                        audio_encoding=None):
+    """
+    Enqueue a process_pdf run and return the AsyncResult.
+
+    Pass task_id to use an id chosen before submission (e.g. one that
+    credits were already reserved under). Instead of file_content, the PDF
+    can be handed over as source_key, the key of a chunked Redis blob
+    (see app.utils.blob_store) that the worker reads and then deletes.
+    page_start/page_end (1-based, inclusive) and preview limit the text
+    converted; queue routes the task to a specific worker queue (None uses
+    the default one). audio_encoding names the output preset (None uses
+    AUDIO_ENCODING).
+    """
+    options = {'queue': queue} if queue else {}
+    return celery.send_task(
+        PROCESS_PDF_TASK,
+        task_id=task_id,
+        kwargs={
+            'file_content': file_content,
+            'filename': filename,
+            'voice': voice,
+            'output_format': output_format,
+            'user_id': user_id,
+            'audio_speed': audio_speed,
+            'source_key': source_key,
+            'page_start': page_start,
+            'page_end': page_end,
+            'preview': preview,
+            'audio_encoding': audio_encoding
+        },
+        **options
+    )
+
+def enqueue_prepare_document(job_id, source_key, filename, user_id, branches, audio_speed=1.0, page_start=None,
+                             page_end=None, preview=False, queue=None, audio_encoding=None):
+    """
+    Enqueue a multi-language job and return the AsyncResult.
+
+    The prepare_document task (running as job_id) extracts the text and
+    detects its language once, then starts one process_pdf per entry of
+    branches, each a dict with task_id, voice and output_format.
+    """
+    options = {'queue': queue} if queue else {}
+    return celery.send_task(
+        PREPARE_DOCUMENT_TASK,
+        task_id=job_id,
+        kwargs={
+            'source_key': source_key,
+            'filename': filename,
+            'user_id': user_id,
+            'branches': branches,
+            'audio_speed': audio_speed,
+            'page_start': page_start,
+            'page_end': page_end,
+            'preview': preview,
+            'queue': queue,
+            'audio_encoding': audio_encoding
+        },
+        **options
+    )
+
+def enqueue_process_pdf_group(jobs, queue=None):
+    """
+    Enqueue several process_pdf runs as one Celery group and return the GroupResult.
+
+    Each job is a dict of process_pdf keyword arguments plus the task_id to
+    run it under.
+    """
+    options = {'queue': queue} if queue else {}
+    signatures = []
+    for job in jobs:
+        kwargs = dict(job)
+        task_id = kwargs.pop('task_id')
+        signatures.append(celery.signature(PROCESS_PDF_TASK, kwargs=kwargs, task_id=task_id, **options))
+    return group(signatures).apply_async()
+
+def enqueue_derive_outputs(task_id, source_task_id, user_id, output_format, audio_speed=1.0, audio_encoding=None,
+                           page_size='a4', font_size=16, queue=None):
+    """
+    Enqueue a derive_outputs run (new outputs from a completed job's intermediates) and return the AsyncResult.
+    """
+    options = {'queue': queue} if queue else {}
+    return celery.send_task(
+        DERIVE_OUTPUTS_TASK,
+        task_id=task_id,
+        kwargs={
+            'source_task_id': source_task_id,
+            'user_id': user_id,
+            'output_format': output_format,
+            'audio_speed': audio_speed,
+            'audio_encoding': audio_encoding,
+            'page_size': page_size,
+            'font_size': font_size
+        },
+        **options
+    )
@@ -0,0 +1,208 @@
+import os
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from flask import redirect, send_file
+from sqlalchemy import update
+from app.extensions import db
+from app.models.artifact import Artifact
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Downloads within this window don't rewrite last_accessed_at again
+ACCESS_TOUCH_INTERVAL = timedelta(hours=1)
+
+MIMETYPES = {
+    'audio': 'audio/mpeg',
+    'pdf': 'application/pdf',
+    'text': 'text/plain',
+    'markdown': 'text/markdown',
+    'epub': 'application/epub+zip',
+    'chapters': 'text/vtt',
+    'page_index': 'application/json'
+}
+
+# Audio can be encoded as MP3, Ogg Opus or AAC; the filename tells which
+EXTENSION_MIMETYPES = {
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.m4a': 'audio/mp4'
+}
+
+def get_mimetype(file_type, filename=None):
+    if filename:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in EXTENSION_MIMETYPES:
+            return EXTENSION_MIMETYPES[extension]
+    return MIMETYPES.get(file_type, 'application/octet-stream')
+
+def _file_checksum(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks."""
+    checksum = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for data in iter(lambda: f.read(chunk_size), b''):
+            checksum.update(data)
+    return checksum.hexdigest()
+
+def register_artifact(task_id, user_id, file_type, storage, location, file_path):
+    """
+    Record a published output in the artifact registry.
+
+    Re-publishing the same output of a task (e.g. after a retry) updates the
+    existing row instead of adding a second one.
+
+    Args:
+        task_id: Task that produced the output
+        user_id: Owner of the task
+        file_type: 'audio', 'pdf', ...
+        storage: One of the Artifact.STORAGE_* values
+        location: S3 key, Redis blob key or file path, depending on storage
+        file_path: Local file the output was published from
+
+    Returns:
+        The Artifact, or None if it could not be recorded
+    """
+    try:
+        artifact = Artifact.query.filter_by(task_id=task_id, file_type=file_type).first()
+        if artifact is None:
+            artifact = Artifact(task_id=task_id, user_id=user_id, file_type=file_type)
+            db.session.add(artifact)
+
+        artifact.storage = storage
+        artifact.location = location
+        artifact.local_path = file_path
+        artifact.filename = os.path.basename(file_path)
+        artifact.size = os.path.getsize(file_path)
+        artifact.checksum = _file_checksum(file_path)
+        db.session.commit()
+
+        logger.info(f"[{task_id}] Registered {file_type} artifact in {storage} at {location}")
+        return artifact
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[{task_id}] Error registering {file_type} artifact: {str(e)}")
+        return None
+
+def get_artifact(task_id, file_type, user_id=None):
+    """Look up one output of a task, optionally restricted to its owner."""
+    query = Artifact.query.filter_by(task_id=task_id, file_type=file_type)
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    return query.first()
+
+def list_user_artifacts(user_id, limit=50):
+    """A user's most recent outputs, newest first."""
+    return (
+        Artifact.query.filter_by(user_id=user_id)
+        .order_by(Artifact.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+def touch_artifact(artifact):
+    """
+    Record a download for LRU eviction.
+
+    The row is rewritten at most once per ACCESS_TOUCH_INTERVAL so that
+    repeated downloads don't turn every request into a write.
+    """
+    now = datetime.utcnow()
+    if artifact.last_accessed_at and now - artifact.last_accessed_at < ACCESS_TOUCH_INTERVAL:
+        return
+    try:
+        db.session.execute(
+            update(Artifact)
+            .where(Artifact.id == artifact.id)
+            .values(last_accessed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"[{artifact.task_id}] Could not record artifact access: {str(e)}")
+
+def evict_artifact(artifact):
+    """
+    Delete every stored copy of an artifact and its registry row.
+
+    Returns:
+        The number of bytes the artifact accounted for
+    """
+    from app.utils.file_storage import delete_from_remote_storage
+    from app.utils.blob_store import delete_blob
+    from app.utils.redis import get_redis
+
+    try:
+        if artifact.storage == Artifact.STORAGE_S3:
+            delete_from_remote_storage(artifact.location)
+        elif artifact.storage == Artifact.STORAGE_REDIS:
+            delete_blob(get_redis(), artifact.location)
+
+        local_path = artifact.location if artifact.storage == Artifact.STORAGE_LOCAL else artifact.local_path
+        if local_path and os.path.exists(local_path):
+            os.unlink(local_path)
+    except Exception as e:
+        logger.error(f"[{artifact.task_id}] Error deleting {artifact.file_type} artifact content: {str(e)}")
+
+    task_id, file_type, size = artifact.task_id, artifact.file_type, artifact.size or 0
+    db.session.delete(artifact)
+    db.session.commit()
+    logger.info(f"[{task_id}] Evicted {file_type} artifact ({size} bytes)")
+    return size
+
+def evict_user_artifacts(user_id):
+    """
+    Evict every artifact of a user, e.g. before the user is deleted.
+
+    The foreign key cascade only removes registry rows; this also deletes
+    the stored blobs, S3 objects and files.
+
+    Returns:
+        The number of bytes freed
+    """
+    return sum(evict_artifact(artifact) for artifact in Artifact.query.filter_by(user_id=user_id).all())
+
+def download_name_for(artifact):
+    """Filename offered to the browser, tagged with the task so names don't collide."""
+    base, extension = os.path.splitext(artifact.filename)
+    return f"{base}_{artifact.task_id[:6]}{extension}"
+
+def serve_artifact(artifact, download_name=None):
+    """
+    Build a download response for a registered artifact.
+
+    S3 objects are served by redirecting to a presigned URL, Redis blobs are
+    streamed segment by segment, and local files are sent directly if this
+    machine can see them.
+
+    Returns:
+        A Flask response, or None if the artifact's content is no longer available
+    """
+    from app.utils.file_storage import get_presigned_url
+    from app.utils.blob_store import blob_response
+    from app.utils.redis import get_redis
+
+    download_name = download_name or download_name_for(artifact)
+    mimetype = get_mimetype(artifact.file_type, artifact.filename)
+    touch_artifact(artifact)
+
+    try:
+        if artifact.storage == Artifact.STORAGE_S3:
+            presigned_url = get_presigned_url(artifact.location, download_name=download_name)
+            if presigned_url:
+                return redirect(presigned_url)
+        elif artifact.storage == Artifact.STORAGE_REDIS:
+            response = blob_response(get_redis(), artifact.location, download_name, mimetype)
+            if response:
+                return response
+    except Exception as e:
+        logger.error(f"[{artifact.task_id}] Error serving {artifact.file_type} from {artifact.storage}: {str(e)}")
+
+    # The worker's copy is only reachable when the volume is shared (local development)
+    local_path = artifact.location if artifact.storage == Artifact.STORAGE_LOCAL else artifact.local_path
+    if local_path and os.path.exists(local_path):
+        return send_file(local_path, mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+    logger.warning(f"[{artifact.task_id}] {artifact.file_type} artifact is no longer available")
+    return None
@@ -0,0 +1,113 @@
+"""
+Output encodings for synthesized audio.
+
+gTTS returns 24 kHz mono MP3 at 32 kbit/s. Re-encoding that with ffmpeg's
+defaults (128 kbit/s MP3) makes audiobooks about four times larger without
+sounding any better, so every preset here is tuned for speech: mono, 24 kHz
+and an explicit low bitrate. 'passthrough' skips re-encoding entirely and
+keeps the gTTS stream as it is.
+"""
+import os
+import logging
+import subprocess
+from flask import current_app, has_app_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_ENCODING = 'mp3'
+
+# Speech is synthesized at 24 kHz mono; no preset resamples above that
+SPEECH_SAMPLE_RATE = 24000
+
+ENCODINGS = {
+    # gTTS frames copied as they are (only possible for MP3 chunks)
+    'passthrough': {'extension': 'mp3', 'mimetype': 'audio/mpeg', 'format': 'mp3', 'codec': None, 'bitrate': None},
+    # Speech-tuned MP3, plays everywhere
+    'mp3': {'extension': 'mp3', 'mimetype': 'audio/mpeg', 'format': 'mp3', 'codec': 'libmp3lame', 'bitrate': '32k'},
+    # Smallest MP3 that still sounds clean for voice
+    'mp3_low': {'extension': 'mp3', 'mimetype': 'audio/mpeg', 'format': 'mp3', 'codec': 'libmp3lame', 'bitrate': '24k',
+                'sample_rate': 16000},
+    # Opus in an Ogg container; best quality per bit for speech
+    'opus': {'extension': 'ogg', 'mimetype': 'audio/ogg', 'format': 'ogg', 'codec': 'libopus', 'bitrate': '24k',
+             'parameters': ['-application', 'voip']},
+    # AAC in an MP4 container, for Apple players
+    'aac': {'extension': 'm4a', 'mimetype': 'audio/mp4', 'format': 'ipod', 'codec': 'aac', 'bitrate': '40k'},
+}
+
+def default_encoding():
+    if has_app_context() and current_app.config.get('AUDIO_ENCODING'):
+        return current_app.config['AUDIO_ENCODING']
+    return os.environ.get('AUDIO_ENCODING', DEFAULT_AUDIO_ENCODING)
+
+def get_encoding(name):
+    """
+    Look up an encoding preset.
+
+    Raises:
+        ValueError: if the encoding is not known
+    """
+    if name not in ENCODINGS:
+        raise ValueError(f"Unsupported audio encoding: {name}. Choose one of {', '.join(ENCODINGS)}")
+    return ENCODINGS[name]
+
+def parse_audio_encoding(params):
+    """
+    Read the optional audio_encoding of a submission, defaulting to AUDIO_ENCODING.
+
+    Raises:
+        ValueError: if the encoding is not known
+    """
+    name = (params.get('audio_encoding') or '').strip().lower() or default_encoding()
+    get_encoding(name)
+    return name
+
+def audio_extension(name):
+    """File extension (without the dot) of audio in an encoding."""
+    return get_encoding(name or DEFAULT_AUDIO_ENCODING)['extension']
+
+def _ffmpeg_options(preset):
+    """ffmpeg output options shared by pydub exports and direct transcodes."""
+    return ['-ac', '1', '-ar', str(preset.get('sample_rate', SPEECH_SAMPLE_RATE))] + preset.get('parameters', [])
+
+def export_options(name):
+    """
+    Keyword arguments for AudioSegment.export in an encoding.
+
+    pydub always re-encodes, so 'passthrough' falls back to the speech MP3
+    preset, which matches the gTTS stream parameters.
+    """
+    preset = get_encoding('mp3' if name in (None, 'passthrough') else name)
+    return {
+        'format': preset['format'],
+        'codec': preset['codec'],
+        'bitrate': preset['bitrate'],
+        'parameters': _ffmpeg_options(preset)
+    }
+
+def export_segment(segment, output_path, name):
+    """Write a pydub AudioSegment in an encoding."""
+    segment.export(output_path, **export_options(name))
+    return output_path
+
+def transcode_file(input_path, output_path, name, tempo=1.0):
+    """
+    Re-encode an audio file with ffmpeg, streaming it rather than decoding it into memory.
+
+    tempo changes the playback speed (0.5 to 2.0) without changing the pitch.
+
+    Raises:
+        Exception: if ffmpeg fails
+    """
+    preset = get_encoding(name)
+    filters = ['-filter:a', f'atempo={float(tempo)}'] if float(tempo) != 1.0 else []
+    cmd = (['ffmpeg', '-y', '-i', input_path, '-vn', '-map_metadata', '-1'] + filters
+           + ['-c:a', preset['codec'], '-b:a', preset['bitrate']] + _ffmpeg_options(preset)
+           + ['-f', preset['format'], output_path])
+
+    logger.info(f"Running ffmpeg command: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"FFmpeg error: {result.stderr}")
+        raise Exception(f"FFmpeg transcode to {name} failed: {result.stderr}")
+    return output_path
@@ -0,0 +1,272 @@
+import os
+import hashlib
+import logging
+from flask import current_app, has_app_context, has_request_context, request, Response, stream_with_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default segment size for chunked blobs (512 KB keeps each SET well below
+# the point where Redis stalls other clients while copying the value)
+DEFAULT_BLOB_CHUNK_SIZE = 512 * 1024
+
+# Number of segment SETs buffered in a pipeline before it is flushed
+DEFAULT_BLOB_PIPELINE_DEPTH = 8
+
+# Blobs live for 7 days, same as the legacy single-key storage
+DEFAULT_BLOB_TTL = 604800
+
+
+def _get_config(name, default):
+    """Read a blob setting from the app config, falling back to the environment."""
+    if has_app_context():
+        value = current_app.config.get(name)
+        if value is not None:
+            return int(value)
+    return int(os.environ.get(name, default))
+
+
+def blob_key(task_id, file_type):
+    """Base key for a stored output blob (also the legacy single-key name)."""
+    return f"file_content:{task_id}:{file_type}"
+
+
+def _manifest_key(base_key):
+    return f"{base_key}:manifest"
+
+
+def _chunk_key(base_key, index):
+    return f"{base_key}:chunk:{index}"
+
+
+def save_blob(redis_client, base_key, file_path, ttl=None, chunk_size=None):
+    """
+    Store a file in Redis as fixed-size segments plus a manifest hash.
+
+    Segments are written under numbered keys through a non-transactional
+    pipeline that is flushed every few segments, so neither the worker nor
+    Redis ever holds more than a handful of segments at once. The manifest
+    is written last, which means readers never see a partially stored blob.
+
+    Args:
+        redis_client: Redis client to write to
+        base_key: Key prefix for the blob (see blob_key)
+        file_path: Path of the local file to store
+        ttl: Expiration in seconds for all keys of the blob
+        chunk_size: Segment size in bytes
+
+    Returns:
+        The manifest dict that was stored
+    """
+    ttl = ttl or _get_config('REDIS_BLOB_TTL', DEFAULT_BLOB_TTL)
+    chunk_size = chunk_size or _get_config('REDIS_BLOB_CHUNK_SIZE', DEFAULT_BLOB_CHUNK_SIZE)
+    pipeline_depth = _get_config('REDIS_BLOB_PIPELINE_DEPTH', DEFAULT_BLOB_PIPELINE_DEPTH)
+
+    checksum = hashlib.sha256()
+    total_size = 0
+    chunk_count = 0
+
+    pipe = redis_client.pipeline(transaction=False)
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            checksum.update(data)
+            total_size += len(data)
+            pipe.set(_chunk_key(base_key, chunk_count), data, ex=ttl)
+            chunk_count += 1
+
+            # Flush regularly to keep memory and per-command latency bounded
+            if chunk_count % pipeline_depth == 0:
+                pipe.execute()
+
+    manifest = {
+        'size': total_size,
+        'chunk_size': chunk_size,
+        'chunks': chunk_count,
+        'sha256': checksum.hexdigest(),
+        'filename': os.path.basename(file_path)
+    }
+    pipe.hset(_manifest_key(base_key), mapping=manifest)
+    pipe.expire(_manifest_key(base_key), ttl)
+    pipe.execute()
+
+    logger.info(f"Stored {total_size} bytes in {chunk_count} segments under {base_key}")
+    return manifest
+
+
+def save_blob_segment(redis_client, base_key, index, data, ttl=None):
+    """
+    Store one segment of a blob that is being assembled piece by piece.
+
+    The blob stays invisible to readers until write_blob_manifest is called.
+    """
+    ttl = ttl or _get_config('REDIS_BLOB_TTL', DEFAULT_BLOB_TTL)
+    redis_client.set(_chunk_key(base_key, index), data, ex=ttl)
+
+
+def write_blob_manifest(redis_client, base_key, manifest, ttl=None):
+    """Publish a blob assembled with save_blob_segment by writing its manifest."""
+    ttl = ttl or _get_config('REDIS_BLOB_TTL', DEFAULT_BLOB_TTL)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(_manifest_key(base_key), mapping=manifest)
+    pipe.expire(_manifest_key(base_key), ttl)
+    pipe.execute()
+
+
+def delete_blob_segments(redis_client, base_key, count):
+    """Delete the first count segments of a blob that has no manifest (yet)."""
+    pipe = redis_client.pipeline(transaction=False)
+    for index in range(count):
+        pipe.delete(_chunk_key(base_key, index))
+    pipe.execute()
+
+
+def get_blob_manifest(redis_client, base_key):
+    """
+    Load the manifest of a chunked blob.
+
+    Returns:
+        A dict with size, chunk_size, chunks, sha256 and filename, or None if
+        no chunked blob is stored under the key
+    """
+    raw = redis_client.hgetall(_manifest_key(base_key))
+    if not raw:
+        return None
+
+    manifest = {}
+    for key, value in raw.items():
+        key = key.decode('utf-8') if isinstance(key, bytes) else key
+        value = value.decode('utf-8') if isinstance(value, bytes) else value
+        manifest[key] = value
+    for field in ('size', 'chunk_size', 'chunks'):
+        manifest[field] = int(manifest.get(field, 0))
+    if 'page_count_hint' in manifest:
+        manifest['page_count_hint'] = int(manifest['page_count_hint'])
+    return manifest
+
+
+def iter_blob(redis_client, base_key, manifest):
+    """
+    Lazily yield the segments of a chunked blob.
+
+    Only one segment is held in memory at a time. A missing segment ends the
+    stream early so the client sees a truncated download; the checksum is
+    computed incrementally and a mismatch is logged once the stream ends.
+    """
+    checksum = hashlib.sha256()
+    for index in range(manifest['chunks']):
+        data = redis_client.get(_chunk_key(base_key, index))
+        if data is None:
+            logger.error(f"Segment {index} missing for blob {base_key}, ending stream")
+            return
+        checksum.update(data)
+        yield data
+
+    if manifest.get('sha256') and checksum.hexdigest() != manifest['sha256']:
+        logger.error(f"Checksum mismatch for blob {base_key}")
+
+
+def iter_blob_range(redis_client, base_key, manifest, start, stop):
+    """
+    Lazily yield bytes start..stop (exclusive) of a chunked blob.
+
+    Only the segments overlapping the range are read, so seeking into a
+    long recording costs one or two GETs rather than the whole blob.
+    """
+    chunk_size = manifest['chunk_size']
+    for index in range(start // chunk_size, (stop - 1) // chunk_size + 1):
+        data = redis_client.get(_chunk_key(base_key, index))
+        if data is None:
+            logger.error(f"Segment {index} missing for blob {base_key}, ending stream")
+            return
+        segment_start = index * chunk_size
+        yield data[max(start - segment_start, 0):stop - segment_start]
+
+
+def blob_to_file(redis_client, base_key, file_path):
+    """
+    Write a chunked blob to a local file, one segment at a time.
+
+    Returns:
+        The blob's manifest, or None if no chunked blob is stored under the key
+
+    Raises:
+        IOError: if a segment is missing or the checksum does not match
+    """
+    manifest = get_blob_manifest(redis_client, base_key)
+    if not manifest:
+        return None
+
+    checksum = hashlib.sha256()
+    with open(file_path, 'wb') as f:
+        for index in range(manifest['chunks']):
+            data = redis_client.get(_chunk_key(base_key, index))
+            if data is None:
+                raise IOError(f"Segment {index} missing for blob {base_key}")
+            checksum.update(data)
+            f.write(data)
+
+    if manifest.get('sha256') and checksum.hexdigest() != manifest['sha256']:
+        raise IOError(f"Checksum mismatch for blob {base_key}")
+    return manifest
+
+
+def delete_blob(redis_client, base_key, manifest=None):
+    """Delete all segments and the manifest of a chunked blob."""
+    manifest = manifest or get_blob_manifest(redis_client, base_key)
+    if not manifest:
+        return 0
+
+    pipe = redis_client.pipeline(transaction=False)
+    for index in range(manifest['chunks']):
+        pipe.delete(_chunk_key(base_key, index))
+    pipe.delete(_manifest_key(base_key))
+    pipe.execute()
+    return manifest['chunks']
+
+
+def blob_response(redis_client, base_key, download_name, mimetype):
+    """
+    Build a streaming download response for a chunked blob.
+
+    A single-range Range header on the current request is answered with a
+    206 partial response, so players can seek (e.g. to a page offset from
+    a page index) without downloading the whole blob.
+
+    Returns:
+        A Flask Response streaming the blob segments, or None if no chunked
+        blob is stored under the key
+    """
+    manifest = get_blob_manifest(redis_client, base_key)
+    if not manifest:
+        return None
+
+    byte_range = request.range if has_request_context() else None
+    if byte_range is not None and len(byte_range.ranges) == 1 and manifest['size']:
+        span = byte_range.range_for_length(manifest['size'])
+        if span is None:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f"bytes */{manifest['size']}"
+            return response
+        start, stop = span
+        response = Response(
+            stream_with_context(iter_blob_range(redis_client, base_key, manifest, start, stop)),
+            status=206,
+            mimetype=mimetype
+        )
+        response.headers['Content-Length'] = str(stop - start)
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{manifest['size']}"
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        return response
+
+    response = Response(
+        stream_with_context(iter_blob(redis_client, base_key, manifest)),
+        mimetype=mimetype
+    )
+    response.headers['Content-Length'] = str(manifest['size'])
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    return response
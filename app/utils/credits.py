@@ -0,0 +1,254 @@
+import logging
+from datetime import datetime
+from sqlalchemy import update, or_, and_
+from app.extensions import db
+from app.models.user import User
+from app.models.credit_reservation import CreditReservation
+from app.models.credit_ledger import CreditLedgerEntry
+from app.utils.user_cache import invalidate_user
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def record_credit_change(user_id, amount, entry_type, reference=None, description=None, require_balance=False):
+    """
+    Apply a credit change and append it to the ledger, without committing.
+
+    The balance is updated with a single UPDATE ... RETURNING credits and
+    the ledger entry is added to the same transaction; the caller commits.
+
+    Args:
+        user_id: User whose balance changes
+        amount: Credits to add (negative to take credits away)
+        entry_type: One of the CreditLedgerEntry.TYPE_* values
+        reference: Related task id, Stripe session id, ...
+        description: Human-readable note shown in the history
+        require_balance: Only apply the change if the balance stays >= 0
+
+    Returns:
+        The new balance, or None if the user does not exist or (with
+        require_balance) has too few credits
+    """
+    conditions = [User.id == user_id]
+    if require_balance and amount < 0:
+        conditions.append(User.credits >= -amount)
+
+    balance = db.session.execute(
+        update(User)
+        .where(*conditions)
+        .values(credits=User.credits + amount)
+        .returning(User.credits)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if balance is None:
+        return None
+
+    db.session.add(CreditLedgerEntry(
+        user_id=user_id,
+        amount=amount,
+        balance_after=balance,
+        entry_type=entry_type,
+        reference=reference,
+        description=description
+    ))
+    return balance
+
+def add_credits(user_id, amount, entry_type, reference=None, description=None):
+    """
+    Add (or remove) credits and commit, e.g. for purchases and admin grants.
+
+    Returns:
+        The new balance, or None if the user does not exist
+    """
+    try:
+        balance = record_credit_change(user_id, amount, entry_type, reference, description)
+        if balance is None:
+            db.session.rollback()
+            return None
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_user(user_id)
+    logger.info(f"Applied {amount:+d} credits ({entry_type}) to user {user_id}, balance {balance}")
+    return balance
+
+def reserve_credits(user_id, amount, task_id, description='Document conversion'):
+    """
+    Atomically take credits from a user and hold them for a task.
+
+    Runs a single conditional UPDATE ... WHERE credits >= amount RETURNING
+    credits, so concurrent submissions can never overdraw an account, and
+    records the ledger entry and the reservation in the same transaction.
+
+    Returns:
+        The user's remaining credits, or None if they had too few credits
+    """
+    return reserve_credits_many(user_id, [(task_id, amount)], description)
+
+def reserve_credits_many(user_id, reservations, description='Document conversion'):
+    """
+    Reserve credits for several tasks in one transaction, all or nothing.
+
+    Each task gets its own ledger entry and reservation, so it can be
+    committed or refunded on its own later. A free task (amount 0) only
+    gets the reservation, which records its owner; the credit history
+    is left alone.
+
+    Args:
+        user_id: User paying for the tasks
+        reservations: List of (task_id, amount) pairs
+        description: Note shown in the credit history for each reservation
+
+    Returns:
+        The user's remaining credits, or None if they had too few credits for all of them
+    """
+    try:
+        remaining = None
+        for task_id, amount in reservations:
+            if amount == 0:
+                db.session.add(CreditReservation(task_id=task_id, user_id=user_id, credits=0))
+                continue
+            remaining = record_credit_change(
+                user_id, -amount, CreditLedgerEntry.TYPE_JOB_RESERVATION,
+                reference=task_id, description=description, require_balance=True
+            )
+            if remaining is None:
+                db.session.rollback()
+                return None
+            db.session.add(CreditReservation(task_id=task_id, user_id=user_id, credits=amount))
+        if remaining is None:
+            # Only free tasks: the balance is unchanged
+            remaining = db.session.query(User.credits).filter(User.id == user_id).scalar()
+            if remaining is None:
+                db.session.rollback()
+                return None
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_user(user_id)
+    for task_id, amount in reservations:
+        logger.info(f"[{task_id}] Reserved {amount} credits for user {user_id}")
+    logger.info(f"User {user_id} has {remaining} credits remaining")
+    return remaining
+
+def _finish_reservation(task_id, new_status):
+    """Move a reservation out of 'reserved'. Returns the reservation if this call did it."""
+    result = db.session.execute(
+        update(CreditReservation)
+        .where(CreditReservation.task_id == task_id,
+               CreditReservation.status == CreditReservation.STATUS_RESERVED)
+        .values(status=new_status, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return None
+    return CreditReservation.query.filter_by(task_id=task_id).first()
+
+def commit_reservation(task_id, charged=None):
+    """
+    Mark a task's reserved credits as spent. Safe to call more than once.
+
+    Args:
+        task_id: Task the credits were reserved under
+        charged: Credits the job actually cost, if less than the reservation
+            (e.g. a page range or preview); the difference is refunded
+    """
+    try:
+        reservation = _finish_reservation(task_id, CreditReservation.STATUS_COMMITTED)
+        if reservation is None:
+            db.session.commit()
+            return False
+
+        user_id, credits = reservation.user_id, reservation.credits
+        refund = 0
+        if charged is not None and charged < credits:
+            refund = credits - charged
+            record_credit_change(
+                user_id, refund, CreditLedgerEntry.TYPE_REFUND,
+                reference=task_id, description='Unused credits for partial conversion'
+            )
+            reservation.credits = charged
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[{task_id}] Error committing credit reservation: {str(e)}")
+        return False
+
+    if refund:
+        invalidate_user(user_id)
+        logger.info(f"[{task_id}] Committed {credits - refund} reserved credits, refunded {refund} to user {user_id}")
+    else:
+        logger.info(f"[{task_id}] Committed {credits} reserved credits")
+    return True
+
+def release_reservation(task_id):
+    """
+    Refund a task's reserved credits to the user.
+
+    Only a reservation still in 'reserved' is refunded, so retries and
+    repeated failure handling never refund twice.
+    """
+    try:
+        reservation = _finish_reservation(task_id, CreditReservation.STATUS_RELEASED)
+        if reservation is None:
+            db.session.commit()
+            return False
+
+        user_id, credits = reservation.user_id, reservation.credits
+        if credits:
+            record_credit_change(
+                user_id, credits, CreditLedgerEntry.TYPE_REFUND,
+                reference=task_id, description='Refund for failed conversion'
+            )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[{task_id}] Error releasing credit reservation: {str(e)}")
+        return False
+
+    invalidate_user(user_id)
+    logger.info(f"[{task_id}] Refunded {credits} credits to user {user_id}")
+    return True
+
+def encode_history_cursor(entry):
+    """Opaque cursor pointing just after a ledger entry."""
+    return f"{entry.created_at.isoformat()}_{entry.id}"
+
+def decode_history_cursor(cursor):
+    created_at, entry_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(entry_id)
+
+def get_credit_history(user_id, limit=20, cursor=None):
+    """
+    One page of a user's credit history, newest first.
+
+    Uses keyset pagination on (created_at, id) so every page is a single
+    index range scan, however long the history grows.
+
+    Returns:
+        (entries, next_cursor) where next_cursor is None on the last page
+    """
+    query = CreditLedgerEntry.query.filter(CreditLedgerEntry.user_id == user_id)
+
+    if cursor:
+        try:
+            created_at, entry_id = decode_history_cursor(cursor)
+            query = query.filter(or_(
+                CreditLedgerEntry.created_at < created_at,
+                and_(CreditLedgerEntry.created_at == created_at, CreditLedgerEntry.id < entry_id)
+            ))
+        except ValueError:
+            logger.warning(f"Ignoring invalid credit history cursor: {cursor}")
+
+    entries = (
+        query.order_by(CreditLedgerEntry.created_at.desc(), CreditLedgerEntry.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = encode_history_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return entries[:limit], next_cursor
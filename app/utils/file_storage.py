@@ -1,81 +1,201 @@
 import os
 import logging
-import boto3
+import threading
 from flask import current_app, has_app_context
-from botocore.exceptions import ClientError
 from urllib.parse import urljoin
 
+# boto3/botocore are imported lazily: only processes that actually talk to
+# S3 pay their import cost
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Process-wide S3 client, created lazily and recreated after a fork
+_s3_client = None
+_s3_client_pid = None
+_s3_client_lock = threading.Lock()
+
+def _get_setting(name, default=None):
+    """Read a storage setting from the app config, falling back to the environment."""
+    if has_app_context():
+        value = current_app.config.get(name)
+        if value is not None:
+            return value
+    return os.environ.get(name, default)
+
+def is_remote_storage_configured():
+    """Return True if an S3 bucket has been configured for output offload."""
+    return bool(_get_setting('S3_BUCKET_NAME'))
+
+def get_s3_client():
+    """
+    Get the process-wide S3 client.
+
+    The client (and its connection pool) is shared by all uploads and presign
+    calls in this process. It is rebuilt if the process has forked since it
+    was created, because boto3 connection pools must not be shared across
+    processes (gunicorn workers, Celery prefork children).
+
+    Returns:
+        A boto3 S3 client, or None if remote storage is not configured
+    """
+    global _s3_client, _s3_client_pid
+
+    if not is_remote_storage_configured():
+        return None
+
+    pid = os.getpid()
+    if _s3_client is not None and _s3_client_pid == pid:
+        return _s3_client
+
+    import boto3
+    from botocore.config import Config as BotoConfig
+
+    with _s3_client_lock:
+        if _s3_client is None or _s3_client_pid != pid:
+            # S3_ENDPOINT_URL allows pointing at a local S3-compatible server (MinIO, moto)
+            _s3_client = boto3.client(
+                's3',
+                region_name=_get_setting('AWS_REGION', 'us-east-1'),
+                endpoint_url=_get_setting('S3_ENDPOINT_URL') or None,
+                aws_access_key_id=_get_setting('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=_get_setting('AWS_SECRET_ACCESS_KEY'),
+                config=BotoConfig(
+                    max_pool_connections=int(_get_setting('S3_MAX_POOL_CONNECTIONS', 10)),
+                    retries={'max_attempts': 5, 'mode': 'standard'}
+                )
+            )
+            _s3_client_pid = pid
+            logger.info(f"Created S3 client for process {pid}")
+    return _s3_client
+
+def _get_transfer_config():
+    """Multipart transfer settings for uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=int(_get_setting('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024)),
+        multipart_chunksize=int(_get_setting('S3_MULTIPART_CHUNK_SIZE', 8 * 1024 * 1024)),
+        max_concurrency=int(_get_setting('S3_MAX_CONCURRENCY', 4)),
+        use_threads=True
+    )
+
+def _get_content_type(file_path):
+    """Determine content type based on file extension."""
+    if file_path.endswith('.mp3'):
+        return 'audio/mpeg'
+    elif file_path.endswith('.ogg'):
+        return 'audio/ogg'
+    elif file_path.endswith('.m4a'):
+        return 'audio/mp4'
+    elif file_path.endswith('.pdf'):
+        return 'application/pdf'
+    elif file_path.endswith('.txt'):
+        return 'text/plain'
+    elif file_path.endswith('.vtt'):
+        return 'text/vtt'
+    elif file_path.endswith('.json'):
+        return 'application/json'
+    elif file_path.endswith('.md'):
+        return 'text/markdown'
+    elif file_path.endswith('.epub'):
+        return 'application/epub+zip'
+    return 'application/octet-stream'
+
 def copy_to_remote_storage(local_file_path, remote_path):
     """
-    Copy a file to remote storage (S3 or similar) and return a URL to access it.
-    
+    Copy a file to remote storage (S3 or similar) using a parallel multipart upload.
+
+    Objects are stored privately; use get_presigned_url to hand out
+    time-limited download links.
+
     Args:
         local_file_path: Path to the local file to upload
         remote_path: Path/key to use in remote storage (e.g. "task_id/filename.mp3")
-        
+
     Returns:
-        URL to the file in remote storage, or None if remote storage is not configured/upload fails
+        The object key in remote storage, or None if remote storage is not configured/upload fails
     """
-    # Check if remote storage is configured via environment variables
-    aws_access_key = os.environ.get('AWS_ACCESS_KEY_ID')
-    aws_secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
-    s3_bucket = os.environ.get('S3_BUCKET_NAME')
-    s3_region = os.environ.get('AWS_REGION', 'us-east-1')
-    cdn_base_url = os.environ.get('CDN_BASE_URL')
-    
-    # If any required config is missing, skip remote storage
-    if not all([aws_access_key, aws_secret_key, s3_bucket]):
+    s3_client = get_s3_client()
+    if s3_client is None:
         logger.info(f"Remote storage not configured. Skipping upload of {local_file_path}")
         return None
-    
+
     try:
         # Check if the local file exists
         if not os.path.exists(local_file_path):
             logger.error(f"Local file {local_file_path} does not exist")
             return None
-            
-        # Initialize S3 client
-        s3_client = boto3.client(
-            's3',
-            region_name=s3_region,
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key
-        )
-        
-        # Determine content type based on file extension
-        content_type = 'application/octet-stream'  # Default
-        if local_file_path.endswith('.mp3'):
-            content_type = 'audio/mpeg'
-        elif local_file_path.endswith('.pdf'):
-            content_type = 'application/pdf'
-        elif local_file_path.endswith('.txt'):
-            content_type = 'text/plain'
-        
-        # Upload file to S3
+
         s3_client.upload_file(
-            local_file_path, 
-            s3_bucket, 
+            local_file_path,
+            _get_setting('S3_BUCKET_NAME'),
             remote_path,
-            ExtraArgs={
-                'ContentType': content_type,
-                'ACL': 'public-read'  # Make the file publicly accessible
-            }
+            ExtraArgs={'ContentType': _get_content_type(local_file_path)},
+            Config=_get_transfer_config()
         )
-        
-        # Construct the URL to the uploaded file
-        if cdn_base_url:
-            # If a CDN is configured, use that base URL
-            remote_url = urljoin(cdn_base_url, remote_path)
-        else:
-            # Otherwise, construct a direct S3 URL
-            remote_url = f"https://{s3_bucket}.s3.{s3_region}.amazonaws.com/{remote_path}"
-        
-        logger.info(f"Successfully uploaded {local_file_path} to {remote_url}")
-        return remote_url
-        
+
+        logger.info(f"Successfully uploaded {local_file_path} to s3 key {remote_path}")
+        return remote_path
+
     except Exception as e:
         logger.error(f"Error uploading {local_file_path} to remote storage: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
+
+def get_presigned_url(remote_path, download_name=None, expires_in=None):
+    """
+    Create a time-limited URL for downloading an object from remote storage.
+
+    If CDN_BASE_URL is configured the CDN URL is returned instead, since the
+    CDN is expected to handle access control itself.
+
+    Args:
+        remote_path: Object key in remote storage
+        download_name: Optional filename to suggest to the browser
+        expires_in: URL lifetime in seconds (defaults to S3_PRESIGNED_URL_EXPIRY)
+
+    Returns:
+        A URL string, or None if remote storage is not configured/signing fails
+    """
+    cdn_base_url = _get_setting('CDN_BASE_URL')
+    if cdn_base_url:
+        return urljoin(cdn_base_url, remote_path)
+
+    s3_client = get_s3_client()
+    if s3_client is None:
+        return None
+
+    params = {'Bucket': _get_setting('S3_BUCKET_NAME'), 'Key': remote_path}
+    if download_name:
+        params['ResponseContentDisposition'] = f'attachment; filename="{download_name}"'
+
+    from botocore.exceptions import ClientError
+
+    try:
+        return s3_client.generate_presigned_url(
+            'get_object',
+            Params=params,
+            ExpiresIn=int(expires_in or _get_setting('S3_PRESIGNED_URL_EXPIRY', 900))
+        )
+    except ClientError as e:
+        logger.error(f"Error creating presigned URL for {remote_path}: {str(e)}")
+        return None
+
+def delete_from_remote_storage(remote_path):
+    """
+    Delete an object from remote storage.
+
+    Returns:
+        True if the object was deleted (or did not exist), False otherwise
+    """
+    s3_client = get_s3_client()
+    if s3_client is None:
+        return False
+
+    try:
+        s3_client.delete_object(Bucket=_get_setting('S3_BUCKET_NAME'), Key=remote_path)
+        logger.info(f"Deleted s3 key {remote_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting {remote_path} from remote storage: {str(e)}")
+        return False
@@ -0,0 +1,169 @@
+import os
+import math
+import logging
+from flask import current_app, has_app_context
+from app.utils.redis import get_redis
+from app.utils.mp3 import mp3_duration
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Segments and playlists outlive the job long enough to finish listening
+DEFAULT_HLS_SEGMENT_TTL = 86400
+
+# Once a job has finished, its segments are kept only this much longer, so
+# players part-way through a segment can switch to the final file
+DEFAULT_HLS_RETIRE_GRACE = 600
+
+def _get_config(name, default):
+    if has_app_context() and current_app.config.get(name) is not None:
+        return int(current_app.config[name])
+    return int(os.environ.get(name, default))
+
+def _stream_key(task_id):
+    return f"hls:{task_id}"
+
+def _segment_key(task_id, index):
+    return f"hls:{task_id}:segment:{index}"
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def hls_enabled():
+    """Audio jobs publish HLS segments unless HLS_ENABLED is turned off."""
+    if has_app_context() and current_app.config.get('HLS_ENABLED') is not None:
+        return bool(current_app.config['HLS_ENABLED'])
+    return os.environ.get('HLS_ENABLED', 'true').lower() in ['true', 't', '1']
+
+def start_stream(task_id, user_id):
+    """Open an empty, still growing playlist for a task."""
+    ttl = _get_config('HLS_SEGMENT_TTL', DEFAULT_HLS_SEGMENT_TTL)
+    redis_client = get_redis()
+    redis_client.hset(_stream_key(task_id), mapping={'user_id': user_id, 'segments': 0, 'ended': 0})
+    redis_client.expire(_stream_key(task_id), ttl)
+
+def add_segment(task_id, index, file_path, duration=None):
+    """
+    Publish one synthesized chunk as the next segment of the playlist.
+
+    Segments must be added in order, starting at 0; the segment bytes are
+    written before the playlist counts them, so readers never see a
+    segment that is not stored yet. Pass duration if the caller already
+    measured it.
+
+    Returns:
+        The segment's duration in seconds
+    """
+    ttl = _get_config('HLS_SEGMENT_TTL', DEFAULT_HLS_SEGMENT_TTL)
+    if duration is None:
+        duration = mp3_duration(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    redis_client = get_redis()
+    redis_client.set(_segment_key(task_id, index), data, ex=ttl)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(_stream_key(task_id), f"duration:{index}", f"{duration:.3f}")
+    pipe.hset(_stream_key(task_id), 'segments', index + 1)
+    pipe.expire(_stream_key(task_id), ttl)
+    pipe.execute()
+    return duration
+
+def end_stream(task_id):
+    """Mark a playlist complete, so players stop polling it. Never raises."""
+    try:
+        get_redis().hset(_stream_key(task_id), 'ended', 1)
+    except Exception as e:
+        logger.warning(f"[{task_id}] Could not end HLS playlist: {str(e)}")
+
+def retire_stream(task_id, final_url=None):
+    """
+    Let the segments of a finished task expire soon. Never raises.
+
+    Once the whole audio is published the segments are only another copy
+    of it, so they expire after HLS_RETIRE_GRACE seconds. With final_url
+    (MP3 output, which HLS can play as a single packed-audio segment) the
+    playlist from now on lists the final file instead of the segments;
+    otherwise, e.g. after a failure, the playlist expires with them.
+    """
+    try:
+        grace = _get_config('HLS_RETIRE_GRACE', DEFAULT_HLS_RETIRE_GRACE)
+        redis_client = get_redis()
+        segments = int(_decode(redis_client.hget(_stream_key(task_id), 'segments')) or 0)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(_stream_key(task_id), 'ended', 1)
+        if final_url:
+            pipe.hset(_stream_key(task_id), 'final_url', final_url)
+        else:
+            pipe.expire(_stream_key(task_id), grace)
+        for index in range(segments):
+            pipe.expire(_segment_key(task_id, index), grace)
+        pipe.execute()
+        logger.info(f"[{task_id}] Retired {segments} HLS segments, expiring in {grace}s")
+    except Exception as e:
+        logger.warning(f"[{task_id}] Could not retire HLS segments: {str(e)}")
+
+def get_stream(task_id):
+    """
+    Load a task's playlist state.
+
+    Returns:
+        Dict with user_id, durations (seconds, one per segment), ended and
+        final_url (set once the segments were retired), or None
+    """
+    raw = get_redis().hgetall(_stream_key(task_id))
+    if not raw:
+        return None
+    fields = {_decode(key): _decode(value) for key, value in raw.items()}
+    segments = int(fields.get('segments', 0))
+    return {
+        'user_id': int(fields['user_id']),
+        'durations': [float(fields.get(f"duration:{index}", 0)) for index in range(segments)],
+        'ended': str(fields.get('ended')) == '1',
+        'final_url': fields.get('final_url')
+    }
+
+def get_segment(task_id, index):
+    """Bytes of one segment, or None if it does not exist (yet)."""
+    return get_redis().get(_segment_key(task_id, index))
+
+def render_playlist(stream, segment_url):
+    """
+    Build an HLS media playlist from a stream's state.
+
+    The playlist is an EVENT playlist: players starting early see the
+    segments published so far and reload it to pick up new ones until
+    #EXT-X-ENDLIST appears. A retired stream lists the final file as its
+    only entry.
+
+    Args:
+        stream: State from get_stream
+        segment_url: Callable mapping a segment index to its URL
+    """
+    durations = stream['durations']
+    if stream.get('final_url'):
+        total = sum(durations)
+        return '\n'.join([
+            '#EXTM3U',
+            '#EXT-X-VERSION:3',
+            f'#EXT-X-TARGETDURATION:{max(math.ceil(total), 1)}',
+            '#EXT-X-MEDIA-SEQUENCE:0',
+            '#EXT-X-PLAYLIST-TYPE:VOD',
+            f'#EXTINF:{total:.3f},',
+            stream['final_url'],
+            '#EXT-X-ENDLIST',
+        ]) + '\n'
+    target = max([math.ceil(duration) for duration in durations] or [10])
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        f'#EXT-X-TARGETDURATION:{target}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:EVENT',
+    ]
+    for index, duration in enumerate(durations):
+        lines.append(f'#EXTINF:{duration:.3f},')
+        lines.append(segment_url(index))
+    if stream['ended']:
+        lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,219 @@
+import os
+import re
+import uuid
+import zipfile
+import hashlib
+import logging
+from flask import current_app, has_app_context
+from app.utils.redis import get_redis
+from app.utils.blob_store import (
+    DEFAULT_BLOB_CHUNK_SIZE, save_blob_segment, write_blob_manifest, delete_blob_segments
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# The PDF header must appear within the first 1024 bytes of the file
+PDF_MAGIC = b'%PDF-'
+PDF_MAGIC_WINDOW = 1024
+
+# Page objects; "/Type /Pages" (the page tree) is excluded by the lookahead
+PAGE_PATTERN = re.compile(rb'/Type\s{0,8}/Page(?![A-Za-z0-9])')
+
+# Bytes kept between chunks so a page marker split across two reads is still found
+PAGE_SCAN_OVERLAP = 32
+
+# Uploaded PDFs waiting for a worker live as long as unfinished resumable uploads
+DEFAULT_UPLOAD_BLOB_TTL = 86400
+
+# Request bodies are read in pieces of this size
+STREAM_READ_SIZE = 64 * 1024
+
+def _get_config(name, default):
+    if has_app_context() and current_app.config.get(name) is not None:
+        return int(current_app.config[name])
+    return int(os.environ.get(name, default))
+
+class InvalidUpload(Exception):
+    """The uploaded bytes are not an acceptable PDF."""
+
+def upload_blob_key(upload_id):
+    """Blob key an uploaded PDF is stored under until the worker consumes it."""
+    return f"upload_content:{upload_id}"
+
+class PdfStreamInspector:
+    """
+    Inspect a PDF as it streams past, without holding it in memory.
+
+    Feed the bytes in order with feed() and call finish() at the end. Computes
+    the SHA-256, checks the %PDF- header and counts page objects as a hint of
+    the page count (exact for ordinary PDFs; compressed object streams hide
+    pages from it, in which case it is 0).
+    """
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.page_count_hint = 0
+        self._head = b''
+        self._buffer = b''
+
+    def feed(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+
+        if len(self._head) < PDF_MAGIC_WINDOW:
+            self._head += data[:PDF_MAGIC_WINDOW - len(self._head)]
+            if len(self._head) >= PDF_MAGIC_WINDOW and PDF_MAGIC not in self._head:
+                raise InvalidUpload("File is not a PDF")
+
+        # Only count matches that can no longer grow into a longer name in the next chunk
+        self._buffer += data
+        decided = len(self._buffer) - PAGE_SCAN_OVERLAP
+        if decided > 0:
+            self.page_count_hint += sum(1 for m in PAGE_PATTERN.finditer(self._buffer) if m.start() < decided)
+            self._buffer = self._buffer[decided:]
+
+    def finish(self):
+        """Validate the end of the stream and return the results."""
+        if PDF_MAGIC not in self._head:
+            raise InvalidUpload("File is not a PDF")
+        self.page_count_hint += len(PAGE_PATTERN.findall(self._buffer))
+        self._buffer = b''
+        return {
+            'size': self.size,
+            'sha256': self.sha256.hexdigest(),
+            'page_count_hint': self.page_count_hint
+        }
+
+def ingest_upload(stream, filename):
+    """
+    Stream an uploaded PDF into the blob store in a single pass.
+
+    The request body is read once, in small pieces: each piece is hashed,
+    scanned for page markers and appended to the current blob segment, so the
+    web process never holds the whole file and never writes or re-reads it
+    locally. The worker gets the returned key instead of the bytes.
+
+    Args:
+        stream: Readable file-like object with the upload (e.g. FileStorage.stream)
+        filename: Sanitised filename, kept in the manifest
+
+    Returns:
+        (source_key, manifest), manifest holding size, sha256 and page_count_hint
+
+    Raises:
+        InvalidUpload: if the upload is empty or not a PDF
+    """
+    source_key = upload_blob_key(uuid.uuid4().hex)
+    chunk_size = _get_config('REDIS_BLOB_CHUNK_SIZE', DEFAULT_BLOB_CHUNK_SIZE)
+    ttl = _get_config('UPLOAD_SESSION_TTL', DEFAULT_UPLOAD_BLOB_TTL)
+    redis_client = get_redis()
+
+    inspector = PdfStreamInspector()
+    segment = bytearray()
+    chunks = 0
+    try:
+        while True:
+            data = stream.read(STREAM_READ_SIZE)
+            if not data:
+                break
+            inspector.feed(data)
+            segment += data
+            if len(segment) >= chunk_size:
+                save_blob_segment(redis_client, source_key, chunks, bytes(segment[:chunk_size]), ttl=ttl)
+                del segment[:chunk_size]
+                chunks += 1
+
+        if segment:
+            save_blob_segment(redis_client, source_key, chunks, bytes(segment), ttl=ttl)
+            chunks += 1
+
+        if inspector.size == 0:
+            raise InvalidUpload("File is empty")
+        details = inspector.finish()
+    except Exception:
+        delete_blob_segments(redis_client, source_key, chunks)
+        raise
+
+    manifest = dict(details, chunk_size=chunk_size, chunks=chunks, filename=filename)
+    write_blob_manifest(redis_client, source_key, manifest, ttl=ttl)
+    logger.info(f"Ingested {filename}: {details['size']} bytes, ~{details['page_count_hint']} pages, sha256 {details['sha256']}")
+    return source_key, manifest
+
+class _LimitedReader:
+    """Wrap a stream and fail once more than limit bytes were read from it."""
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.read_bytes += len(data)
+        if self.read_bytes > self.limit:
+            raise InvalidUpload(f"File is too large (maximum {self.limit // (1024 * 1024)} MB)")
+        return data
+
+def ingest_zip(stream, max_files, max_size):
+    """
+    Ingest every PDF inside a ZIP archive.
+
+    Members are decompressed as a stream straight into ingest_upload, one at
+    a time, so the archive is never extracted to disk. Other members
+    (directories, non-PDF files, macOS metadata) are skipped.
+
+    Args:
+        stream: Seekable file-like object with the archive
+        max_files: Maximum number of PDFs accepted
+        max_size: Maximum uncompressed size of one PDF in bytes
+
+    Returns:
+        List of (filename, source_key, manifest)
+
+    Raises:
+        InvalidUpload: if the archive is unreadable, holds no PDFs, too many
+            PDFs or a PDF that is too large or invalid
+    """
+    from werkzeug.utils import secure_filename
+
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise InvalidUpload("File is not a valid ZIP archive")
+
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename.lower().endswith('.pdf')
+        and not os.path.basename(info.filename).startswith('._')
+    ]
+    if not members:
+        raise InvalidUpload("ZIP archive contains no PDF files")
+    if len(members) > max_files:
+        raise InvalidUpload(f"ZIP archive contains more than {max_files} PDF files")
+
+    ingested = []
+    try:
+        for info in members:
+            # file_size comes from the archive's directory; the real stream is capped too
+            if info.file_size > max_size:
+                raise InvalidUpload(f"{info.filename} is too large (maximum {max_size // (1024 * 1024)} MB)")
+            filename = secure_filename(os.path.basename(info.filename))
+            try:
+                with archive.open(info) as member:
+                    source_key, manifest = ingest_upload(_LimitedReader(member, max_size), filename)
+            except (zipfile.BadZipFile, NotImplementedError) as e:
+                raise InvalidUpload(f"Could not read {info.filename} from the ZIP archive: {str(e)}")
+            ingested.append((filename, source_key, manifest))
+    except Exception:
+        for _filename, source_key, _manifest in ingested:
+            discard_upload(source_key)
+        raise
+    return ingested
+
+def discard_upload(source_key):
+    """Delete an ingested upload that will not be handed to a worker."""
+    from app.utils.blob_store import delete_blob
+    try:
+        delete_blob(get_redis(), source_key)
+    except Exception as e:
+        logger.warning(f"Failed to delete uploaded file {source_key}: {str(e)}")
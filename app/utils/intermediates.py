@@ -0,0 +1,113 @@
+import os
+import json
+import logging
+import tempfile
+from flask import current_app, has_app_context
+from app.utils.redis import get_redis
+from app.utils.blob_store import save_blob, blob_to_file
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Completed jobs keep their translated text and raw chunk audio this long; retention
+# is opt-in, since it holds another copy of the audio in Redis (0 disables it)
+DEFAULT_INTERMEDIATE_TTL = 0
+
+def _get_config(name, default):
+    if has_app_context() and current_app.config.get(name) is not None:
+        return int(current_app.config[name])
+    return int(os.environ.get(name, default))
+
+def intermediate_ttl():
+    return _get_config('INTERMEDIATE_TTL', DEFAULT_INTERMEDIATE_TTL)
+
+def _record_key(task_id):
+    return f"intermediate:{task_id}"
+
+def _text_key(task_id):
+    return f"intermediate:{task_id}:text"
+
+def _audio_key(task_id):
+    return f"intermediate:{task_id}:audio"
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def store_intermediates(task_id, record, text, raw_audio_path=None):
+    """
+    Keep what a completed job needs to derive new outputs without re-synthesis.
+
+    Args:
+        task_id: Completed task
+        record: Small JSON-serializable dict describing the job (owner,
+            language, naming); returned by get_intermediates
+        text: JSON-serializable dict with the translated text and the
+            per-chunk (page, seconds) timings of the raw audio
+        raw_audio_path: The gTTS audio at normal speed, joined into one MP3
+
+    Returns:
+        True if the intermediates were stored, False if retention is disabled
+    """
+    ttl = intermediate_ttl()
+    if ttl <= 0:
+        return False
+
+    redis_client = get_redis()
+    with tempfile.NamedTemporaryFile('w', delete=False, prefix='docecho_', suffix='.json', encoding='utf-8') as f:
+        json.dump(text, f)
+        text_path = f.name
+    try:
+        save_blob(redis_client, _text_key(task_id), text_path, ttl=ttl)
+        if raw_audio_path is not None:
+            save_blob(redis_client, _audio_key(task_id), raw_audio_path, ttl=ttl)
+    finally:
+        os.unlink(text_path)
+
+    # Written last: a record means the blobs it describes are complete
+    record = dict(record, has_audio=raw_audio_path is not None)
+    redis_client.set(_record_key(task_id), json.dumps(record), ex=ttl)
+    logger.info(f"[{task_id}] Kept intermediates for {ttl}s")
+    return True
+
+def get_intermediates(task_id, user_id=None):
+    """
+    Load the intermediate record of a task, optionally checking its owner.
+
+    Returns:
+        The record dict, or None if it expired, was never kept, or belongs to someone else
+    """
+    raw = get_redis().get(_record_key(task_id))
+    if not raw:
+        return None
+    record = json.loads(_decode(raw))
+    if user_id is not None and record.get('user_id') != user_id:
+        return None
+    return record
+
+def load_intermediate_text(task_id):
+    """
+    Load the translated text and timings kept for a task.
+
+    Raises:
+        IOError: if they expired or are incomplete
+    """
+    with tempfile.NamedTemporaryFile(delete=False, prefix='docecho_', suffix='.json') as f:
+        text_path = f.name
+    try:
+        if blob_to_file(get_redis(), _text_key(task_id), text_path) is None:
+            raise IOError(f"Intermediate text of task {task_id} has expired")
+        with open(text_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(text_path)
+
+def intermediate_audio_to_file(task_id, file_path):
+    """
+    Write a task's raw chunk audio to a local file.
+
+    Raises:
+        IOError: if the audio expired or is incomplete
+    """
+    if blob_to_file(get_redis(), _audio_key(task_id), file_path) is None:
+        raise IOError(f"Intermediate audio of task {task_id} has expired")
+    return file_path
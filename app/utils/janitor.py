@@ -0,0 +1,230 @@
+import os
+import time
+import shutil
+import tempfile
+import logging
+from datetime import datetime, timedelta
+from celery import shared_task
+from flask import current_app
+from sqlalchemy import func
+from app.extensions import db
+from app.models.artifact import Artifact
+from app.utils.artifacts import evict_artifact
+from app.utils.redis import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JANITOR_LOCK_KEY = 'lock:storage_janitor'
+
+# Prefix of the scratch files and directories created by process_pdf
+TEMP_PREFIX = 'docecho_'
+
+# Artifacts are evicted in batches so a large backlog never loads every row at once
+EVICTION_BATCH_SIZE = 100
+
+def _path_size(path):
+    """Size in bytes of a file, or of everything under a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _remove_path(path):
+    """Delete a file or directory tree and return the bytes reclaimed."""
+    try:
+        size = _path_size(path)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+        return size
+    except OSError as e:
+        logger.warning(f"Could not remove {path}: {str(e)}")
+        return 0
+
+def _is_older_than(path, max_age):
+    try:
+        return time.time() - os.path.getmtime(path) > max_age
+    except OSError:
+        return False
+
+def clean_orphaned_temp(max_age):
+    """
+    Delete scratch files and directories left behind by crashed tasks.
+
+    Only entries older than max_age are touched, which must exceed the task
+    time limit so that running tasks never lose their working files.
+    """
+    reclaimed = 0
+    temp_roots = {tempfile.gettempdir(), current_app.config.get('TEMP_FOLDER')}
+    for root in filter(None, temp_roots):
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.startswith(TEMP_PREFIX) and _is_older_than(path, max_age):
+                reclaimed += _remove_path(path)
+    return reclaimed
+
+def clean_stale_uploads(max_age):
+    """
+    Delete loose files and unregistered outputs from UPLOAD_FOLDER.
+
+    Uploads are stored as Redis blobs and handed to the worker by their
+    source_key, so loose files at the top level are leftovers from before
+    that and are never read. Files in the per-user output directories that
+    are not in the artifact registry belong to failed jobs (or predate the
+    registry) and can never be downloaded. A job only registers its outputs
+    as it publishes them, possibly at the very end, so max_age must exceed
+    the task time limit.
+    """
+    upload_folder = current_app.config.get('UPLOAD_FOLDER')
+    if not upload_folder or not os.path.isdir(upload_folder):
+        return 0, 0
+
+    upload_bytes = 0
+    orphan_bytes = 0
+    for name in os.listdir(upload_folder):
+        path = os.path.join(upload_folder, name)
+        if os.path.isfile(path):
+            if _is_older_than(path, max_age):
+                upload_bytes += _remove_path(path)
+            continue
+
+        if not (os.path.isdir(path) and name.isdigit()):
+            continue
+
+        registered = {
+            local_path for (local_path,) in
+            db.session.query(Artifact.local_path).filter(Artifact.user_id == int(name))
+        }
+        for output_name in os.listdir(path):
+            output_path = os.path.join(path, output_name)
+            if output_path not in registered and _is_older_than(output_path, max_age):
+                orphan_bytes += _remove_path(output_path)
+
+    return upload_bytes, orphan_bytes
+
+def _evict_lru(query, bytes_to_free):
+    """Evict artifacts from query, least recently downloaded first, until enough bytes are freed."""
+    freed = 0
+    evicted = 0
+    while freed < bytes_to_free:
+        batch = query.order_by(Artifact.last_accessed_at, Artifact.id).limit(EVICTION_BATCH_SIZE).all()
+        if not batch:
+            break
+        for artifact in batch:
+            freed += evict_artifact(artifact)
+            evicted += 1
+            if freed >= bytes_to_free:
+                break
+    return freed, evicted
+
+def enforce_user_quotas(quota):
+    """
+    Evict each user's least recently downloaded outputs until they fit in their quota.
+
+    Only registered artifacts count, wherever they are stored. HLS segments,
+    kept intermediates and upload blobs live in Redis outside the registry
+    and are bounded by their own TTLs (HLS_RETIRE_GRACE and
+    HLS_SEGMENT_TTL, INTERMEDIATE_TTL, UPLOAD_SESSION_TTL) instead.
+    """
+    usage = (
+        db.session.query(Artifact.user_id, func.sum(Artifact.size))
+        .group_by(Artifact.user_id)
+        .having(func.sum(Artifact.size) > quota)
+        .all()
+    )
+
+    freed = 0
+    evicted = 0
+    for user_id, used in usage:
+        user_freed, user_evicted = _evict_lru(Artifact.query.filter_by(user_id=user_id), used - quota)
+        logger.info(f"User {user_id} was {used - quota} bytes over quota, evicted {user_evicted} artifacts")
+        freed += user_freed
+        evicted += user_evicted
+    return freed, evicted
+
+def enforce_disk_budget(budget):
+    """
+    Evict the least recently downloaded outputs across all users until the total fits the budget.
+
+    Like enforce_user_quotas, this counts registered artifacts only.
+    """
+    used = db.session.query(func.coalesce(func.sum(Artifact.size), 0)).scalar()
+    if used <= budget:
+        return 0, 0
+    logger.info(f"Stored outputs use {used} bytes, {used - budget} over the disk budget")
+    return _evict_lru(Artifact.query, used - budget)
+
+def expire_redis_artifacts(ttl):
+    """Drop registry rows (and local copies) of Redis blobs that have outlived their TTL."""
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+    expired = Artifact.query.filter(
+        Artifact.storage == Artifact.STORAGE_REDIS,
+        Artifact.created_at < cutoff
+    ).all()
+    return sum(evict_artifact(artifact) for artifact in expired), len(expired)
+
+def run_janitor():
+    """
+    Run one pass of every cleanup step and report the bytes reclaimed.
+
+    Must be called inside an app context.
+
+    Returns:
+        A dict with the bytes reclaimed per step and the number of evicted artifacts
+    """
+    config = current_app.config
+    report = {'started_at': datetime.utcnow().isoformat()}
+
+    report['temp_bytes'] = clean_orphaned_temp(config.get('STORAGE_TEMP_MAX_AGE', 7200))
+    report['upload_bytes'], report['orphan_output_bytes'] = clean_stale_uploads(config.get('STORAGE_UPLOAD_MAX_AGE', 7200))
+
+    expired_bytes, expired_count = expire_redis_artifacts(config.get('REDIS_BLOB_TTL', 604800))
+    quota_bytes, quota_count = enforce_user_quotas(config.get('STORAGE_USER_QUOTA', 200 * 1024 * 1024))
+    budget_bytes, budget_count = enforce_disk_budget(config.get('STORAGE_DISK_BUDGET', 2 * 1024 * 1024 * 1024))
+
+    report['expired_bytes'] = expired_bytes
+    report['quota_bytes'] = quota_bytes
+    report['budget_bytes'] = budget_bytes
+    report['evicted_artifacts'] = expired_count + quota_count + budget_count
+    report['reclaimed_bytes'] = sum(report[key] for key in (
+        'temp_bytes', 'upload_bytes', 'orphan_output_bytes', 'expired_bytes', 'quota_bytes', 'budget_bytes'
+    ))
+    return report
+
+@shared_task(name='app.utils.janitor.run_storage_janitor')
+def run_storage_janitor():
+    """Celery beat entry point for the storage janitor."""
+    from app.utils.pdf_processor import get_worker_app
+
+    app = get_worker_app()
+    with app.app_context():
+        # Only one janitor pass at a time, even with several workers running beat
+        interval = app.config.get('STORAGE_JANITOR_INTERVAL', 3600)
+        lock = get_redis().lock(JANITOR_LOCK_KEY, timeout=max(interval - 60, 60), blocking=False)
+        if not lock.acquire(blocking=False):
+            logger.info("Storage janitor already running elsewhere, skipping")
+            return {'skipped': True}
+
+        try:
+            report = run_janitor()
+            logger.info(f"Storage janitor reclaimed {report['reclaimed_bytes']} bytes: {report}")
+            return report
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Storage janitor failed: {str(e)}")
+            raise
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                pass
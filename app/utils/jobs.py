@@ -0,0 +1,715 @@
+import os
+import json
+import math
+import uuid
+import hashlib
+import logging
+from datetime import datetime
+from flask import current_app, has_app_context
+from app.tasks import enqueue_process_pdf, enqueue_prepare_document, enqueue_process_pdf_group, enqueue_derive_outputs
+from app.utils.languages import language_map
+from app.utils.credits import reserve_credits, reserve_credits_many, release_reservation
+from app.utils.redis import get_redis
+from app.utils.webhooks import register_callback, unregister_callback, queue_callback, validate_callback_url
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Outputs a conversion can produce; 'both' is audio plus a translated PDF
+OUTPUT_FORMATS = ('audio', 'pdf', 'both', 'text', 'markdown', 'epub')
+
+# File types a task can have available for download
+OUTPUT_FILE_TYPES = tuple(output_format for output_format in OUTPUT_FORMATS if output_format != 'both') + (
+    'chapters', 'page_index')
+
+# Identical submissions within this many seconds share one job
+DEFAULT_JOB_COALESCE_WINDOW = 600
+
+# Idempotency-Key headers are remembered for a day
+DEFAULT_IDEMPOTENCY_KEY_TTL = 86400
+
+# Previews reserve this many credits and run on their own queue
+DEFAULT_PREVIEW_CREDITS = 1
+DEFAULT_PREVIEW_QUEUE = 'fast'
+
+# A multi-language job may target at most this many languages
+DEFAULT_MAX_JOB_LANGUAGES = 8
+
+# Task ids accepted by one bulk status request
+MAX_STATUS_TASK_IDS = 500
+
+# A batch may hold at most this many PDFs
+DEFAULT_MAX_BATCH_FILES = 100
+
+# Job groups (multi-language jobs and batches) are remembered as long as their outputs
+DEFAULT_JOB_GROUP_TTL = 604800
+
+# Deriving outputs from kept intermediates is local CPU work only, so it is free by default
+DEFAULT_DERIVE_CREDITS = 0
+
+# Layouts a derived PDF can be rendered in
+PDF_PAGE_SIZES = ('a4', 'letter')
+PDF_FONT_SIZES = range(10, 33)
+
+METRICS_KEY = 'metrics:jobs'
+
+def _get_config(name, default):
+    if has_app_context() and current_app.config.get(name) is not None:
+        return int(current_app.config[name])
+    return int(os.environ.get(name, default))
+
+def _preview_queue():
+    if has_app_context() and current_app.config.get('PREVIEW_QUEUE'):
+        return current_app.config['PREVIEW_QUEUE']
+    return os.environ.get('PREVIEW_QUEUE', DEFAULT_PREVIEW_QUEUE)
+
+def resolve_output_format(voice, output_format):
+    """Languages that only support audio always get audio output."""
+    if language_map.get(voice, {}).get("audio_only", False) and output_format in ["pdf", "both"]:
+        logger.info(f"Language {voice} only supports audio output. Overriding format {output_format} to 'audio'")
+        return "audio"
+    return output_format
+
+def parse_output_format(params):
+    """
+    Read the optional output_format of a submission, defaulting to audio.
+
+    Raises:
+        ValueError: if the format is not known
+    """
+    output_format = (params.get('output_format') or '').strip().lower() or 'audio'
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Choose one of {', '.join(OUTPUT_FORMATS)}")
+    return output_format
+
+def required_credits(output_format):
+    """Credits charged for a conversion: 1 for PDF or text (text, markdown, epub), 1 more with audio."""
+    credits = 1
+    if output_format in ["audio", "both"]:
+        credits += 1
+    return credits
+
+def reserved_credits(output_format, preview=False):
+    """Credits reserved at submit time; previews reserve at most PREVIEW_CREDITS."""
+    credits = required_credits(output_format)
+    if preview:
+        credits = min(credits, _get_config('PREVIEW_CREDITS', DEFAULT_PREVIEW_CREDITS))
+    return credits
+
+def charged_credits(output_format, total_pages, pages_processed):
+    """
+    Credits owed for a finished conversion.
+
+    A whole document costs the flat price from required_credits; a page
+    range or preview pays that price pro rata for the pages it processed,
+    with a minimum of 1 credit. Never more than the reservation is kept
+    (see commit_reservation).
+    """
+    base = required_credits(output_format)
+    if not total_pages or pages_processed >= total_pages:
+        return base
+    return max(1, math.ceil(base * pages_processed / total_pages))
+
+def parse_page_options(params):
+    """
+    Read page_start, page_end and preview from submitted form or JSON fields.
+
+    Pages are 1-based and inclusive; either end may be left out.
+
+    Returns:
+        (page_start, page_end, preview)
+
+    Raises:
+        ValueError: if the page range is not valid
+    """
+    def page_number(name):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a whole number")
+        if number < 1:
+            raise ValueError(f"{name} must be 1 or more")
+        return number
+
+    page_start = page_number('page_start')
+    page_end = page_number('page_end')
+    if page_start and page_end and page_start > page_end:
+        raise ValueError("page_start must not be after page_end")
+
+    preview = params.get('preview', False)
+    if isinstance(preview, str):
+        preview = preview.lower() in ('1', 'true', 'on', 'yes')
+    return page_start, page_end, bool(preview)
+
+def parse_callback_url(params):
+    """
+    Read the optional callback_url of a submission.
+
+    Raises:
+        ValueError: if it is not an absolute http(s) URL
+    """
+    url = (params.get('callback_url') or '').strip()
+    return validate_callback_url(url) if url else None
+
+def parse_languages(params):
+    """
+    Read the target languages of a submission.
+
+    `languages` may be repeated, comma-separated, or a JSON list; without it
+    the single `voice` field is used.
+
+    Returns:
+        List of distinct language codes, in the order given
+
+    Raises:
+        ValueError: if a language is not supported or too many are requested
+    """
+    if hasattr(params, 'getlist'):
+        values = params.getlist('languages')
+    else:
+        values = params.get('languages') or []
+        if isinstance(values, str):
+            values = [values]
+
+    languages = []
+    for value in values:
+        for code in str(value).split(','):
+            code = code.strip()
+            if code and code not in languages:
+                languages.append(code)
+    if not languages:
+        return [params.get('voice') or 'en']
+
+    unsupported = [code for code in languages if code not in language_map]
+    if unsupported:
+        raise ValueError(f"Unsupported language(s): {', '.join(unsupported)}")
+    max_languages = _get_config('MAX_JOB_LANGUAGES', DEFAULT_MAX_JOB_LANGUAGES)
+    if len(languages) > max_languages:
+        raise ValueError(f"At most {max_languages} languages can be requested at once")
+    return languages
+
+def job_fingerprint(user_id, content_sha256, voice, output_format, audio_speed, page_start=None, page_end=None,
+                    preview=False, audio_encoding=None):
+    """Identify a submission by its owner, the PDF's content and the conversion parameters."""
+    raw = (f"{user_id}:{content_sha256}:{voice}:{output_format}:{float(audio_speed):.2f}"
+           f":{page_start or ''}:{page_end or ''}:{int(bool(preview))}:{audio_encoding or ''}")
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _fingerprint_key(fingerprint):
+    return f"job_fingerprint:{fingerprint}"
+
+def _idempotency_key(user_id, key):
+    return f"idempotency:{user_id}:{key}"
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def _record_metric(*fields):
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for field in fields:
+            pipe.hincrby(METRICS_KEY, field, 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record job metrics {fields}: {str(e)}")
+
+def get_job_metrics():
+    """Counters for submitted jobs and for submissions coalesced into an existing job."""
+    raw = get_redis().hgetall(METRICS_KEY) or {}
+    return {_decode(key): int(value) for key, value in raw.items()}
+
+def _live_task(redis_key):
+    """
+    Return the task id stored under a dedup key, if that task can still be joined.
+
+    A task whose credits were released has failed, so a repeat submission
+    should start fresh work instead of attaching to the failure. A task with
+    no reservation yet is still being submitted by another request.
+    """
+    from app.models.credit_reservation import CreditReservation
+
+    task_id = _decode(get_redis().get(redis_key))
+    if not task_id:
+        return None
+    reservation = CreditReservation.query.filter_by(task_id=task_id).first()
+    if reservation is not None and reservation.status == CreditReservation.STATUS_RELEASED:
+        return None
+    return task_id
+
+def _claim(redis_key, task_id, ttl):
+    """Claim a dedup key for task_id; return the task that holds it if another request won."""
+    redis_client = get_redis()
+    if redis_client.set(redis_key, task_id, ex=ttl, nx=True):
+        return None
+    winner = _live_task(redis_key)
+    if winner:
+        return winner
+    # The previous holder failed; take over the key
+    redis_client.set(redis_key, task_id, ex=ttl)
+    return None
+
+def _join_callback(task_id, callback_url):
+    """
+    Add a coalesced submission's callback to the task it joined.
+
+    A task sends its callbacks once, when it finishes. If the joined task
+    already has, the callback is delivered right away with the final state
+    instead of waiting for an event that will not come again.
+    """
+    from app.models.artifact import Artifact
+    from app.models.credit_reservation import CreditReservation
+    from app.utils.progress import get_progress_many
+
+    # Registered first: a task finishing from here on sends it with the others
+    register_callback(task_id, callback_url)
+    reservation = CreditReservation.query.filter_by(task_id=task_id).first()
+    if reservation is None or reservation.status == CreditReservation.STATUS_RESERVED:
+        return
+    # Already finished; unless its callbacks were sent after we registered, send this one now
+    if not unregister_callback(task_id, callback_url):
+        return
+
+    progress = get_progress_many([task_id]).get(task_id, {})
+    if reservation.status == CreditReservation.STATUS_COMMITTED:
+        file_types = [artifact.file_type for artifact in Artifact.query.filter_by(task_id=task_id).all()]
+        queue_callback(callback_url, task_id, 'completed', file_types=file_types,
+                       pages_processed=progress.get('pages_processed'), credits_charged=reservation.credits)
+    else:
+        queue_callback(callback_url, task_id, 'error', error=progress.get('error') or 'The job failed')
+    logger.info(f"[{task_id}] Task had already finished, queued the joined callback directly")
+
+def submit_conversion(user_id, filename, voice, output_format, audio_speed=1.0, file_content=None, source_key=None,
+                      content_sha256=None, idempotency_key=None, page_start=None, page_end=None, preview=False,
+                      callback_url=None, audio_encoding=None):
+    """
+    Reserve credits for a conversion and enqueue it, unless an identical job is already running.
+
+    A submission with the same Idempotency-Key as an earlier one, or with the
+    same content hash and parameters as one made within
+    JOB_COALESCE_WINDOW seconds, attaches to that job instead of starting
+    (and charging for) new work.
+
+    The task id is chosen up front so the credits can be reserved under it;
+    the worker commits the reservation on success and refunds it on failure.
+    The PDF is passed either as file_content or as source_key (a chunked
+    Redis blob).
+
+    page_start/page_end limit the conversion to a page range and preview
+    converts only the opening text on the PREVIEW_QUEUE fast lane. Both
+    reserve up front and the worker refunds what the pages processed did
+    not use (see charged_credits).
+
+    callback_url is POSTed to when the job finishes (see app.utils.webhooks);
+    a coalesced submission adds it to the job it joins. audio_encoding
+    names the output preset (see app.utils.audio_encoding).
+
+    Returns:
+        (task_id, coalesced), or (None, False) if the user does not have enough credits
+    """
+    output_format = resolve_output_format(voice, output_format)
+    credits = reserved_credits(output_format, preview)
+
+    dedup_keys = []
+    if idempotency_key:
+        dedup_keys.append((_idempotency_key(user_id, idempotency_key),
+                           _get_config('IDEMPOTENCY_KEY_TTL', DEFAULT_IDEMPOTENCY_KEY_TTL), 'idempotency_key'))
+    if content_sha256:
+        fingerprint = job_fingerprint(user_id, content_sha256, voice, output_format, audio_speed,
+                                      page_start=page_start, page_end=page_end, preview=preview,
+                                      audio_encoding=audio_encoding)
+        dedup_keys.append((_fingerprint_key(fingerprint),
+                           _get_config('JOB_COALESCE_WINDOW', DEFAULT_JOB_COALESCE_WINDOW), 'fingerprint'))
+
+    task_id = str(uuid.uuid4())
+    claimed = []
+    existing = None
+    try:
+        for redis_key, ttl, reason in dedup_keys:
+            existing = _claim(redis_key, task_id, ttl)
+            if existing:
+                logger.info(f"Coalesced submission from user {user_id} into task {existing} ({reason})")
+                _record_metric('coalesced', f'coalesced_by_{reason}')
+                # Keys claimed so far (e.g. a new Idempotency-Key) now point at the joined job
+                for claimed_key, claimed_ttl in claimed:
+                    get_redis().set(claimed_key, existing, ex=claimed_ttl)
+                break
+            claimed.append((redis_key, ttl))
+    except Exception as e:
+        # Deduplication is an optimisation; never fail a submission because of it
+        logger.warning(f"Job deduplication unavailable, submitting without it: {str(e)}")
+        existing = None
+
+    if existing:
+        if callback_url:
+            _join_callback(existing, callback_url)
+        return existing, True
+
+    if reserve_credits(user_id, credits, task_id) is None:
+        for claimed_key, _ttl in claimed:
+            get_redis().delete(claimed_key)
+        return None, False
+    logger.info(f"Reserved {credits} credits from user {user_id} for task {task_id}")
+
+    try:
+        # Registered before the task exists, so even a very fast job finds it
+        if callback_url:
+            register_callback(task_id, callback_url)
+        enqueue_process_pdf(
+            file_content=file_content,
+            filename=filename,
+            voice={'language': voice},
+            output_format=output_format,
+            user_id=user_id,
+            audio_speed=audio_speed,
+            task_id=task_id,
+            source_key=source_key,
+            page_start=page_start,
+            page_end=page_end,
+            preview=preview,
+            queue=_preview_queue() if preview else None,
+            audio_encoding=audio_encoding
+        )
+    except Exception:
+        # The job never started, give the credits back
+        release_reservation(task_id)
+        for claimed_key, _ttl in claimed:
+            get_redis().delete(claimed_key)
+        raise
+
+    if preview:
+        _record_metric('submitted', 'submitted_preview')
+    else:
+        _record_metric('submitted')
+    return task_id, False
+
+def _job_group_key(job_id):
+    return f"job_group:{job_id}"
+
+def create_job_group(job_id, user_id, kind, tasks, **details):
+    """
+    Remember the tasks that make up a job.
+
+    Args:
+        job_id: Id of the job (also the task id of its first stage, if any)
+        user_id: Owner of the job
+        kind: What the job is, e.g. 'languages'
+        tasks: Dict mapping each part of the job (e.g. a language) to its task id
+        **details: Extra fields returned with the job's status
+    """
+    group = dict(details, job_id=job_id, user_id=user_id, kind=kind, tasks=tasks,
+                 created_at=datetime.utcnow().isoformat())
+    get_redis().set(_job_group_key(job_id), json.dumps(group),
+                    ex=_get_config('JOB_GROUP_TTL', DEFAULT_JOB_GROUP_TTL))
+    return group
+
+def get_job_group(job_id, user_id=None):
+    """
+    Load a job group, optionally checking its owner.
+
+    Returns:
+        The job group dict, or None if it does not exist (or belongs to someone else)
+    """
+    raw = get_redis().get(_job_group_key(job_id))
+    if not raw:
+        return None
+    group = json.loads(_decode(raw))
+    if user_id is not None and group['user_id'] != user_id:
+        return None
+    return group
+
+def submit_multilingual(user_id, filename, languages, output_format, audio_speed=1.0, source_key=None,
+                        page_start=None, page_end=None, preview=False, callback_url=None, audio_encoding=None):
+    """
+    Reserve credits for a multi-language job and enqueue it.
+
+    The text is extracted and its language detected once (prepare_document),
+    then each language runs as its own process_pdf task with its own task id,
+    progress, artifacts and credit reservation. All reservations are made in
+    one transaction, so either every language is paid for or none is.
+
+    Returns:
+        (job_id, tasks) with tasks mapping language to task id, or (None, None)
+        if the user does not have enough credits
+    """
+    job_id = str(uuid.uuid4())
+    branches = []
+    reservations = []
+    for language in languages:
+        branch_format = resolve_output_format(language, output_format)
+        credits = reserved_credits(branch_format, preview)
+        branch = {'task_id': str(uuid.uuid4()), 'voice': {'language': language}, 'output_format': branch_format}
+        branches.append(branch)
+        reservations.append((branch['task_id'], credits))
+
+    if reserve_credits_many(user_id, reservations) is None:
+        return None, None
+
+    tasks = {branch['voice']['language']: branch['task_id'] for branch in branches}
+    try:
+        create_job_group(job_id, user_id, 'languages', tasks, filename=filename, output_format=output_format)
+        if callback_url:
+            for task_id in tasks.values():
+                register_callback(task_id, callback_url)
+        enqueue_prepare_document(
+            job_id,
+            source_key,
+            filename,
+            user_id,
+            branches,
+            audio_speed=audio_speed,
+            page_start=page_start,
+            page_end=page_end,
+            preview=preview,
+            queue=_preview_queue() if preview else None,
+            audio_encoding=audio_encoding
+        )
+    except Exception:
+        # The job never started, give the credits back
+        for task_id, _credits in reservations:
+            release_reservation(task_id)
+        raise
+
+    logger.info(f"Submitted job {job_id} for user {user_id} in {len(languages)} languages: {tasks}")
+    _record_metric('submitted', 'submitted_multilingual')
+    return job_id, tasks
+
+def _unique_filenames(filenames):
+    """Rename repeated filenames (report.pdf, report_2.pdf, ...) so outputs never overwrite each other."""
+    seen = set()
+    unique = []
+    for filename in filenames:
+        base, ext = os.path.splitext(filename)
+        candidate, n = filename, 1
+        while candidate in seen:
+            n += 1
+            candidate = f"{base}_{n}{ext}"
+        seen.add(candidate)
+        unique.append(candidate)
+    return unique
+
+def submit_batch(user_id, files, voice, output_format, audio_speed=1.0, page_start=None, page_end=None,
+                 preview=False, callback_url=None, audio_encoding=None):
+    """
+    Reserve credits for a batch of PDFs and enqueue them as one Celery group.
+
+    Every PDF becomes its own process_pdf task with its own progress,
+    artifacts and reservation, but the reservations are made in a single
+    transaction and the tasks are sent in one group, so a batch costs one
+    credit check and one broker round trip rather than one per file.
+
+    Args:
+        files: List of (filename, source_key, manifest) from ingest_upload/ingest_zip
+
+    Returns:
+        (batch_id, tasks) with tasks mapping each (de-duplicated) filename to
+        its task id, or (None, None) if the user does not have enough credits
+    """
+    batch_id = str(uuid.uuid4())
+    output_format = resolve_output_format(voice, output_format)
+    credits = reserved_credits(output_format, preview)
+
+    filenames = _unique_filenames([filename for filename, _source_key, _manifest in files])
+    jobs = []
+    for filename, (_original, source_key, _manifest) in zip(filenames, files):
+        jobs.append({
+            'task_id': str(uuid.uuid4()),
+            'file_content': None,
+            'filename': filename,
+            'voice': {'language': voice},
+            'output_format': output_format,
+            'user_id': user_id,
+            'audio_speed': audio_speed,
+            'source_key': source_key,
+            'page_start': page_start,
+            'page_end': page_end,
+            'preview': preview,
+            'audio_encoding': audio_encoding
+        })
+
+    reservations = [(job['task_id'], credits) for job in jobs]
+    if reserve_credits_many(user_id, reservations) is None:
+        return None, None
+
+    tasks = {job['filename']: job['task_id'] for job in jobs}
+    try:
+        create_job_group(batch_id, user_id, 'batch', tasks, voice=voice, output_format=output_format)
+        if callback_url:
+            for task_id in tasks.values():
+                register_callback(task_id, callback_url)
+        enqueue_process_pdf_group(jobs, queue=_preview_queue() if preview else None)
+    except Exception:
+        # The batch never started, give the credits back
+        for task_id, _credits in reservations:
+            release_reservation(task_id)
+        raise
+
+    logger.info(f"Submitted batch {batch_id} for user {user_id}: {len(jobs)} files, {credits * len(jobs)} credits reserved")
+    _record_metric('submitted', 'submitted_batch')
+    return batch_id, tasks
+
+def job_group_status(group):
+    """
+    Progress of a job group: its first stage (if any) and each of its tasks.
+
+    Returns:
+        Dict with the job's overall status and progress, and a `tasks` dict
+        holding each part's task id, status, progress and error
+    """
+    from app.utils.progress import get_progress
+
+    stage = get_progress(group['job_id']) or {}
+    tasks = {}
+    for part, task_id in group['tasks'].items():
+        data = get_progress(task_id) or {}
+        tasks[part] = {
+            'task_id': task_id,
+            'status': data.get('status', 'queued'),
+            'progress': data.get('progress', 0),
+            'error': data.get('error')
+        }
+
+    statuses = [task['status'] for task in tasks.values()]
+    if stage.get('status') == 'error' or (statuses and all(status == 'error' for status in statuses)):
+        status = 'error'
+    elif statuses and all(status in ('completed', 'error') for status in statuses):
+        status = 'completed' if 'error' not in statuses else 'partial'
+    else:
+        status = 'processing'
+
+    progress = sum(float(task['progress'] or 0) for task in tasks.values()) / len(tasks) if tasks else 0
+    return {
+        'job_id': group['job_id'],
+        'kind': group['kind'],
+        'status': status,
+        'progress': progress,
+        'error': stage.get('error'),
+        'tasks': tasks
+    }
+
+def get_task_states(user_id, task_ids):
+    """
+    Status of many of a user's tasks, read with a few set-based queries.
+
+    Ownership comes from the tasks' credit reservations, progress from
+    get_progress_many and downloadable outputs from the artifact registry,
+    one IN query each, however many tasks are asked for. Once progress data
+    has expired the reservation still tells whether the task succeeded.
+    Unknown task ids (or other users' tasks) are reported as not_found.
+
+    Returns:
+        Dict mapping each task id to its status, progress, error and outputs
+    """
+    from app.models.artifact import Artifact
+    from app.models.credit_reservation import CreditReservation
+    from app.utils.progress import get_progress_many
+
+    reservations = dict(
+        CreditReservation.query
+        .with_entities(CreditReservation.task_id, CreditReservation.status)
+        .filter(CreditReservation.user_id == user_id, CreditReservation.task_id.in_(task_ids))
+        .all()
+    )
+    owned = list(reservations)
+    progress = get_progress_many(owned) if owned else {}
+
+    outputs = {}
+    if owned:
+        artifacts = (
+            Artifact.query
+            .with_entities(Artifact.task_id, Artifact.file_type)
+            .filter(Artifact.task_id.in_(owned))
+            .all()
+        )
+        for task_id, file_type in artifacts:
+            outputs.setdefault(task_id, []).append(file_type)
+
+    fallback_status = {
+        CreditReservation.STATUS_RESERVED: 'queued',
+        CreditReservation.STATUS_COMMITTED: 'completed',
+        CreditReservation.STATUS_RELEASED: 'error'
+    }
+    states = {}
+    for task_id in task_ids:
+        if task_id not in reservations:
+            states[task_id] = {'status': 'not_found'}
+            continue
+        data = progress.get(task_id, {})
+        states[task_id] = {
+            'status': data.get('status') or fallback_status.get(reservations[task_id], 'queued'),
+            'progress': data.get('progress', 100 if reservations[task_id] == CreditReservation.STATUS_COMMITTED else 0),
+            'error': data.get('error'),
+            'outputs': sorted(outputs.get(task_id, []))
+        }
+    return states
+
+def parse_derive_options(params):
+    """
+    Read the output_format, audio_speed and PDF layout (pdf_page_size, pdf_font_size) of a derivation.
+
+    Returns:
+        (output_format, audio_speed, page_size, font_size)
+
+    Raises:
+        ValueError: if an option is not valid
+    """
+    output_format = params.get('output_format') or 'audio'
+    if output_format not in ('audio', 'pdf', 'both'):
+        raise ValueError("output_format must be audio, pdf or both")
+    try:
+        audio_speed = float(params.get('audio_speed') or 1.0)
+        font_size = int(params.get('pdf_font_size') or 16)
+    except (TypeError, ValueError):
+        raise ValueError("audio_speed and pdf_font_size must be numbers")
+    if not 0.5 <= audio_speed <= 2.0:
+        raise ValueError("audio_speed must be between 0.5 and 2.0")
+    if font_size not in PDF_FONT_SIZES:
+        raise ValueError(f"pdf_font_size must be between {PDF_FONT_SIZES[0]} and {PDF_FONT_SIZES[-1]}")
+    page_size = (params.get('pdf_page_size') or 'a4').lower()
+    if page_size not in PDF_PAGE_SIZES:
+        raise ValueError(f"pdf_page_size must be one of {', '.join(PDF_PAGE_SIZES)}")
+    return output_format, audio_speed, page_size, font_size
+
+def submit_derivation(user_id, source_task_id, output_format, audio_speed=1.0, audio_encoding=None, page_size='a4',
+                      font_size=16, callback_url=None):
+    """
+    Derive new outputs from a completed job's kept intermediates (see app.utils.intermediates).
+
+    The derivation is a task of its own, reported and downloaded like any
+    other; it reserves DERIVE_CREDITS and runs on the PREVIEW_QUEUE fast
+    lane, since it only re-times, re-encodes or re-renders. A free
+    derivation still gets a reservation, which records who owns the task,
+    but leaves no entry in the credit history.
+
+    Returns:
+        The new task id, or None if the user does not have enough credits
+    """
+    task_id = str(uuid.uuid4())
+    credits = _get_config('DERIVE_CREDITS', DEFAULT_DERIVE_CREDITS)
+    if reserve_credits(user_id, credits, task_id, description='Derived output') is None:
+        return None
+
+    try:
+        if callback_url:
+            register_callback(task_id, callback_url)
+        enqueue_derive_outputs(
+            task_id,
+            source_task_id,
+            user_id,
+            output_format,
+            audio_speed=audio_speed,
+            audio_encoding=audio_encoding,
+            page_size=page_size,
+            font_size=font_size,
+            queue=_preview_queue()
+        )
+    except Exception:
+        # The derivation never started, give the credits back
+        release_reservation(task_id)
+        raise
+
+    logger.info(f"Submitted derivation {task_id} of task {source_task_id} for user {user_id}")
+    _record_metric('submitted', 'submitted_derivation')
+    return task_id
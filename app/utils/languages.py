@@ -0,0 +1,23 @@
+# Supported target languages.
+#
+# Kept free of heavy imports so the web tier can validate requests without
+# loading the PDF/audio processing stack.
+
+# Mapping language codes and TLDs for accents
+language_map = {
+    "en": {"lang": "en", "tld": "com"},
+    "en-uk": {"lang": "en", "tld": "co.uk"},
+    "pt": {"lang": "pt", "tld": "com.br"},
+    "es": {"lang": "es", "tld": "com"},
+    "fr": {"lang": "fr", "tld": "fr"},
+    "de": {"lang": "de", "tld": "de"},
+    "it": {"lang": "it", "tld": "it"},
+    "ru": {"lang": "ru", "tld": "ru"},
+    "tr": {"lang": "tr", "tld": "com.tr"},    # Turkish
+    "nl": {"lang": "nl", "tld": "nl"},        # Dutch
+    "pl": {"lang": "pl", "tld": "pl"},         # Polish
+    "ja": {"lang": "ja", "tld": "co.jp"},     # Japanese - now supports PDF
+    "zh-CN": {"lang": "zh-CN", "tld": "com"}, # Chinese (Simplified) - now supports PDF
+    "ar": {"lang": "ar", "tld": "com", "audio_only": True},    # Arabic 
+    "ko": {"lang": "ko", "tld": "co.kr"}      # Korean - now supports PDF
+}
@@ -0,0 +1,221 @@
+"""
+Minimal MP3 (MPEG audio Layer III) frame parsing and chapter tagging.
+
+Durations and seek offsets are computed by walking the frame headers, which
+is exact and needs neither ffmpeg nor decoding the audio.
+"""
+import os
+import mmap
+import shutil
+import struct
+
+# Bitrates in kbit/s by bitrate index, for MPEG-1 and MPEG-2/2.5 Layer III
+_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5) and sample rate index
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+def _id3v2_size(data):
+    """Bytes taken by an ID3v2 tag at the start of data (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def parse_frame_header(header):
+    """
+    Decode a 4-byte Layer III frame header.
+
+    Returns:
+        (frame_length, samples_per_frame, sample_rate), or None if header is not a valid frame header
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+    samples = 1152 if mpeg1 else 576
+    frame_length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+    return frame_length, samples, sample_rate
+
+def _is_info_frame(data, offset, frame_length):
+    """True for the Xing/Info/VBRI header frame encoders put first; players skip it."""
+    frame = data[offset:offset + min(frame_length, 64)]
+    return b'Xing' in frame or b'Info' in frame or b'VBRI' in frame
+
+def iter_frames(data):
+    """
+    Yield (offset, length, samples, sample_rate) for each audio frame in data.
+
+    A leading ID3v2 tag and the Xing/Info header frame are skipped, and so
+    is anything between frames that is not a frame (e.g. an ID3v1 tag).
+    """
+    offset = _id3v2_size(data)
+    end = len(data)
+    first = True
+    while offset + 4 <= end:
+        parsed = parse_frame_header(data[offset:offset + 4])
+        if parsed is None or offset + parsed[0] > end:
+            offset += 1
+            continue
+        frame_length, samples, sample_rate = parsed
+        if not (first and _is_info_frame(data, offset, frame_length)):
+            yield offset, frame_length, samples, sample_rate
+        first = False
+        offset += frame_length
+
+def mp3_duration(path):
+    """Duration of an MP3 file in seconds, from its frame headers."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return sum(samples / sample_rate for _offset, _length, samples, sample_rate in iter_frames(data))
+
+def join_frames(paths, output_path):
+    """
+    Concatenate MP3 files by copying their audio frames, without re-encoding.
+
+    Tags and Xing/Info frames of the inputs are dropped, so the result is
+    one clean stream. This is only correct when every input uses the same
+    stream parameters, as the chunks of one gTTS job do.
+
+    Returns:
+        Duration of the output in seconds
+
+    Raises:
+        ValueError: if an input holds no MP3 frames
+    """
+    duration = 0.0
+    with open(output_path, 'wb') as out:
+        for path in paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            frames = 0
+            for offset, length, samples, sample_rate in iter_frames(data):
+                out.write(data[offset:offset + length])
+                duration += samples / sample_rate
+                frames += 1
+            if not frames:
+                raise ValueError(f"{path} holds no MP3 frames")
+    return duration
+
+def frame_offsets(path, times):
+    """
+    Byte offset of the frame playing at each of the given times.
+
+    The file is memory-mapped rather than read, so this works on audiobooks
+    of any length. An HTTP Range request starting at one of these offsets
+    begins playback exactly at that time.
+
+    Args:
+        path: MP3 file
+        times: Times in seconds, in ascending order
+
+    Returns:
+        List of offsets, one per time (None for times past the end)
+    """
+    offsets = [None] * len(times)
+    if not times or not os.path.getsize(path):
+        return offsets
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = 0.0
+        next_time = 0
+        for offset, _length, samples, sample_rate in iter_frames(data):
+            frame_end = position + samples / sample_rate
+            # Allow for rounding, so a time on a frame boundary maps to the frame starting there
+            while next_time < len(times) and times[next_time] < frame_end - 1e-6:
+                offsets[next_time] = offset
+                next_time += 1
+            if next_time == len(times):
+                break
+            position = frame_end
+    return offsets
+
+# A CTOC frame lists at most 255 children
+_MAX_TOC_ENTRIES = 255
+
+def _id3_frame(frame_id, body):
+    """One ID3v2.3 frame: id, 32-bit size, no flags."""
+    return frame_id.encode('ascii') + struct.pack('>IH', len(body), 0) + body
+
+def _id3_text(frame_id, text):
+    """Text frame in UTF-16 with BOM, so titles in any language survive."""
+    return _id3_frame(frame_id, b'\x01' + text.encode('utf-16') + b'\x00\x00')
+
+def _chap_frame(element_id, start, end, title):
+    body = (element_id.encode('ascii') + b'\x00'
+            + struct.pack('>IIII', int(start * 1000), int(end * 1000), 0xFFFFFFFF, 0xFFFFFFFF)
+            + _id3_text('TIT2', title))
+    return _id3_frame('CHAP', body)
+
+def _ctoc_frame(element_id, children, title, top_level=False):
+    flags = 0x03 if top_level else 0x01  # ordered, plus top-level for the root
+    body = (element_id.encode('ascii') + b'\x00' + bytes([flags, len(children)])
+            + b''.join(child.encode('ascii') + b'\x00' for child in children)
+            + _id3_text('TIT2', title))
+    return _id3_frame('CTOC', body)
+
+def _syncsafe(size):
+    return bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+
+def chapter_tag(chapters, title=None):
+    """
+    Build an ID3v2.3 tag with CHAP frames and a table of contents (CTOC).
+
+    More than 255 chapters are grouped under nested tables of contents,
+    since one CTOC frame cannot list more.
+
+    Args:
+        chapters: List of (start, end, title), times in seconds
+        title: Optional title of the whole recording
+    """
+    frames = [_id3_text('TIT2', title)] if title else []
+    chapter_ids = [f"chp{index}" for index in range(len(chapters))]
+    if len(chapters) <= _MAX_TOC_ENTRIES:
+        frames.append(_ctoc_frame('toc', chapter_ids, title or 'Contents', top_level=True))
+    else:
+        starts = range(0, len(chapters), _MAX_TOC_ENTRIES)
+        group_ids = [f"toc{index}" for index in range(len(starts))]
+        frames.append(_ctoc_frame('toc', group_ids, title or 'Contents', top_level=True))
+        for group_id, first in zip(group_ids, starts):
+            last = min(first + _MAX_TOC_ENTRIES, len(chapters)) - 1
+            frames.append(_ctoc_frame(group_id, chapter_ids[first:last + 1],
+                                      f"{chapters[first][2]} - {chapters[last][2]}"))
+    for element_id, (start, end, chapter_title) in zip(chapter_ids, chapters):
+        frames.append(_chap_frame(element_id, start, end, chapter_title))
+
+    body = b''.join(frames)
+    return b'ID3' + bytes([3, 0, 0]) + _syncsafe(len(body)) + body
+
+def write_chapters(path, chapters, title=None):
+    """
+    Put a chapter tag (see chapter_tag) at the start of an MP3 file.
+
+    An existing ID3v2 tag is replaced. The audio is streamed into a new
+    file next to the original, which then replaces it.
+    """
+    tag = chapter_tag(chapters, title)
+    with open(path, 'rb') as f:
+        skip = _id3v2_size(f.read(10))
+    temp_path = f"{path}.chapters"
+    with open(path, 'rb') as src, open(temp_path, 'wb') as dst:
+        dst.write(tag)
+        src.seek(skip)
+        shutil.copyfileobj(src, dst)
+    os.replace(temp_path, path)
+    return len(tag)
@@ -0,0 +1,97 @@
+"""
+Per-page navigation for generated audio.
+
+While process_pdf assembles the audio it records, for every synthesized
+chunk, the source page the text came from and how long the chunk plays
+(from its MP3 frame headers). This module turns that timeline into ID3
+chapter markers, a WebVTT chapter track and a JSON page index holding
+each page's start time and, for MP3 output, the byte offset to request
+with an HTTP Range header to start playback at that page.
+"""
+import os
+import json
+import logging
+from app.utils.mp3 import frame_offsets, write_chapters
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def page_timeline(chunk_timings):
+    """
+    Merge per-chunk timings into one entry per page.
+
+    Args:
+        chunk_timings: List of (page, duration in seconds), in playback order
+
+    Returns:
+        List of dicts with page, start and end (seconds)
+    """
+    pages = []
+    position = 0.0
+    for page, duration in chunk_timings:
+        if pages and pages[-1]['page'] == page:
+            pages[-1]['end'] = position + duration
+        else:
+            pages.append({'page': page, 'start': position, 'end': position + duration})
+        position += duration
+    return pages
+
+def _vtt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+
+def render_webvtt(pages):
+    """WebVTT chapter track with one cue per page."""
+    lines = ['WEBVTT', '']
+    for entry in pages:
+        lines.append(f"page-{entry['page']}")
+        lines.append(f"{_vtt_time(entry['start'])} --> {_vtt_time(entry['end'])}")
+        lines.append(f"Page {entry['page']}")
+        lines.append('')
+    return '\n'.join(lines)
+
+def write_page_index(audio_path, chunk_timings, audio_encoding, output_dir, output_name, title=None):
+    """
+    Add page chapters to a finished audio file and write its page index.
+
+    MP3 output gets an ID3 CHAP/CTOC tag and byte offsets per page; other
+    encodings only get start times, since their containers can't be
+    entered at an arbitrary byte.
+
+    Returns:
+        Dict mapping file type ('chapters', 'page_index') to the file written
+    """
+    pages = page_timeline(chunk_timings)
+    offsets = [None] * len(pages)
+    if audio_path.endswith('.mp3'):
+        # Tag first: the offsets must account for the tag in front of the audio
+        write_chapters(audio_path, [(entry['start'], entry['end'], f"Page {entry['page']}") for entry in pages], title)
+        offsets = frame_offsets(audio_path, [entry['start'] for entry in pages])
+
+    index = {
+        'audio_encoding': audio_encoding,
+        'duration': round(pages[-1]['end'], 3) if pages else 0,
+        'size': os.path.getsize(audio_path),
+        'pages': [
+            {
+                'page': entry['page'],
+                'start': round(entry['start'], 3),
+                'end': round(entry['end'], 3),
+                'offset': offset
+            }
+            for entry, offset in zip(pages, offsets)
+        ]
+    }
+
+    vtt_path = os.path.join(output_dir, f'{output_name}.vtt')
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write(render_webvtt(pages))
+    index_path = os.path.join(output_dir, f'{output_name}.pages.json')
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+    logger.info(f"Indexed {len(pages)} pages of {audio_path} ({index['duration']:.1f}s)")
+    return {'chapters': vtt_path, 'page_index': index_path}
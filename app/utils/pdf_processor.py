@@ -1,10 +1,3 @@
-from PyPDF2 import PdfReader
-from gtts import gTTS
-from pydub import AudioSegment
-from googletrans import Translator
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
 from app.utils.progress import update_progress
 # Import celery instance
 from celery_worker import celery
@@ -13,9 +6,9 @@ import gc
 import time
 import threading
 import concurrent.futures
-import requests
+import multiprocessing
 import logging
-from flask import current_app # Import current_app to access config (alternative: pass config values)
+from flask import current_app, has_app_context # Import current_app to access config (alternative: pass config values)
 import re
 import tempfile
 import shutil
@@ -25,18 +18,28 @@ from io import BytesIO
 import json
 from app.utils.file_storage import copy_to_remote_storage
 from app.utils.redis import get_redis
+from app.utils.languages import language_map
+from app.utils.credits import commit_reservation, release_reservation
+from app.utils.webhooks import notify_task_finished, notify_output_ready
+from app.utils import hls
+from app.utils.mp3 import join_frames, mp3_duration
+from app.utils.page_index import write_page_index
+from app.utils.intermediates import intermediate_ttl, store_intermediates
+from app.utils.text_writers import TEXT_FORMATS, write_text_output
+from app.utils.audio_encoding import default_encoding, export_segment, transcode_file, audio_extension
 from celery import shared_task
-from app import create_app
 import textwrap
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import cidfonts
-from reportlab.lib.fonts import addMapping
-from PIL import Image, ImageDraw, ImageFont
+
+# Heavy media/translation libraries (PyPDF2, gTTS, pydub, googletrans,
+# reportlab, PIL, requests) are imported inside the functions that use them
+# so that importing this module stays cheap outside the worker.
 
 # Add logger instance
 logger = logging.getLogger(__name__)
 
+# Preview jobs convert only this much of the opening text
+DEFAULT_PREVIEW_MAX_CHARS = 1500
+
 # Simple rate limiter for Google Translate API
 class TranslateRateLimiter:
     def __init__(self, max_requests_per_second=5):
@@ -55,34 +58,63 @@ class TranslateRateLimiter:
 # Create a global rate limiter
 translate_rate_limiter = TranslateRateLimiter()
 
-# Mapping language codes and TLDs for accents
-language_map = {
-    "en": {"lang": "en", "tld": "com"},
-    "en-uk": {"lang": "en", "tld": "co.uk"},
-    "pt": {"lang": "pt", "tld": "com.br"},
-    "es": {"lang": "es", "tld": "com"},
-    "fr": {"lang": "fr", "tld": "fr"},
-    "de": {"lang": "de", "tld": "de"},
-    "it": {"lang": "it", "tld": "it"},
-    "ru": {"lang": "ru", "tld": "ru"},
-    "tr": {"lang": "tr", "tld": "com.tr"},    # Turkish
-    "nl": {"lang": "nl", "tld": "nl"},        # Dutch
-    "pl": {"lang": "pl", "tld": "pl"},         # Polish
-    "ja": {"lang": "ja", "tld": "co.jp"},     # Japanese - now supports PDF
-    "zh-CN": {"lang": "zh-CN", "tld": "com"}, # Chinese (Simplified) - now supports PDF
-    "ar": {"lang": "ar", "tld": "com", "audio_only": True},    # Arabic 
-    "ko": {"lang": "ko", "tld": "co.kr"}      # Korean - now supports PDF
-}
+def outline_chapters(reader):
+    """Top-level outline (bookmark) entries of a PDF as (title, 1-based page)."""
+    chapters = []
+    try:
+        for item in reader.outline:
+            # Nested lists hold the children of the previous entry
+            if isinstance(item, list):
+                continue
+            page = reader.get_destination_page_number(item)
+            if page is not None and page >= 0:
+                chapters.append((str(item.title), page + 1))
+    except Exception as e:
+        logger.warning(f"Could not read the PDF outline: {str(e)}")
+    return chapters
 
 # Smaller chunk size for better processing
-def extract_text_chunks_from_pdf(pdf_path, max_chunk_length=500):
+def extract_text_chunks_from_pdf(pdf_path, max_chunk_length=500, page_start=None, page_end=None, max_chars=None,
+                                 stats=None):
+    """
+    Extract text from a PDF as chunks of at most max_chunk_length characters.
+
+    Args:
+        pdf_path: Path of the PDF
+        max_chunk_length: Maximum chunk length in characters
+        page_start: First page to extract (1-based, inclusive); defaults to the first page
+        page_end: Last page to extract (1-based, inclusive); defaults to the last page
+        max_chars: Stop once this many characters have been extracted (preview mode)
+        stats: Optional dict that receives total_pages, pages_processed,
+            chunk_pages (the 1-based page each chunk came from) and chapters
+            (the outline entries within the range, see outline_chapters)
+
+    Returns:
+        List of text chunks
+    """
+    from PyPDF2 import PdfReader
+    
     try:
         reader = PdfReader(pdf_path)
         chunks = []
+        chunk_pages = []
         current_chunk = ''
         
         total_pages = len(reader.pages)
-        for page_num, page in enumerate(reader.pages):
+        first_page = max(1, page_start or 1)
+        last_page = min(total_pages, page_end or total_pages)
+        if first_page > last_page:
+            raise ValueError(f"Page range {first_page}-{last_page} is outside the document ({total_pages} pages)")
+        
+        pages_processed = 0
+        extracted_chars = 0
+        for page_num in range(first_page - 1, last_page):
+            # Stop early once a preview has enough text
+            if max_chars and extracted_chars >= max_chars:
+                break
+            page = reader.pages[page_num]
+            pages_processed += 1
+            
             # Garbage collection on every page
             gc.collect()
             
@@ -90,6 +122,9 @@ def extract_text_chunks_from_pdf(pdf_path, max_chunk_length=500):
             page_text = page.extract_text()
             if not page_text:
                 continue
+            if max_chars:
+                page_text = page_text[:max_chars - extracted_chars]
+            extracted_chars += len(page_text)
             
             # Preserve paragraph breaks for better layout and comprehension
             paragraphs = re.split(r'\n\s*\n', page_text)
@@ -110,13 +145,15 @@ def extract_text_chunks_from_pdf(pdf_path, max_chunk_length=500):
                     if len(current_chunk) + len(sentence) + 2 > max_chunk_length:
                         if current_chunk:
                             chunks.append(current_chunk.strip())
+                            chunk_pages.append(page_num + 1)
                         current_chunk = sentence.strip() + ' '
                     else:
                         current_chunk += sentence.strip() + ' '
             
-            # Add a paragraph break at the end of each page
+            # Add a paragraph break at the end of each page, so no chunk spans two pages
             if current_chunk:
                 chunks.append(current_chunk.strip())
+                chunk_pages.append(page_num + 1)
                 current_chunk = ''
             
             # Free up memory from page immediately
@@ -125,6 +162,15 @@ def extract_text_chunks_from_pdf(pdf_path, max_chunk_length=500):
                     
         if current_chunk:
             chunks.append(current_chunk.strip())
+            chunk_pages.append(last_page)
+        
+        if stats is not None:
+            stats['total_pages'] = total_pages
+            stats['pages_processed'] = pages_processed
+            stats['chunk_pages'] = chunk_pages
+            stats['chapters'] = [
+                (title, page) for title, page in outline_chapters(reader) if first_page <= page <= last_page
+            ]
         
         # Help garbage collector
         reader = None
@@ -135,41 +181,35 @@ def extract_text_chunks_from_pdf(pdf_path, max_chunk_length=500):
         logger.error(f"Error extracting text from PDF: {str(e)}")
         raise Exception(f"Error extracting text from PDF: {e}")
 
-def convert_text_to_audio(text, output_filename, voice, speed, temp_directory, tld='com', src='auto'):
+def convert_text_to_audio(text, output_filename, voice, speed, temp_directory, tld='com', raw_output=None):
+    """
+    Synthesize one chunk of speech.
+
+    Stage contract: `text` must already be in the target language `voice`.
+    Translation happens exactly once per chunk in translate_chunks; this
+    function never calls the translation service.
+
+    When the speed is changed and raw_output is given, the unmodified gTTS
+    audio is kept there (for deriving other speeds later).
+    """
+    from gtts import gTTS
+    
     try:
         # Use the provided temp_directory instead of os.getcwd()
-        # temp_dir = os.path.join(os.getcwd(), 'temp') # Remove this line
         os.makedirs(temp_directory, exist_ok=True) # Ensure the passed temp_directory exists
 
         temp_output = os.path.join(temp_directory, output_filename.replace(".mp3", "_temp.mp3"))
         # Rename confusing variable name
         temp_audio_chunk_path = os.path.join(temp_directory, output_filename) 
 
-        # Translate the text to the target language first
-        translator = Translator()
-        try:
-            # Apply rate limiting before translation
-            translate_rate_limiter.wait_if_needed()
-            
-            translated_text, error = translate_with_timeout(translator, text, dest=voice, src=src, timeout=30)
-            if error:
-                logger.warning(f"Translation failed, using original text: {error}")
-                translated_text = text
-            elif not translated_text:
-                logger.warning("Translation returned empty result, using original text")
-                translated_text = text
-        except Exception as e:
-            logger.warning(f"Translation error: {e}, using original text")
-            translated_text = text
-
         # Add timeout/retry logic for gTTS
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                tts = gTTS(translated_text, lang=voice, tld=tld)
+                tts = gTTS(text, lang=voice, tld=tld)
                 tts.save(temp_output)
                 break
-            except (requests.exceptions.RequestException, Exception) as e:
+            except Exception as e:
                 if attempt < max_retries - 1:
                     time.sleep(2)  # Wait before retry
                     continue
@@ -177,12 +217,16 @@ def convert_text_to_audio(text, output_filename, voice, speed, temp_directory, t
 
         if speed != 1.0:
             try:
+                from pydub import AudioSegment
+                
                 sound = AudioSegment.from_file(temp_output)
                 # Use PyDub's speedup method which doesn't require audioop
                 sound = sound.speedup(playback_speed=float(speed))
-                # Export to the correctly named variable
-                sound.export(temp_audio_chunk_path, format="mp3") 
-                if os.path.exists(temp_output):
+                # Export with the gTTS stream parameters, so chunks can still be joined frame by frame
+                export_segment(sound, temp_audio_chunk_path, 'mp3')
+                if raw_output:
+                    os.replace(temp_output, raw_output)
+                elif os.path.exists(temp_output):
                     os.remove(temp_output)
             except Exception as speed_err:
                 logger.error(f"Error adjusting audio speed: {speed_err}. Using original audio.")
@@ -199,83 +243,48 @@ def convert_text_to_audio(text, output_filename, voice, speed, temp_directory, t
         logger.error(f"Error converting text to audio for chunk {output_filename}: {e}")
         raise Exception(f"Error converting text to audio: {e}")
 
-def concatenate_audio_files(audio_files, output_path):
+def concatenate_audio_files(audio_files, output_path, encoding='mp3'):
     """
-    Concatenate multiple audio files into a single file with memory-efficient approach.
-    For large files, uses a stream-based approach to avoid loading all audio into memory.
+    Concatenate multiple audio files into a single file in the requested encoding.
+
+    'passthrough' copies the MP3 frames of the chunks without re-encoding.
+    For large files the chunks are joined the same way and then transcoded
+    by ffmpeg in one streaming pass, so the audio is never held in memory.
+    Smaller files are combined with pydub and exported with the encoding's
+    speech-tuned settings (see app.utils.audio_encoding).
     """
-    logger.info(f"Starting concatenation. Input files: {len(audio_files)} files, Output path: {output_path}")
+    from pydub import AudioSegment
+    
+    logger.info(f"Starting concatenation. Input files: {len(audio_files)} files, Output path: {output_path}, Encoding: {encoding}")
     if not audio_files:
         logger.warning("Concatenation called with no audio files.")
         raise ValueError("Cannot concatenate an empty list of audio files.")
         
     try:
+        existing_files = [f for f in audio_files if os.path.exists(f)]
+        if len(existing_files) < len(audio_files):
+            logger.error(f"{len(audio_files) - len(existing_files)} audio chunk files not found during concatenation")
+        
+        if encoding == 'passthrough':
+            duration = join_frames(existing_files, output_path)
+            logger.info(f"Joined {len(existing_files)} files ({duration:.1f}s) to {output_path} without re-encoding")
+            return output_path
+        
         # Check if the total size of audio files is large (>100MB)
-        total_size = sum(os.path.getsize(f) for f in audio_files if os.path.exists(f))
+        total_size = sum(os.path.getsize(f) for f in existing_files)
         logger.info(f"Total audio size to concatenate: {total_size/1024/1024:.2f} MB")
         
         # For large files, use a more memory-efficient approach
         if total_size > 100 * 1024 * 1024:  # >100MB
             logger.info("Using memory-efficient concatenation for large files")
             
-            # Get format and rate info from first file
-            first_file = audio_files[0]
-            info = AudioSegment.from_file(first_file)
-            
-            # Create a temporary directory for intermediate files
+            # Create a temporary directory for the joined stream
             temp_dir = tempfile.mkdtemp(prefix="audio_concat_")
             try:
-                # Process files in batches of 10 to avoid memory issues
-                batch_size = 10
-                batch_files = []
-                
-                for i in range(0, len(audio_files), batch_size):
-                    batch = audio_files[i:i+batch_size]
-                    
-                    # Create a batch output file
-                    batch_output = os.path.join(temp_dir, f"batch_{i//batch_size}.mp3")
-                    
-                    # Combine this small batch
-                    mini_combined = AudioSegment.empty()
-                    for file in batch:
-                        if os.path.exists(file):
-                            segment = AudioSegment.from_file(file)
-                            mini_combined += segment
-                            # Clear segment to free memory
-                            segment = None
-                            gc.collect()
-                    
-                    # Export batch
-                    mini_combined.export(batch_output, format="mp3")
-                    batch_files.append(batch_output)
-                    
-                    # Clear mini_combined to free memory
-                    mini_combined = None
-                    gc.collect()
-                
-                # Now combine all batch files using ffmpeg directly (most efficient)
-                # Create a file list for ffmpeg
-                list_file = os.path.join(temp_dir, "files.txt")
-                with open(list_file, 'w') as f:
-                    for batch_file in batch_files:
-                        f.write(f"file '{batch_file}'\n")
-                
-                # Use ffmpeg to concatenate without reencoding
-                import subprocess
-                cmd = [
-                    'ffmpeg', '-y', '-f', 'concat', '-safe', '0', 
-                    '-i', list_file, '-c', 'copy', output_path
-                ]
-                
-                logger.info(f"Running ffmpeg command: {' '.join(cmd)}")
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                
-                if result.returncode != 0:
-                    logger.error(f"FFmpeg error: {result.stderr}")
-                    raise Exception(f"FFmpeg concatenation failed: {result.stderr}")
-                
+                joined_path = os.path.join(temp_dir, "joined.mp3")
+                join_frames(existing_files, joined_path)
+                transcode_file(joined_path, output_path, encoding)
                 logger.info(f"Successfully concatenated {len(audio_files)} files to {output_path}")
-                
             finally:
                 # Clean up temporary files
                 try:
@@ -288,15 +297,9 @@ def concatenate_audio_files(audio_files, output_path):
             logger.info("Using standard concatenation for smaller files")
             combined = AudioSegment.empty()
             
-            for i, file in enumerate(audio_files):
+            for i, file in enumerate(existing_files):
                 try:
                     logger.debug(f"Concatenating chunk {i}: {file}")
-                    
-                    # Check if file exists just before loading
-                    if not os.path.exists(file):
-                        logger.error(f"Audio chunk file not found during concatenation: {file}")
-                        continue  # Skip missing files rather than failing
-                        
                     audio = AudioSegment.from_file(file)
                     combined += audio
                     
@@ -312,7 +315,7 @@ def concatenate_audio_files(audio_files, output_path):
                     # Continue with next file instead of failing the whole process
             
             # Export the combined audio
-            combined.export(output_path, format="mp3")
+            export_segment(combined, output_path, encoding)
             logger.info(f"Successfully concatenated {len(audio_files)} files to {output_path}")
             
             # Clear memory
@@ -325,10 +328,12 @@ def concatenate_audio_files(audio_files, output_path):
         logger.error(f"Error concatenating audio files: {str(e)}", exc_info=True)
         raise Exception(f"Failed to concatenate audio files: {str(e)}")
 
-def create_translated_pdf(text, output_path, language_code='en'):
+def create_translated_pdf(text, output_path, language_code='en', page_size='a4', font_size=16):
     """
     Create a PDF with the translated text that properly preserves layout and handles non-Latin scripts.
     Uses Pillow for text rendering to ensure proper font support.
+
+    page_size is 'a4' or 'letter'; font_size is in pixels at 72 dpi.
     """
     from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import letter, A4
@@ -340,14 +345,13 @@ def create_translated_pdf(text, output_path, language_code='en'):
     
     try:
         # Define page dimensions (in pixels for PIL, 72 dpi)
-        page_width, page_height = int(A4[0]), int(A4[1])
+        page_width, page_height = (int(letter[0]), int(letter[1])) if page_size == 'letter' else (int(A4[0]), int(A4[1]))
         
         # Path to fonts directory
         font_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'fonts')
         
         # Default to Noto Sans for most languages
         font_file = os.path.join(font_path, 'NotoSans-Regular.ttf')
-        font_size = 16  # Larger for PIL
         
         # Use Noto CJK for Asian languages
         if language_code in ['ja', 'zh-CN', 'ko']:
@@ -408,7 +412,7 @@ def create_translated_pdf(text, output_path, language_code='en'):
                 
             # Wrap text to fit within margins
             paragraph = paragraph.replace('\n', ' ').strip()
-            wrapped_lines = textwrap.wrap(paragraph, width=int(text_width/10))  # Approximate character count
+            wrapped_lines = textwrap.wrap(paragraph, width=int(text_width / (font_size * 0.625)))  # Approximate character count
             
             # Check if we need a new page
             if y_position + (len(wrapped_lines) * (font_size + 4)) > bottom_margin:
@@ -532,33 +536,162 @@ def translate_with_timeout(translator, text, dest, timeout=10, src='auto'):
         
     return result, None
 
+def detect_source_language(text_chunks):
+    """
+    Detect the language of the extracted text from its first substantial chunk.
+
+    Returns:
+        (source_language, detected); source_language is 'auto' if detection failed
+    """
+    from googletrans import Translator
+
+    source_language = 'auto'
+    detected = False
+    
+    # Get the first substantial chunk to try to detect language
+    detection_text = ""
+    for chunk in text_chunks:
+        if len(chunk.strip()) > 50:
+            detection_text = chunk
+            break
+    
+    # Try to detect the source language
+    if detection_text:
+        try:
+            detector = Translator()
+            detection = detector.detect(detection_text)
+            if detection and hasattr(detection, 'lang'):
+                source_language = detection.lang
+                detected = True
+                logger.info(f"Detected source language: {source_language}")
+                
+                # Log the first few characters of the detected text
+                sample_text = detection_text[:100].replace('\n', ' ')
+                logger.info(f"Sample text (detected as {source_language}): '{sample_text}...'")
+        except Exception as detect_err:
+            logger.warning(f"Language detection failed: {detect_err}")
+            logger.warning(f"Sample of problematic text: '{detection_text[:100]}...'")
+    
+    return source_language, detected
+
+def make_chunk_provenance(index, source_language, target_language, translated, error=None):
+    """
+    Small record describing where a chunk's text came from.
+
+    `fallback` is True when translation was needed but failed, so the chunk
+    still holds source-language text.
+    """
+    return {
+        'chunk': index,
+        'source_language': source_language,
+        'target_language': target_language,
+        'translated': translated,
+        'fallback': error is not None,
+        'error': str(error) if error is not None else None
+    }
+
+def translate_chunks(text_chunks, source_language, target_language, translator=None, progress_callback=None):
+    """
+    Translate every chunk exactly once.
+
+    Failed chunks fall back to their original text. Returns the translated
+    chunks and a provenance record per chunk (see make_chunk_provenance).
+    """
+    if translator is None:
+        from googletrans import Translator
+        translator = Translator()
+
+    translated_chunks = []
+    provenance = []
+    
+    for i, chunk in enumerate(text_chunks):
+        try:
+            chunk_translated, error = translate_with_timeout(
+                translator, 
+                chunk, 
+                dest=target_language, 
+                src=source_language,
+                timeout=60
+            )
+        except Exception as e:
+            chunk_translated, error = None, e
+        
+        if error:
+            logger.warning(f"Translation error for chunk {i}: {error}. Using original text.")
+            logger.warning(f"Failed chunk sample: '{chunk[:50]}...'")
+            translated_chunks.append(chunk)
+            provenance.append(make_chunk_provenance(i, source_language, target_language, False, error))
+        else:
+            logger.debug(f"Successfully translated chunk {i} ({len(chunk)} chars)")
+            if i == 0:  # Log first chunk for debugging
+                logger.info(f"First chunk translation: '{chunk[:50]}' -> '{chunk_translated[:50]}'")
+            translated_chunks.append(chunk_translated)
+            provenance.append(make_chunk_provenance(i, source_language, target_language, True))
+        
+        if progress_callback:
+            progress_callback(i)
+        
+        # Help with garbage collection
+        gc.collect()
+    
+    return translated_chunks, provenance
+
+def split_for_audio(translated_chunks, chunk_provenance, audio_chunk_size=3000):
+    """
+    Split translated chunks into TTS-sized pieces.
+
+    Returns a list of (text, provenance) pairs; pieces of the same chunk share
+    that chunk's provenance record.
+    """
+    audio_text_chunks = []
+    for chunk, provenance in zip(translated_chunks, chunk_provenance):
+        # Further split large chunks for audio processing
+        if len(chunk) > audio_chunk_size:
+            # Split at sentence boundaries where possible
+            sentences = re.split(r'(?<=[.!?])\s+', chunk)
+            current_audio_chunk = ""
+            
+            for sentence in sentences:
+                if len(current_audio_chunk) + len(sentence) > audio_chunk_size:
+                    if current_audio_chunk:
+                        audio_text_chunks.append((current_audio_chunk, provenance))
+                    current_audio_chunk = sentence
+                else:
+                    if current_audio_chunk:
+                        current_audio_chunk += " " + sentence
+                    else:
+                        current_audio_chunk = sentence
+                        
+            if current_audio_chunk:
+                audio_text_chunks.append((current_audio_chunk, provenance))
+        else:
+            audio_text_chunks.append((chunk, provenance))
+    return audio_text_chunks
+
 def save_file_to_redis(file_path, task_id, file_type):
-    """Save file content to Redis with proper error handling"""
+    """Save file content to Redis as a chunked blob with proper error handling"""
     try:
         from app.utils.redis import get_redis
+        from app.utils.blob_store import save_blob, blob_key
         import os
         
         if not os.path.exists(file_path):
             logger.error(f"[{task_id}] File not found at path {file_path}")
             return False
             
-        # Read file content
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-            
         # Get Redis connection
         redis_client = get_redis()
         if not redis_client:
             logger.error(f"[{task_id}] Could not get Redis connection")
             return False
             
-        # Set the content in Redis with a key that includes task_id and file_type
-        content_key = f"file_content:{task_id}:{file_type}"
+        # Segments and manifest are keyed by task_id and file_type
+        content_key = blob_key(task_id, file_type)
         
-        # Store file content with 7-day expiration (604800 seconds)
+        # Stream the file into fixed-size segments instead of one giant SET
         try:
-            redis_client.set(content_key, file_content, ex=604800)
-            logger.info(f"[{task_id}] Saved {len(file_content)} bytes to Redis key {content_key}")
+            manifest = save_blob(redis_client, content_key, file_path)
+            logger.info(f"[{task_id}] Saved {manifest['size']} bytes to Redis blob {content_key} ({manifest['chunks']} segments)")
             return True
         except Exception as redis_err:
             logger.error(f"[{task_id}] Error storing content in Redis: {str(redis_err)}")
@@ -568,14 +701,206 @@ def save_file_to_redis(file_path, task_id, file_type):
         logger.error(f"[{task_id}] Error in save_file_to_redis: {str(e)}")
         return False
 
+# Flask app shared by all tasks run in this worker process
+_worker_app = None
+_worker_app_lock = threading.Lock()
+
+def get_worker_app():
+    """
+    Return the Flask app for this worker process, creating it on first use.
+
+    Building the app (config, DB engine, extensions) once per process instead
+    of once per task keeps task start-up cheap. The cleanup thread is not
+    started in workers.
+    """
+    global _worker_app
+    if _worker_app is None:
+        with _worker_app_lock:
+            if _worker_app is None:
+                from app import create_app
+                _worker_app = create_app(start_background_tasks=False)
+    return _worker_app
+
+def publish_output(file_path, task_id, file_type, remote_keys, user_id):
+    """
+    Make a finished output available for download and register it.
+
+    Outputs go to remote storage when it is configured, so neither Redis nor
+    the web tier carry the bytes; otherwise they fall back to Redis blobs.
+    The remote object key is recorded in remote_keys under file_type, and
+    the output's location is written to the artifact registry.
+    """
+    from app.models.artifact import Artifact
+    from app.utils.artifacts import register_artifact
+    from app.utils.blob_store import blob_key
+
+    remote_path = f"{task_id}/{os.path.basename(file_path)}"
+    remote_key = copy_to_remote_storage(file_path, remote_path)
+    if remote_key:
+        remote_keys[file_type] = remote_key
+        register_artifact(task_id, user_id, file_type, Artifact.STORAGE_S3, remote_key, file_path)
+        return True
+    if save_file_to_redis(file_path, task_id, file_type):
+        register_artifact(task_id, user_id, file_type, Artifact.STORAGE_REDIS, blob_key(task_id, file_type), file_path)
+        return True
+    return False
+
+def concurrent_pdf_rendering():
+    """"both" jobs render their PDF alongside the audio unless CONCURRENT_PDF_RENDERING is turned off."""
+    if has_app_context() and current_app.config.get('CONCURRENT_PDF_RENDERING') is not None:
+        return bool(current_app.config['CONCURRENT_PDF_RENDERING'])
+    return os.environ.get('CONCURRENT_PDF_RENDERING', 'true').lower() in ['true', 't', '1']
+
+def start_pdf_rendering(text, output_path, language_code):
+    """
+    Render a translated PDF in a separate process.
+
+    Layout only needs the translated text, so it can run while the audio is
+    synthesized instead of after it. The process is spawned rather than
+    forked: the worker holds database and Redis connections and threads
+    that a child must not inherit.
+
+    Returns:
+        A Future that resolves once the PDF is written
+    """
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        return executor.submit(create_translated_pdf, text, output_path, language_code)
+    finally:
+        # The submitted rendering still runs; the process exits when it is done
+        executor.shutdown(wait=False)
+
+def publish_rendered_pdf(future, pdf_output_path, task_id, remote_keys, user_id, published):
+    """
+    Wait for a PDF from start_pdf_rendering, publish it and announce it with
+    a job.output_ready callback. Like in-process rendering, a failed PDF is
+    logged and does not fail the job.
+    """
+    try:
+        future.result()
+        if publish_output(pdf_output_path, task_id, 'pdf', remote_keys, user_id):
+            published.append('pdf')
+            notify_output_ready(task_id, 'pdf')
+    except Exception as e:
+        logger.error(f"Error creating PDF: {str(e)}")
+
+def output_basename(filename, page_start=None, page_end=None, preview=False, language=None):
+    """
+    Name outputs so partial conversions never overwrite a full one of the same PDF,
+    and the branches of a multi-language job never overwrite each other.
+    """
+    base = os.path.splitext(filename)[0]
+    if language:
+        base = f"{base}_{language}"
+    if preview:
+        return f"{base}_preview"
+    if page_start or page_end:
+        return f"{base}_p{page_start or 1}-{page_end or 'end'}"
+    return base
+
+def document_key(job_id):
+    """Blob key of the text extracted once for a multi-language job."""
+    return f"document_text:{job_id}"
+
+def _document_refs_key(key):
+    return f"{key}:refs"
+
+def store_document(key, document, readers):
+    """
+    Store an extracted document for the tasks that will read it.
+
+    The document (chunks, detected language and page counts) is kept as a
+    chunked blob with a reference count of readers; the last reader to call
+    release_document deletes it, and the blob TTL covers readers that never
+    run.
+    """
+    from app.utils.blob_store import save_blob, DEFAULT_BLOB_TTL
+
+    ttl = int(current_app.config.get('REDIS_BLOB_TTL', DEFAULT_BLOB_TTL))
+    redis_client = get_redis()
+    with tempfile.NamedTemporaryFile('w', delete=False, prefix='docecho_', suffix='.json', encoding='utf-8') as f:
+        json.dump(document, f)
+        document_path = f.name
+    try:
+        save_blob(redis_client, key, document_path, ttl=ttl)
+    finally:
+        os.unlink(document_path)
+    redis_client.set(_document_refs_key(key), readers, ex=ttl)
+
+def load_document(key):
+    """Read a document stored by store_document."""
+    from app.utils.blob_store import blob_to_file
+
+    with tempfile.NamedTemporaryFile(delete=False, prefix='docecho_', suffix='.json') as f:
+        document_path = f.name
+    try:
+        if blob_to_file(get_redis(), key, document_path) is None:
+            raise Exception(f"Extracted text {key} not found or expired")
+        with open(document_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(document_path)
+
+def release_document(key):
+    """Drop one reader's reference to a stored document, deleting it after the last one."""
+    if not key:
+        return
+    try:
+        from app.utils.blob_store import delete_blob
+
+        redis_client = get_redis()
+        if redis_client.incr(_document_refs_key(key), -1) <= 0:
+            delete_blob(redis_client, key)
+            redis_client.delete(_document_refs_key(key))
+    except Exception as e:
+        logger.warning(f"Failed to release extracted text {key}: {str(e)}")
+
+def discard_source_blob(source_key):
+    """Delete an uploaded PDF blob once the job that consumed it has finished."""
+    if not source_key:
+        return
+    try:
+        from app.utils.blob_store import delete_blob
+        delete_blob(get_redis(), source_key)
+    except Exception as e:
+        logger.warning(f"Failed to delete uploaded file {source_key}: {str(e)}")
+
 @shared_task
-def process_pdf(file_content, filename, voice, output_format, user_id, audio_speed=1.0):
-    app = create_app()
+def process_pdf(file_content, filename, voice, output_format, user_id, audio_speed=1.0, source_key=None,
+                page_start=None, page_end=None, preview=False, document_key=None, audio_encoding=None):
+    """
+    Convert a PDF to audio and/or a translated PDF.
+
+    The PDF arrives as file_content or source_key. A branch of a
+    multi-language job gets document_key instead: the text was already
+    extracted and its language detected by prepare_document.
+    audio_encoding picks the output preset (see app.utils.audio_encoding);
+    the chunks themselves are always MP3.
+    """
+    from pydub import AudioSegment
+    
+    app = get_worker_app()
     with app.app_context():
         temp_file_path = None
         audio_files = []
         output_path = None
         pdf_output_path = None
+        remote_keys = {}
+        published = []
+        page_stats = {}
+        document = None
+        streaming = False
+        stream_url = None
+        audio_encoding = audio_encoding or default_encoding()
+        # (source page, seconds) of each audio file, for the page index
+        chunk_timings = []
+        # Normal-speed chunks and their timings, kept for deriving new outputs later
+        keep_intermediates = intermediate_ttl() > 0
+        raw_files = []
+        raw_timings = []
+        raw_audio_path = None
+        # A "both" job's PDF, while it renders in its own process
+        pdf_future = None
         
         try:
             # Initialize progress
@@ -585,10 +910,21 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                 progress=0
             )
             
-            # Save incoming PDF to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(file_content)
-                temp_file_path = temp_file.name
+            if document_key:
+                # Branch of a multi-language job: reuse the shared extraction
+                document = load_document(document_key)
+            else:
+                # Save incoming PDF to temporary file
+                with tempfile.NamedTemporaryFile(delete=False, prefix='docecho_', suffix='.pdf') as temp_file:
+                    if file_content is not None:
+                        temp_file.write(file_content)
+                    temp_file_path = temp_file.name
+            
+            # Resumable uploads arrive as a chunked Redis blob instead of bytes
+            if source_key and not document_key:
+                from app.utils.blob_store import blob_to_file
+                if blob_to_file(get_redis(), source_key, temp_file_path) is None:
+                    raise Exception(f"Uploaded file {source_key} not found or expired")
                 
             # Create temporary directory for processing chunks
             temp_dir = tempfile.mkdtemp(prefix="docecho_")
@@ -601,8 +937,28 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                     progress=10
                 )
                 
-                # Use improved chunking function that preserves layout and handles larger files
-                text_chunks = extract_text_chunks_from_pdf(temp_file_path, max_chunk_length=1000)
+                if document is not None:
+                    text_chunks = document['chunks']
+                    page_stats = {
+                        'total_pages': document['total_pages'],
+                        'pages_processed': document['pages_processed'],
+                        'chunk_pages': document.get('chunk_pages'),
+                        'chapters': document.get('chapters')
+                    }
+                else:
+                    # Use improved chunking function that preserves layout and handles larger files
+                    max_chars = int(app.config.get('PREVIEW_MAX_CHARS', DEFAULT_PREVIEW_MAX_CHARS)) if preview else None
+                    page_stats = {}
+                    text_chunks = extract_text_chunks_from_pdf(
+                        temp_file_path,
+                        max_chunk_length=1000,
+                        page_start=page_start,
+                        page_end=page_end,
+                        max_chars=max_chars,
+                        stats=page_stats
+                    )
+                logger.info(f"Extracted {page_stats['pages_processed']} of {page_stats['total_pages']} pages"
+                            f"{' (preview)' if preview else ''}")
                 
                 # Combine chunks for translation but maintain structure
                 full_text = '\n\n'.join(text_chunks)
@@ -616,38 +972,18 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                 
                 # Only translate if the language is not English
                 language_code = voice['language']
+                output_name = output_basename(filename, page_start, page_end, preview,
+                                              language=language_code if document_key else None)
                 translated_chunks = []
                 
                 # Get TLD for gTTS
                 tld = language_map.get(language_code, {}).get('tld', 'com')
                 
-                # Detect source language for better translation
-                source_language = 'auto'
-                detected = False
-                
-                # Get the first substantial chunk to try to detect language
-                detection_text = ""
-                for chunk in text_chunks:
-                    if len(chunk.strip()) > 50:
-                        detection_text = chunk
-                        break
-                
-                # Try to detect the source language
-                if detection_text:
-                    try:
-                        detector = Translator()
-                        detection = detector.detect(detection_text)
-                        if detection and hasattr(detection, 'lang'):
-                            source_language = detection.lang
-                            detected = True
-                            logger.info(f"Detected source language: {source_language}")
-                            
-                            # Log the first few characters of the detected text
-                            sample_text = detection_text[:100].replace('\n', ' ')
-                            logger.info(f"Sample text (detected as {source_language}): '{sample_text}...'")
-                    except Exception as detect_err:
-                        logger.warning(f"Language detection failed: {detect_err}")
-                        logger.warning(f"Sample of problematic text: '{detection_text[:100]}...'")
+                # Detect source language for better translation (multi-language jobs detect it once, up front)
+                if document is not None:
+                    source_language, detected = document['source_language'], document['detected']
+                else:
+                    source_language, detected = detect_source_language(text_chunks)
                 
                 # Determine if translation is needed
                 needs_translation = True
@@ -662,46 +998,20 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                 
                 # Only perform translation if needed
                 if needs_translation:
-                    # For larger texts, break into smaller parts for translation
-                    # This helps with API limits and improves reliability
-                    max_translate_length = 10000  # Characters per translation request
-                    full_translated_text = ""
+                    def report_translation_progress(i):
+                        # Update progress based on translation progress
+                        update_progress(
+                            task_id=process_pdf.request.id,
+                            status='translating_text',
+                            progress=30 + (i / len(text_chunks)) * 20
+                        )
                     
-                    for i, chunk in enumerate(text_chunks):
-                        try:
-                            translator = Translator()
-                            chunk_translated, error = translate_with_timeout(
-                                translator, 
-                                chunk, 
-                                dest=language_code, 
-                                src=source_language,
-                                timeout=60
-                            )
-                            
-                            if error:
-                                logger.warning(f"Translation error for chunk {i}: {error}. Using original text.")
-                                logger.warning(f"Failed chunk sample: '{chunk[:50]}...'")
-                                translated_chunks.append(chunk)
-                            else:
-                                logger.debug(f"Successfully translated chunk {i} ({len(chunk)} chars)")
-                                if i == 0:  # Log first chunk for debugging
-                                    logger.info(f"First chunk translation: '{chunk[:50]}' -> '{chunk_translated[:50]}'")
-                                translated_chunks.append(chunk_translated)
-                                
-                            # Update progress based on translation progress
-                            progress = 30 + (i / len(text_chunks)) * 20
-                            update_progress(
-                                task_id=process_pdf.request.id,
-                                status='translating_text',
-                                progress=progress
-                            )
-                            
-                            # Help with garbage collection
-                            gc.collect()
-                            
-                        except Exception as e:
-                            logger.error(f"Error during translation of chunk {i}: {str(e)}")
-                            translated_chunks.append(chunk)  # Fallback to original text for this chunk
+                    translated_chunks, chunk_provenance = translate_chunks(
+                        text_chunks,
+                        source_language,
+                        language_code,
+                        progress_callback=report_translation_progress
+                    )
                     
                     # Join translated chunks for full text
                     full_translated_text = '\n\n'.join(translated_chunks)
@@ -710,10 +1020,28 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                     logger.info("Skipping translation, using original text")
                     translated_chunks = text_chunks
                     full_translated_text = full_text
+                    chunk_provenance = [
+                        make_chunk_provenance(i, source_language, language_code, translated=False)
+                        for i in range(len(text_chunks))
+                    ]
+                
+                # Setup output directory
+                output_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(user_id))
+                os.makedirs(output_dir, exist_ok=True)
+                
+                # The PDF only needs the translated text: render it while the audio is synthesized
+                # and publish it as soon as it is done, rather than after all the audio
+                if output_format == 'both' and concurrent_pdf_rendering():
+                    rendered_pdf_path = os.path.join(output_dir, f'{output_name}.pdf')
+                    try:
+                        pdf_future = start_pdf_rendering(full_translated_text, rendered_pdf_path, language_code)
+                        pdf_output_path = rendered_pdf_path
+                    except Exception as e:
+                        logger.warning(f"Could not render PDF concurrently, rendering it after the audio: {str(e)}")
                 
                 update_progress(
                     task_id=process_pdf.request.id,
-                    status='generating_audio',
+                    status='writing_text' if output_format in TEXT_FORMATS else 'generating_audio',
                     progress=50
                 )
                 
@@ -725,33 +1053,21 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                     logger.info(f"Generating audio for output format: {output_format}")
                     audio_chunk_size = 3000  # Characters per audio chunk
                     
-                    # Split translated text into audio-sized chunks
-                    audio_text_chunks = []
-                    for chunk in translated_chunks:
-                        # Further split large chunks for audio processing
-                        if len(chunk) > audio_chunk_size:
-                            # Split at sentence boundaries where possible
-                            sentences = re.split(r'(?<=[.!?])\s+', chunk)
-                            current_audio_chunk = ""
-                            
-                            for sentence in sentences:
-                                if len(current_audio_chunk) + len(sentence) > audio_chunk_size:
-                                    if current_audio_chunk:
-                                        audio_text_chunks.append(current_audio_chunk)
-                                    current_audio_chunk = sentence
-                                else:
-                                    if current_audio_chunk:
-                                        current_audio_chunk += " " + sentence
-                                    else:
-                                        current_audio_chunk = sentence
-                                        
-                            if current_audio_chunk:
-                                audio_text_chunks.append(current_audio_chunk)
-                        else:
-                            audio_text_chunks.append(chunk)
+                    # Split translated text into audio-sized chunks, keeping each chunk's provenance
+                    audio_text_chunks = split_for_audio(translated_chunks, chunk_provenance, audio_chunk_size)
+                    chunk_pages = page_stats.get('chunk_pages')
+                    
+                    # Publish each chunk as an HLS segment as soon as it exists, so playback
+                    # can start long before the whole document is synthesized
+                    if hls.hls_enabled():
+                        try:
+                            hls.start_stream(process_pdf.request.id, user_id)
+                            streaming = True
+                        except Exception as e:
+                            logger.warning(f"HLS streaming unavailable: {str(e)}")
                     
                     # Generate audio for each chunk with retry mechanism
-                    for i, chunk in enumerate(audio_text_chunks):
+                    for i, (chunk, provenance) in enumerate(audio_text_chunks):
                         # Skip empty chunks
                         if not chunk.strip():
                             continue
@@ -770,12 +1086,16 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                             tts_language = 'en'
                             logger.info("Using English voice for TTS output")
                         
+                        if provenance['fallback']:
+                            logger.warning(f"Audio chunk {i} (source chunk {provenance['chunk']}) is untranslated {provenance['source_language']} text")
+                        
                         while retry_count < max_retries:
                             try:
                                 # Generate temporary filename
                                 temp_audio_file = f"chunk_{i}.mp3"
                                 
                                 # Convert text to audio with improved memory handling
+                                raw_path = os.path.join(temp_dir, f"raw_{i}.mp3")
                                 chunk_file_path = convert_text_to_audio(
                                     chunk, 
                                     temp_audio_file,
@@ -783,11 +1103,30 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                                     float(audio_speed),
                                     temp_dir,
                                     tld,
-                                    src=source_language
+                                    raw_output=raw_path if keep_intermediates else None
                                 )
                                 
                                 if os.path.exists(chunk_file_path):
+                                    duration = mp3_duration(chunk_file_path)
+                                    page = chunk_pages[provenance['chunk']] if chunk_pages else None
+                                    if keep_intermediates:
+                                        # At normal speed (or if the speed change failed) the chunk is the raw audio
+                                        if not os.path.exists(raw_path):
+                                            raw_path = chunk_file_path
+                                        raw_timings.append((page, duration if raw_path == chunk_file_path else mp3_duration(raw_path)))
+                                        raw_files.append(raw_path)
                                     audio_files.append(chunk_file_path)
+                                    chunk_timings.append((page, duration))
+                                    if streaming:
+                                        try:
+                                            hls.add_segment(process_pdf.request.id, len(audio_files) - 1, chunk_file_path,
+                                                            duration=duration)
+                                            stream_url = f"/stream/{process_pdf.request.id}/playlist.m3u8"
+                                        except Exception as e:
+                                            # Segments must stay contiguous, so stop publishing after a failure
+                                            logger.warning(f"Failed to publish HLS segment {len(audio_files) - 1}: {str(e)}")
+                                            hls.end_stream(process_pdf.request.id)
+                                            streaming = False
                                     break  # Success, exit retry loop
                                 else:
                                     raise Exception(f"Audio file was not created")
@@ -801,12 +1140,19 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                                     logger.warning(f"Failed to generate audio for chunk {i} after {max_retries} attempts")
                                     # Continue with next chunk instead of failing entire job
                         
+                        if pdf_future is not None and pdf_future.done():
+                            publish_rendered_pdf(pdf_future, pdf_output_path, process_pdf.request.id, remote_keys,
+                                                 user_id, published)
+                            pdf_future = None
+                        
                         # Update progress
                         progress = 50 + (i / len(audio_text_chunks)) * 30
                         update_progress(
                             task_id=process_pdf.request.id,
                             status='generating_audio',
-                            progress=progress
+                            progress=progress,
+                            stream_url=stream_url,
+                            ready_outputs=published
                         )
                         
                         # Help garbage collection
@@ -816,22 +1162,24 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                     if not audio_files and (output_format == 'audio' or output_format == 'both'):
                         raise Exception("No audio chunks were successfully created")
                     
+                    if streaming:
+                        # Every segment is published; players can now see the whole playlist
+                        hls.end_stream(process_pdf.request.id)
+                    
                     update_progress(
                         task_id=process_pdf.request.id,
                         status='combining_audio',
-                        progress=80
+                        progress=80,
+                        stream_url=stream_url,
+                        ready_outputs=published
                     )
                     
-                    # Setup output directory
-                    output_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(user_id))
-                    os.makedirs(output_dir, exist_ok=True)
-                    
                     # Combine audio files
-                    output_path = os.path.join(output_dir, f'{os.path.splitext(filename)[0]}.mp3')
+                    output_path = os.path.join(output_dir, f'{output_name}.{audio_extension(audio_encoding)}')
                     
                     try:
                         # Use improved memory-efficient audio combining
-                        concatenate_audio_files(audio_files, output_path)
+                        concatenate_audio_files(audio_files, output_path, audio_encoding)
                     except Exception as e:
                         logger.error(f"Error combining audio files: {str(e)}")
                         
@@ -846,7 +1194,7 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                                     segment = None
                                     gc.collect()
                             
-                            combined.export(output_path, format='mp3')
+                            export_segment(combined, output_path, audio_encoding)
                             combined = None  # Clear memory
                             gc.collect()
                         except Exception as fallback_error:
@@ -857,6 +1205,15 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                                 raise Exception(f"Failed to create audio: {str(fallback_error)}")
                             # If PDF only, continue without audio
                     
+                    # Join the normal-speed chunks before they are deleted, so derived outputs can reuse them
+                    if raw_files:
+                        try:
+                            raw_audio_path = os.path.join(temp_dir, 'raw_audio.mp3')
+                            join_frames(raw_files, raw_audio_path)
+                        except Exception as e:
+                            logger.warning(f"Could not keep raw audio for later derivations: {str(e)}")
+                            raw_audio_path = None
+                    
                     # Clean up temporary audio files
                     for audio_file in audio_files:
                         try:
@@ -865,42 +1222,125 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                         except Exception as e:
                             logger.warning(f"Failed to delete temporary audio file {audio_file}: {str(e)}")
                     
-                    # Save the output files to Redis for download
+                    # Chapter markers and a page index for navigating the audio; nice to have,
+                    # so a failure here never fails the job
+                    index_files = {}
+                    if chunk_pages and os.path.exists(output_path):
+                        try:
+                            index_files = write_page_index(output_path, chunk_timings, audio_encoding, output_dir,
+                                                           output_name, title=os.path.splitext(filename)[0])
+                        except Exception as e:
+                            logger.warning(f"Could not index pages of {output_path}: {str(e)}")
+                    
+                    # Publish the output files for download
                     if output_format == 'audio' or output_format == 'both':
-                        save_file_to_redis(output_path, process_pdf.request.id, 'audio')
+                        if publish_output(output_path, process_pdf.request.id, 'audio', remote_keys, user_id):
+                            published.append('audio')
+                            # The segments are now a second copy of the audio; MP3 output replaces them
+                            # in the playlist, other encodings are fetched by the player directly
+                            if streaming:
+                                final_url = None
+                                if output_path.endswith('.mp3'):
+                                    final_url = f"/download/{process_pdf.request.id}/audio"
+                                hls.retire_stream(process_pdf.request.id, final_url=final_url)
+                        for file_type, index_path in index_files.items():
+                            if publish_output(index_path, process_pdf.request.id, file_type, remote_keys, user_id):
+                                published.append(file_type)
                 else:
-                    # Skip audio generation for PDF-only output
-                    logger.info("Skipping audio generation for PDF-only output")
+                    # Skip audio generation for PDF-only and text output
+                    logger.info(f"Skipping audio generation for {output_format} output")
                     update_progress(
                         task_id=process_pdf.request.id,
-                        status='generating_pdf',
+                        status='writing_text' if output_format in TEXT_FORMATS else 'generating_pdf',
                         progress=80
                     )
-                    # Define output directory for PDF file
-                    output_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(user_id))
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                # Handle PDF output if requested
-                if output_format == 'pdf' or output_format == 'both':
-                    pdf_output_path = os.path.join(output_dir, f'{os.path.splitext(filename)[0]}.pdf')
+                
+                # A PDF rendered alongside the audio may still be finishing
+                if pdf_future is not None:
+                    publish_rendered_pdf(pdf_future, pdf_output_path, process_pdf.request.id, remote_keys,
+                                         user_id, published)
+                    pdf_future = None
+                # Handle PDF output if requested (unless it was rendered concurrently)
+                elif output_format == 'pdf' or (output_format == 'both' and pdf_output_path is None):
+                    pdf_output_path = os.path.join(output_dir, f'{output_name}.pdf')
                     try:
                         # Use translated text for PDF creation with improved layout
                         create_translated_pdf(full_translated_text, pdf_output_path, language_code)
-                        save_file_to_redis(pdf_output_path, process_pdf.request.id, 'pdf')
+                        if publish_output(pdf_output_path, process_pdf.request.id, 'pdf', remote_keys, user_id):
+                            published.append('pdf')
                     except Exception as e:
                         logger.error(f"Error creating PDF: {str(e)}")
                         # Continue execution even if PDF fails
                 
+                # Text outputs are streamed straight from the translated chunks: no rendering, no synthesis
+                if output_format in TEXT_FORMATS:
+                    text_output_path = os.path.join(output_dir, f"{output_name}.{TEXT_FORMATS[output_format]['extension']}")
+                    write_text_output(
+                        output_format,
+                        text_output_path,
+                        zip(page_stats.get('chunk_pages') or [None] * len(translated_chunks), translated_chunks),
+                        title=os.path.splitext(filename)[0],
+                        language=language_code,
+                        chapters=page_stats.get('chapters')
+                    )
+                    if not publish_output(text_output_path, process_pdf.request.id, output_format, remote_keys, user_id):
+                        raise Exception(f"Failed to publish {output_format} output")
+                    published.append(output_format)
+                
+                # Keep the translated text and raw audio for a while, so other speeds, encodings
+                # and PDF layouts can be derived without translating or synthesizing again
+                if keep_intermediates:
+                    try:
+                        store_intermediates(
+                            process_pdf.request.id,
+                            record={
+                                'user_id': user_id,
+                                'filename': filename,
+                                'output_name': output_name,
+                                'language': language_code,
+                                'output_format': output_format,
+                                'audio_speed': float(audio_speed),
+                                'audio_encoding': audio_encoding,
+                                'total_pages': page_stats['total_pages'],
+                                'pages_processed': page_stats['pages_processed']
+                            },
+                            text={'text': full_translated_text, 'timings': raw_timings if raw_audio_path else []},
+                            raw_audio_path=raw_audio_path
+                        )
+                    except Exception as e:
+                        logger.warning(f"Could not keep intermediates: {str(e)}")
+                
                 update_progress(
                     task_id=process_pdf.request.id,
                     status='completed',
                     progress=100,
-                    audio_file=output_path
+                    audio_file=output_path,
+                    remote_keys=remote_keys,
+                    pages_processed=page_stats['pages_processed'],
+                    total_pages=page_stats['total_pages'],
+                    preview=preview,
+                    stream_url=stream_url,
+                    audio_encoding=audio_encoding
+                )
+                
+                # The job succeeded, so the credits reserved at submit time are spent,
+                # less whatever a page range or preview did not use
+                from app.utils.jobs import charged_credits
+                charged = charged_credits(output_format, page_stats['total_pages'], page_stats['pages_processed'])
+                commit_reservation(process_pdf.request.id, charged=charged)
+                notify_task_finished(
+                    process_pdf.request.id,
+                    'completed',
+                    file_types=published,
+                    pages_processed=page_stats['pages_processed'],
+                    credits_charged=charged
                 )
                 
                 # Clean up temporary files
                 if temp_file_path and os.path.exists(temp_file_path):
                     os.unlink(temp_file_path)
+                discard_source_blob(source_key)
+                release_document(document_key)
                 
                 # Clean up temp directory
                 try:
@@ -911,7 +1351,11 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                 return {
                     'status': 'completed',
                     'output_path': output_path,
-                    'audio_file': output_path
+                    'audio_file': output_path,
+                    'pages_processed': page_stats['pages_processed'],
+                    'credits_charged': charged,
+                    'translated_chunks': sum(1 for record in chunk_provenance if record['translated']),
+                    'untranslated_chunks': sum(1 for record in chunk_provenance if record['fallback'])
                 }
                 
             except Exception as e:
@@ -928,13 +1372,40 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
             update_progress(
                 task_id=process_pdf.request.id,
                 status='error',
-                error=str(e)
+                error=str(e),
+                ready_outputs=published
             )
             
+            # Refund the credits reserved for this job. A "both" job whose PDF was already
+            # published and announced keeps it, and pays for the PDF alone
+            charged = None
+            if 'pdf' in published and page_stats.get('total_pages'):
+                from app.utils.jobs import charged_credits
+                charged = charged_credits('pdf', page_stats['total_pages'], page_stats['pages_processed'])
+                commit_reservation(process_pdf.request.id, charged=charged)
+            else:
+                release_reservation(process_pdf.request.id)
+            if streaming:
+                hls.retire_stream(process_pdf.request.id)
+            notify_task_finished(process_pdf.request.id, 'error', error=str(e), file_types=published,
+                                 credits_charged=charged or 0)
+            
             # Clean up any temporary files
             try:
+                # A PDF still rendering in its own process must not keep writing after the job
+                # has failed; wait for it, then drop the unpublished file
+                if pdf_future is not None:
+                    try:
+                        pdf_future.result()
+                    except Exception as render_err:
+                        logger.warning(f"Concurrent PDF rendering failed: {str(render_err)}")
+                    if pdf_output_path and os.path.exists(pdf_output_path):
+                        os.unlink(pdf_output_path)
+                
                 if temp_file_path and os.path.exists(temp_file_path):
                     os.unlink(temp_file_path)
+                discard_source_blob(source_key)
+                release_document(document_key)
                 
                 # Clean up any orphaned audio chunks
                 for audio_file in audio_files:
@@ -948,3 +1419,209 @@ def process_pdf(file_content, filename, voice, output_format, user_id, audio_spe
                 logger.error(f"Error during cleanup: {str(cleanup_err)}")
                 
             raise
+
+@shared_task
+def prepare_document(source_key, filename, user_id, branches, audio_speed=1.0, page_start=None, page_end=None,
+                     preview=False, queue=None, audio_encoding=None):
+    """
+    First stage of a multi-language job: extract and detect once, then fan out.
+
+    Runs under the job id. The extracted chunks and detected language are
+    stored for the branches (see store_document), and one process_pdf per
+    branch (a dict with task_id, voice and output_format) is started as a
+    Celery group, so the per-language translation and synthesis run
+    concurrently and report progress and artifacts under their own task ids.
+    """
+    from celery import group
+
+    app = get_worker_app()
+    with app.app_context():
+        job_id = prepare_document.request.id
+        temp_file_path = None
+        stored_key = None
+        
+        try:
+            update_progress(task_id=job_id, status='extracting_text', progress=10)
+            
+            with tempfile.NamedTemporaryFile(delete=False, prefix='docecho_', suffix='.pdf') as temp_file:
+                temp_file_path = temp_file.name
+            from app.utils.blob_store import blob_to_file
+            if blob_to_file(get_redis(), source_key, temp_file_path) is None:
+                raise Exception(f"Uploaded file {source_key} not found or expired")
+            
+            max_chars = int(app.config.get('PREVIEW_MAX_CHARS', DEFAULT_PREVIEW_MAX_CHARS)) if preview else None
+            page_stats = {}
+            text_chunks = extract_text_chunks_from_pdf(
+                temp_file_path,
+                max_chunk_length=1000,
+                page_start=page_start,
+                page_end=page_end,
+                max_chars=max_chars,
+                stats=page_stats
+            )
+            logger.info(f"[{job_id}] Extracted {page_stats['pages_processed']} of {page_stats['total_pages']} pages "
+                        f"for {len(branches)} languages")
+            
+            update_progress(task_id=job_id, status='detecting_language', progress=50)
+            source_language, detected = detect_source_language(text_chunks)
+            
+            stored_key = document_key(job_id)
+            store_document(stored_key, dict(
+                page_stats,
+                chunks=text_chunks,
+                source_language=source_language,
+                detected=detected
+            ), readers=len(branches))
+            
+            options = {'queue': queue} if queue else {}
+            group(
+                process_pdf.signature(
+                    kwargs={
+                        'file_content': None,
+                        'filename': filename,
+                        'voice': branch['voice'],
+                        'output_format': branch['output_format'],
+                        'user_id': user_id,
+                        'audio_speed': audio_speed,
+                        'page_start': page_start,
+                        'page_end': page_end,
+                        'preview': preview,
+                        'document_key': stored_key,
+                        'audio_encoding': audio_encoding
+                    },
+                    task_id=branch['task_id'],
+                    **options
+                )
+                for branch in branches
+            ).apply_async()
+            
+            update_progress(
+                task_id=job_id,
+                status='completed',
+                progress=100,
+                source_language=source_language,
+                tasks={branch['voice']['language']: branch['task_id'] for branch in branches}
+            )
+            return {'status': 'dispatched', 'source_language': source_language, 'branches': len(branches)}
+            
+        except Exception as e:
+            logger.error(f'[{job_id}] Error preparing document: {str(e)}')
+            update_progress(task_id=job_id, status='error', error=str(e))
+            
+            # None of the branches will run: fail them and refund their credits
+            for branch in branches:
+                update_progress(task_id=branch['task_id'], status='error', error=str(e))
+                release_reservation(branch['task_id'])
+                notify_task_finished(branch['task_id'], 'error', error=str(e))
+            if stored_key:
+                from app.utils.blob_store import delete_blob
+                delete_blob(get_redis(), stored_key)
+            raise
+            
+        finally:
+            if temp_file_path and os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+            discard_source_blob(source_key)
+
+def derived_basename(output_name, audio_speed=1.0):
+    """Name of a derived output; a different speed gets a suffix so it never overwrites the original."""
+    return output_name if float(audio_speed) == 1.0 else f"{output_name}_{float(audio_speed):g}x"
+
+@shared_task
+def derive_outputs(source_task_id, user_id, output_format, audio_speed=1.0, audio_encoding=None,
+                   page_size='a4', font_size=16):
+    """
+    Produce new outputs of a completed job from its kept intermediates.
+
+    Runs under its own task id, with its own progress, artifacts and
+    reservation. Audio is re-timed and re-encoded from the job's raw gTTS
+    audio with ffmpeg, and the PDF is re-rendered from its translated text,
+    so nothing is extracted, translated or synthesized again.
+    """
+    from app.utils.intermediates import get_intermediates, load_intermediate_text, intermediate_audio_to_file
+
+    app = get_worker_app()
+    with app.app_context():
+        task_id = derive_outputs.request.id
+        temp_dir = tempfile.mkdtemp(prefix="docecho_")
+        remote_keys = {}
+        published = []
+        output_path = None
+        audio_encoding = audio_encoding or default_encoding()
+        
+        try:
+            update_progress(task_id=task_id, status='deriving', progress=10)
+            record = get_intermediates(source_task_id, user_id=user_id)
+            if record is None:
+                raise Exception(f"Intermediates of task {source_task_id} have expired")
+            text = load_intermediate_text(source_task_id)
+            
+            output_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(user_id))
+            os.makedirs(output_dir, exist_ok=True)
+            output_name = derived_basename(record['output_name'], audio_speed)
+            
+            if output_format in ('audio', 'both'):
+                if not record.get('has_audio'):
+                    raise Exception(f"Task {source_task_id} kept no audio to derive from")
+                update_progress(task_id=task_id, status='combining_audio', progress=30)
+                raw_audio_path = intermediate_audio_to_file(source_task_id, os.path.join(temp_dir, 'raw_audio.mp3'))
+                output_path = os.path.join(output_dir, f'{output_name}.{audio_extension(audio_encoding)}')
+                if audio_encoding == 'passthrough' and float(audio_speed) == 1.0:
+                    shutil.copyfile(raw_audio_path, output_path)
+                else:
+                    # A new speed has to be re-encoded; passthrough then means the gTTS stream parameters
+                    transcode_file(raw_audio_path, output_path,
+                                   'mp3' if audio_encoding == 'passthrough' else audio_encoding,
+                                   tempo=float(audio_speed))
+                
+                index_files = {}
+                timings = [(page, duration / float(audio_speed)) for page, duration in text['timings']]
+                if timings and all(page is not None for page, _duration in timings):
+                    try:
+                        index_files = write_page_index(output_path, timings, audio_encoding, output_dir, output_name,
+                                                       title=os.path.splitext(record['filename'])[0])
+                    except Exception as e:
+                        logger.warning(f"[{task_id}] Could not index pages of {output_path}: {str(e)}")
+                
+                if publish_output(output_path, task_id, 'audio', remote_keys, user_id):
+                    published.append('audio')
+                for file_type, index_path in index_files.items():
+                    if publish_output(index_path, task_id, file_type, remote_keys, user_id):
+                        published.append(file_type)
+            
+            if output_format in ('pdf', 'both'):
+                update_progress(task_id=task_id, status='generating_pdf', progress=70)
+                pdf_output_path = os.path.join(output_dir, f'{output_name}_{page_size}_{int(font_size)}pt.pdf')
+                create_translated_pdf(text['text'], pdf_output_path, record['language'], page_size=page_size,
+                                      font_size=int(font_size))
+                if publish_output(pdf_output_path, task_id, 'pdf', remote_keys, user_id):
+                    published.append('pdf')
+            
+            if not published:
+                raise Exception("No derived output could be published")
+            
+            update_progress(
+                task_id=task_id,
+                status='completed',
+                progress=100,
+                audio_file=output_path,
+                remote_keys=remote_keys,
+                derived_from=source_task_id,
+                audio_encoding=audio_encoding
+            )
+            commit_reservation(task_id)
+            notify_task_finished(task_id, 'completed', file_types=published, derived_from=source_task_id)
+            logger.info(f"[{task_id}] Derived {published} from task {source_task_id}")
+            return {'status': 'completed', 'derived_from': source_task_id, 'outputs': published}
+            
+        except Exception as e:
+            logger.error(f'[{task_id}] Error deriving outputs from {source_task_id}: {str(e)}')
+            update_progress(task_id=task_id, status='error', error=str(e))
+            release_reservation(task_id)
+            notify_task_finished(task_id, 'error', error=str(e), derived_from=source_task_id)
+            raise
+        finally:
+            try:
+                shutil.rmtree(temp_dir)
+            except Exception as e:
+                logger.warning(f"Failed to clean up temp directory {temp_dir}: {str(e)}")
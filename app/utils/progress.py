@@ -22,11 +22,8 @@ def _get_progress_file_path(task_id):
         if has_app_context():
             app_root = current_app.root_path
         else:
-            # Fallback if no app context
-            from app import create_app
-            app = create_app()
-            with app.app_context():
-                app_root = app.root_path
+            # Fallback if no app context: the app root is the package directory
+            app_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
                 
         progress_dir = os.path.join(app_root, 'static', 'progress')
         os.makedirs(progress_dir, exist_ok=True)
@@ -239,6 +236,32 @@ def get_progress(task_id):
             'task_id': task_id
         }
 
+def get_progress_many(task_ids):
+    """
+    Get progress data for many tasks with one database query.
+
+    Unlike get_progress, tasks without progress data are simply left out.
+
+    Returns:
+        Dict mapping task id to its progress data
+    """
+    results = {}
+    try:
+        rows = TaskProgress.query.filter(TaskProgress.task_id.in_(list(task_ids))).all()
+        for task in rows:
+            if not task.is_expired:
+                results[task.task_id] = json.loads(task.data)
+    except Exception as e:
+        logger.error(f"Error getting progress for {len(task_ids)} tasks: {str(e)}")
+
+    # Progress the worker could only write to the file fallback
+    for task_id in task_ids:
+        if task_id not in results:
+            file_data = _load_progress_from_file(task_id)
+            if file_data:
+                results[task_id] = file_data
+    return results
+
 def _get_progress_internal(task_id):
     """Internal function to get progress with proper error handling. Assumes app context."""
     max_retries = 3
@@ -1,40 +1,127 @@
 import redis
 import os
 import logging
+import threading
+import time
 from flask import current_app, has_app_context
 import json
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Process-wide clients keyed by Redis URL. Each client owns a connection
+# pool that is shared by every request/task in this process.
+_clients = {}
+_clients_pid = os.getpid()
+_clients_lock = threading.Lock()
+
+# URL scheme that selects the in-memory client (useful for tests)
+MEMORY_URL_SCHEME = 'memory://'
+
+def _get_redis_url():
+    """Resolve the Redis URL from app config or the environment."""
+    # Try to get the Redis URL from the app config first (in app context)
+    if has_app_context():
+        redis_url = current_app.config.get('REDIS_URL')
+        if not redis_url:
+            redis_url = current_app.config.get('CELERY_RESULT_BACKEND')
+    else:
+        # If not in app context, try environment variables
+        redis_url = os.environ.get('REDIS_URL')
+
+    # If no Redis URL is found, use a default for local development
+    if not redis_url:
+        logger.warning("No Redis URL found. Using localhost:6379")
+        redis_url = 'redis://localhost:6379/0'
+    return redis_url
+
+def _get_pool_setting(name, default):
+    """Read a pool setting from the app config, falling back to the environment."""
+    if has_app_context() and current_app.config.get(name) is not None:
+        return int(current_app.config.get(name))
+    return int(os.environ.get(name, default))
+
+def _create_client(redis_url):
+    """Create a Redis client backed by a bounded, health-checked connection pool."""
+    if redis_url.startswith(MEMORY_URL_SCHEME):
+        return DummyRedisClient()
+
+    pool = redis.ConnectionPool.from_url(
+        redis_url,
+        max_connections=_get_pool_setting('REDIS_MAX_CONNECTIONS', 20),
+        health_check_interval=_get_pool_setting('REDIS_HEALTH_CHECK_INTERVAL', 30),
+        socket_timeout=_get_pool_setting('REDIS_SOCKET_TIMEOUT', 10),
+        socket_connect_timeout=_get_pool_setting('REDIS_SOCKET_TIMEOUT', 10),
+        socket_keepalive=True
+    )
+    logger.info(f"Created Redis connection pool for process {os.getpid()}")
+    return redis.Redis(connection_pool=pool)
+
+def reset_redis():
+    """
+    Drop all cached clients for this process.
+
+    Called automatically in forked children (gunicorn workers, Celery
+    prefork) so they never reuse sockets inherited from the parent.
+    """
+    global _clients, _clients_pid
+    # Don't disconnect: the sockets still belong to the parent process
+    _clients = {}
+    _clients_pid = os.getpid()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_redis)
+
 def get_redis():
     """
-    Get a Redis client connection using the configured Redis URL.
+    Get the process-wide Redis client for the configured Redis URL.
     
     Returns:
-        A Redis client instance, or a dummy client if Redis is not configured
+        A pooled Redis client instance, or a dummy client if Redis is not configured
     """
     try:
-        # Try to get the Redis URL from the app config first (in app context)
-        if has_app_context():
-            redis_url = current_app.config.get('REDIS_URL')
-            if not redis_url:
-                redis_url = current_app.config.get('CELERY_RESULT_BACKEND')
-        else:
-            # If not in app context, try environment variables
-            redis_url = os.environ.get('REDIS_URL')
-            
-        # If no Redis URL is found, use a default for local development
-        if not redis_url:
-            logger.warning("No Redis URL found. Using localhost:6379")
-            redis_url = 'redis://localhost:6379/0'
-            
-        # Create and return the Redis client
-        return redis.from_url(redis_url)
+        redis_url = _get_redis_url()
+
+        # Safety net in case a fork happened without the at-fork hook
+        if _clients_pid != os.getpid():
+            reset_redis()
+
+        client = _clients.get(redis_url)
+        if client is None:
+            with _clients_lock:
+                client = _clients.get(redis_url)
+                if client is None:
+                    client = _create_client(redis_url)
+                    _clients[redis_url] = client
+        return client
     except Exception as e:
         logger.error(f"Error connecting to Redis: {str(e)}")
         # Return a dummy Redis client that won't break the code if Redis is unavailable
         return DummyRedisClient()
+
+def get_redis_pool_stats():
+    """
+    Report connection pool usage for every Redis client in this process.
+
+    Returns:
+        A dict keyed by masked Redis URL with max, created, in-use and idle
+        connection counts
+    """
+    stats = {}
+    for redis_url, client in list(_clients.items()):
+        masked_url = redis_url.split('@')[-1]
+        pool = getattr(client, 'connection_pool', None)
+        if pool is None:
+            stats[masked_url] = {'backend': 'memory', 'keys': len(client.storage)}
+            continue
+        stats[masked_url] = {
+            'pid': os.getpid(),
+            'max_connections': pool.max_connections,
+            'created_connections': getattr(pool, '_created_connections', None),
+            'in_use_connections': len(getattr(pool, '_in_use_connections', ())),
+            'idle_connections': len(getattr(pool, '_available_connections', ()))
+        }
+    return stats
         
 class DummyRedisClient:
     """
@@ -43,27 +130,36 @@ class DummyRedisClient:
     """
     def __init__(self):
         self.storage = {}
+        self.locks = {}
         logger.warning("Using DummyRedisClient - Redis operations will not persist!")
         
-    def set(self, key, value, ex=None):
+    def set(self, key, value, ex=None, nx=False):
         """Store a key-value pair, with optional expiration"""
+        if nx and key in self.storage:
+            return None
         self.storage[key] = value
         logger.info(f"DummyRedis: SET {key}")
         return True
         
+    def setex(self, key, seconds, value):
+        """Store a key-value pair with expiration"""
+        return self.set(key, value, ex=seconds)
+        
     def get(self, key):
         """Get a value by key"""
         value = self.storage.get(key)
         logger.info(f"DummyRedis: GET {key} -> {'found' if value else 'not found'}")
         return value
         
-    def delete(self, key):
-        """Delete a key"""
-        if key in self.storage:
-            del self.storage[key]
-            logger.info(f"DummyRedis: DEL {key}")
-            return 1
-        return 0
+    def delete(self, *keys):
+        """Delete one or more keys"""
+        deleted = 0
+        for key in keys:
+            if key in self.storage:
+                del self.storage[key]
+                logger.info(f"DummyRedis: DEL {key}")
+                deleted += 1
+        return deleted
         
     def exists(self, key):
         """Check if a key exists"""
@@ -94,6 +190,96 @@ class DummyRedisClient:
         logger.info(f"DummyRedis: EXPIRE {key} {seconds} (not implemented)")
         return True  # Just pretend it worked 
 
+    def hset(self, key, field=None, value=None, mapping=None):
+        """Set fields of a hash"""
+        hash_value = self.storage.setdefault(key, {})
+        if field is not None:
+            hash_value[field] = value
+        if mapping:
+            hash_value.update(mapping)
+        logger.info(f"DummyRedis: HSET {key}")
+        return True
+
+    def hget(self, key, field):
+        """Get one field of a hash"""
+        value = self.storage.get(key)
+        return value.get(field) if isinstance(value, dict) else None
+
+    def hgetall(self, key):
+        """Get all fields of a hash"""
+        value = self.storage.get(key)
+        return dict(value) if isinstance(value, dict) else {}
+
+    def hincrby(self, key, field, amount=1):
+        """Increment an integer field of a hash"""
+        hash_value = self.storage.setdefault(key, {})
+        hash_value[field] = int(hash_value.get(field) or 0) + amount
+        return hash_value[field]
+
+    def incr(self, key, amount=1):
+        """Increment an integer value"""
+        value = int(self.storage.get(key) or 0) + amount
+        self.storage[key] = value
+        return value
+
+    def lock(self, name, timeout=None, blocking=True):
+        """Return a process-local lock (no cross-process exclusion)"""
+        lock = self.locks.get(name)
+        if lock is None:
+            lock = self.locks[name] = DummyRedisLock(timeout)
+        return lock
+
+    def pipeline(self, transaction=True):
+        """Return a pipeline that applies commands immediately"""
+        return DummyRedisPipeline(self)
+
+class DummyRedisLock:
+    """Process-local stand-in for a Redis lock that expires after timeout seconds"""
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.expires_at = None
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=False):
+        with self._lock:
+            now = time.time()
+            if self.expires_at is not None and now < self.expires_at:
+                return False
+            self.expires_at = now + self.timeout if self.timeout else float('inf')
+            return True
+
+    def release(self):
+        self.expires_at = None
+
+    def extend(self, additional_time, replace_ttl=False):
+        with self._lock:
+            now = time.time()
+            if self.expires_at is None or now >= self.expires_at:
+                raise redis.exceptions.LockNotOwnedError("Cannot extend a lock that's no longer owned")
+            self.expires_at = (now if replace_ttl else self.expires_at) + additional_time
+            return True
+
+class DummyRedisPipeline:
+    """
+    Minimal pipeline for DummyRedisClient. Commands are applied to the client
+    straight away and their results are returned by execute().
+    """
+    def __init__(self, client):
+        self.client = client
+        self.results = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def queued(*args, **kwargs):
+            self.results.append(method(*args, **kwargs))
+            return self
+        return queued
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
 def update_progress(task_id, status, progress=None, error=False, **kwargs):
     """Update the progress of a task in Redis."""
     redis = get_redis()
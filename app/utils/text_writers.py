@@ -0,0 +1,245 @@
+"""
+Streaming writers for text outputs: plain text, Markdown and EPUB.
+
+The writers consume the translated chunks one at a time, together with the
+source page each came from, and write them out immediately, so memory use
+does not grow with the document. Page boundaries are kept (as markers,
+anchors or an EPUB page list) and the top-level entries of the PDF's
+outline, if it has one, become chapters.
+"""
+import re
+import uuid
+import zipfile
+import logging
+from datetime import datetime
+from xml.sax.saxutils import escape, quoteattr
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TEXT_FORMATS = {
+    'text': {'extension': 'txt', 'mimetype': 'text/plain'},
+    'markdown': {'extension': 'md', 'mimetype': 'text/markdown'},
+    'epub': {'extension': 'epub', 'mimetype': 'application/epub+zip'},
+}
+
+# Without an outline, an EPUB is split into sections of this many pages,
+# since e-readers slow down on very large XHTML files
+EPUB_PAGES_PER_SECTION = 10
+
+class PlainTextWriter:
+    """UTF-8 text; chapters are underlined headings, pages are [Page N] markers."""
+
+    def __init__(self, path, title, language):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(f"{title}\n{'=' * len(title)}\n\n")
+
+    def chapter(self, title):
+        if title:
+            self.file.write(f"\n{title}\n{'-' * len(title)}\n\n")
+
+    def page(self, number):
+        self.file.write(f"[Page {number}]\n\n")
+
+    def paragraph(self, text):
+        self.file.write(f"{text}\n\n")
+
+    def close(self):
+        self.file.close()
+
+_MARKDOWN_SPECIAL = re.compile(r'([\\`*_\[\]<])')
+_MARKDOWN_LINE_START = re.compile(r'^(\s*)([#>+-]|\d+\.)(?=\s)')
+
+def _markdown_escape(text):
+    """Escape what Markdown would otherwise read as formatting."""
+    text = _MARKDOWN_SPECIAL.sub(r'\\\1', text)
+    return _MARKDOWN_LINE_START.sub(lambda match: match.group(1) + '\\' + match.group(2), text)
+
+class MarkdownWriter:
+    """Markdown; chapters are ## headings, pages are linkable page-N anchors."""
+
+    def __init__(self, path, title, language):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(f"# {_markdown_escape(title)}\n\n")
+
+    def chapter(self, title):
+        if title:
+            self.file.write(f"## {_markdown_escape(title)}\n\n")
+
+    def page(self, number):
+        self.file.write(f'<a id="page-{number}"></a>\n\n')
+
+    def paragraph(self, text):
+        self.file.write(f"{_markdown_escape(text)}\n\n")
+
+    def close(self):
+        self.file.close()
+
+_EPUB_CONTAINER = '''<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+'''
+
+class EpubWriter:
+    """
+    EPUB 3 written entry by entry into the zip file.
+
+    Each chapter (or group of pages) is its own XHTML file, streamed while
+    the text arrives; pages are marked with epub:type="pagebreak" and listed
+    in the navigation document's page-list, so readers can jump to a
+    source page. The navigation document and package file are written
+    last, from the small list of sections and pages collected on the way.
+    """
+
+    def __init__(self, path, title, language):
+        self.title = title
+        self.language = language
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        # The mimetype entry must come first and be stored uncompressed
+        self.zip.writestr(zipfile.ZipInfo('mimetype'), 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        self.zip.writestr('META-INF/container.xml', _EPUB_CONTAINER)
+        self.sections = []  # (file name, title)
+        self.pages = []  # (page number, file name)
+        self.entry = None
+
+    def _write(self, text):
+        self.entry.write(text.encode('utf-8'))
+
+    def _close_section(self):
+        if self.entry is not None:
+            self._write('</section>\n</body>\n</html>\n')
+            self.entry.close()
+            self.entry = None
+
+    def chapter(self, title):
+        self._close_section()
+        name = f"section{len(self.sections) + 1}.xhtml"
+        self.sections.append([name, title])
+        self.entry = self.zip.open(f"OEBPS/{name}", 'w')
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+            f'xml:lang={quoteattr(self.language)} lang={quoteattr(self.language)}>\n'
+            f'<head><title>{escape(title or self.title)}</title></head>\n<body>\n<section>\n'
+        )
+        if title:
+            self._write(f'<h2>{escape(title)}</h2>\n')
+
+    def page(self, number):
+        if self.entry is None:
+            self.chapter(None)
+        self.pages.append((number, self.sections[-1][0]))
+        self._write(f'<span epub:type="pagebreak" role="doc-pagebreak" id="page{number}" aria-label="{number}"/>\n')
+
+    def paragraph(self, text):
+        if self.entry is None:
+            self.chapter(None)
+        self._write(f'<p>{escape(text)}</p>\n')
+
+    def _section_label(self, index):
+        name, title = self.sections[index]
+        if title:
+            return title
+        numbers = [number for number, section in self.pages if section == name]
+        if not numbers:
+            return self.title
+        return f"Page {numbers[0]}" if numbers[0] == numbers[-1] else f"Pages {numbers[0]}-{numbers[-1]}"
+
+    def close(self):
+        if not self.sections:
+            self.chapter(None)
+        self._close_section()
+
+        toc = ''.join(
+            f'<li><a href="{name}">{escape(self._section_label(index))}</a></li>\n'
+            for index, (name, _title) in enumerate(self.sections)
+        )
+        page_list = ''.join(
+            f'<li><a href="{name}#page{number}">{number}</a></li>\n' for number, name in self.pages
+        )
+        self.zip.writestr('OEBPS/nav.xhtml', (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">\n'
+            f'<head><title>{escape(self.title)}</title></head>\n<body>\n'
+            f'<nav epub:type="toc" id="toc"><h1>{escape(self.title)}</h1><ol>\n{toc}</ol></nav>\n'
+            + (f'<nav epub:type="page-list" hidden=""><ol>\n{page_list}</ol></nav>\n' if self.pages else '')
+            + '</body>\n</html>\n'
+        ))
+
+        manifest = ''.join(
+            f'<item id="s{index}" href="{name}" media-type="application/xhtml+xml"/>\n'
+            for index, (name, _title) in enumerate(self.sections)
+        )
+        spine = ''.join(f'<itemref idref="s{index}"/>\n' for index in range(len(self.sections)))
+        modified = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.zip.writestr('OEBPS/content.opf', (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+            f'<dc:identifier id="book-id">urn:uuid:{uuid.uuid4()}</dc:identifier>\n'
+            f'<dc:title>{escape(self.title)}</dc:title>\n'
+            f'<dc:language>{escape(self.language)}</dc:language>\n'
+            f'<meta property="dcterms:modified">{modified}</meta>\n'
+            '</metadata>\n'
+            '<manifest>\n'
+            '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+            f'{manifest}</manifest>\n'
+            f'<spine>\n{spine}</spine>\n'
+            '</package>\n'
+        ))
+        self.zip.close()
+
+WRITERS = {
+    'text': PlainTextWriter,
+    'markdown': MarkdownWriter,
+    'epub': EpubWriter,
+}
+
+def write_text_output(output_format, path, chunks, title, language='en', chapters=None):
+    """
+    Write translated chunks as a text, Markdown or EPUB file.
+
+    Args:
+        output_format: One of TEXT_FORMATS
+        path: File to write
+        chunks: Iterable of (page, text) in reading order; page is the
+            1-based source page, or None if unknown
+        title: Title of the document
+        language: Language code of the text
+        chapters: Optional list of (title, first page), e.g. the PDF outline
+
+    Returns:
+        The number of chunks written
+    """
+    writer = WRITERS[output_format](path, title, language)
+    chapters = sorted(chapters or [], key=lambda chapter: chapter[1])
+    next_chapter = 0
+    current_page = None
+    section_start = None
+    written = 0
+    try:
+        for page, text in chunks:
+            if page is not None and page != current_page:
+                # Chapters starting on pages without text still get their heading
+                started = False
+                while next_chapter < len(chapters) and chapters[next_chapter][1] <= page:
+                    writer.chapter(chapters[next_chapter][0])
+                    next_chapter += 1
+                    started = True
+                if not chapters and output_format == 'epub' and (
+                        section_start is None or page - section_start >= EPUB_PAGES_PER_SECTION):
+                    writer.chapter(None)
+                    started = True
+                if started:
+                    section_start = page
+                writer.page(page)
+                current_page = page
+            writer.paragraph(text)
+            written += 1
+    finally:
+        writer.close()
+    logger.info(f"Wrote {written} chunks to {path} as {output_format}")
+    return written
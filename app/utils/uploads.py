@@ -0,0 +1,309 @@
+import os
+import uuid
+import hashlib
+import logging
+from datetime import datetime
+from flask import current_app, has_app_context
+from redis.exceptions import LockError
+from app.utils.redis import get_redis
+from app.utils.blob_store import (
+    DEFAULT_BLOB_CHUNK_SIZE, save_blob_segment, write_blob_manifest, delete_blob_segments, delete_blob,
+    get_blob_manifest, iter_blob
+)
+from app.utils.ingest import InvalidUpload, PdfStreamInspector, PDF_MAGIC, PDF_MAGIC_WINDOW, upload_blob_key
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_PART_SIZE = 4 * 1024 * 1024
+DEFAULT_UPLOAD_MAX_SIZE = 200 * 1024 * 1024
+DEFAULT_UPLOAD_SESSION_TTL = 86400
+
+# Seconds an upload lock survives without progress; storing a part extends
+# it after every segment, so a slow client only needs to send one segment
+# (REDIS_BLOB_CHUNK_SIZE bytes) per interval rather than a whole part
+UPLOAD_LOCK_TIMEOUT = 60
+
+# Request bodies are read in pieces of this size while hashing
+STREAM_READ_SIZE = 64 * 1024
+
+class UploadError(Exception):
+    """A resumable upload request that cannot be honoured; status_code is the HTTP status to return."""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def _get_config(name, default):
+    if has_app_context() and current_app.config.get(name) is not None:
+        return int(current_app.config[name])
+    return int(os.environ.get(name, default))
+
+def _session_key(upload_id):
+    return f"upload:{upload_id}"
+
+def _parts_key(upload_id):
+    return f"upload:{upload_id}:parts"
+
+def _lock_key(upload_id):
+    return f"lock:upload:{upload_id}"
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def create_upload(user_id, filename, size, sha256=None):
+    """
+    Start a resumable upload.
+
+    Args:
+        user_id: Owner of the upload
+        filename: Original filename (already sanitised)
+        size: Total size in bytes announced by the client
+        sha256: Optional hex SHA-256 of the whole file, checked on completion
+
+    Returns:
+        The upload session dict
+    """
+    max_size = _get_config('UPLOAD_MAX_SIZE', DEFAULT_UPLOAD_MAX_SIZE)
+    if size <= 0:
+        raise UploadError("File is empty")
+    if size > max_size:
+        raise UploadError(f"File is too large (maximum {max_size // (1024 * 1024)} MB)", 413)
+
+    # Parts are stored as whole blob segments, so the part size is a multiple of the segment size
+    segment_size = _get_config('REDIS_BLOB_CHUNK_SIZE', DEFAULT_BLOB_CHUNK_SIZE)
+    part_size = max(segment_size, _get_config('UPLOAD_PART_SIZE', DEFAULT_UPLOAD_PART_SIZE) // segment_size * segment_size)
+    ttl = _get_config('UPLOAD_SESSION_TTL', DEFAULT_UPLOAD_SESSION_TTL)
+    upload_id = uuid.uuid4().hex
+    session = {
+        'upload_id': upload_id,
+        'user_id': user_id,
+        'filename': filename,
+        'size': size,
+        'part_size': part_size,
+        'segment_size': segment_size,
+        'parts': (size + part_size - 1) // part_size,
+        'next_part': 0,
+        'sha256': sha256 or '',
+        'created_at': datetime.utcnow().isoformat()
+    }
+
+    redis_client = get_redis()
+    redis_client.hset(_session_key(upload_id), mapping=session)
+    redis_client.expire(_session_key(upload_id), ttl)
+    logger.info(f"Started upload {upload_id} for user {user_id}: {filename}, {size} bytes in {session['parts']} parts")
+    return session
+
+def get_upload(upload_id, user_id=None):
+    """
+    Load an upload session, optionally checking its owner.
+
+    Returns:
+        The session dict, or None if it does not exist (or belongs to someone else)
+    """
+    raw = get_redis().hgetall(_session_key(upload_id))
+    if not raw:
+        return None
+
+    session = {_decode(key): _decode(value) for key, value in raw.items()}
+    for field in ('user_id', 'size', 'part_size', 'parts', 'next_part'):
+        session[field] = int(session[field])
+    # Sessions started before parts were split into segments store one segment per part
+    session['segment_size'] = int(session.get('segment_size') or session['part_size'])
+    if user_id is not None and session['user_id'] != user_id:
+        return None
+    return session
+
+def _segment_count(session, size):
+    """Number of blob segments holding the first size bytes of an upload."""
+    return (size + session['segment_size'] - 1) // session['segment_size']
+
+def _stream_part(session, index, stream, expected_size, ttl, lock=None):
+    """
+    Store a part from the request stream as blob segments, hashing it as it arrives.
+
+    At most one segment is held in memory, and each is written with its own
+    SET of REDIS_BLOB_CHUNK_SIZE bytes. Nothing beyond expected_size is read
+    or stored. The segments stay invisible until complete_upload writes the
+    manifest, and a retried part overwrites them. If lock is given it is
+    extended after each segment, and losing it aborts the part.
+
+    Returns:
+        (bytes received, capped at expected_size + 1, hex SHA-256 of the stored bytes)
+    """
+    redis_client = get_redis()
+    base_key = upload_blob_key(session['upload_id'])
+    segment_size = session['segment_size']
+    segment_index = index * session['part_size'] // segment_size
+
+    checksum = hashlib.sha256()
+    segment = bytearray()
+    received = 0
+    header_checked = index != 0
+
+    def flush(data):
+        nonlocal segment_index, header_checked
+        if not header_checked:
+            if PDF_MAGIC not in data[:PDF_MAGIC_WINDOW]:
+                raise UploadError("File is not a PDF", 415)
+            header_checked = True
+        save_blob_segment(redis_client, base_key, segment_index, data, ttl=ttl)
+        segment_index += 1
+        if lock is not None:
+            try:
+                lock.extend(UPLOAD_LOCK_TIMEOUT, replace_ttl=True)
+            except LockError:
+                raise UploadError(f"Upload lock expired while storing part {index}, retry it", 409)
+
+    while received <= expected_size:
+        data = stream.read(STREAM_READ_SIZE)
+        if not data:
+            break
+        accepted = data[:expected_size - received]
+        received += len(data)
+        checksum.update(accepted)
+        segment += accepted
+        if len(segment) >= segment_size:
+            flush(bytes(segment[:segment_size]))
+            del segment[:segment_size]
+
+    if segment and received == expected_size:
+        flush(bytes(segment))
+    return min(received, expected_size + 1), checksum.hexdigest()
+
+def store_part(session, index, stream, part_checksum):
+    """
+    Store one part of an upload.
+
+    Parts must arrive in order, so an interrupted upload resumes at
+    session['next_part']. Re-sending a part that was already stored is
+    accepted if its checksum matches, which makes retries safe.
+
+    Args:
+        session: Upload session from get_upload
+        index: Zero-based part number
+        stream: Readable stream with the part's bytes (the request body)
+        part_checksum: Hex SHA-256 of the part sent by the client
+
+    Returns:
+        The index of the next part expected
+    """
+    upload_id = session['upload_id']
+    if index < 0 or index >= session['parts']:
+        raise UploadError(f"Part {index} is out of range (upload has {session['parts']} parts)")
+    if not part_checksum:
+        raise UploadError("Missing X-Part-SHA256 header")
+
+    is_last = index == session['parts'] - 1
+    expected_size = session['size'] - index * session['part_size'] if is_last else session['part_size']
+
+    redis_client = get_redis()
+    lock = upload_lock(upload_id)
+    if not lock.acquire(blocking=False):
+        raise UploadError("Another part of this upload is being stored, retry shortly", 409)
+
+    try:
+        # Re-read under the lock so concurrent requests see each other's progress
+        session = get_upload(upload_id)
+        if session is None:
+            raise UploadError("Upload not found or expired", 404)
+
+        if index < session['next_part']:
+            stored = _decode(redis_client.hget(_parts_key(upload_id), str(index)))
+            if stored != part_checksum.lower():
+                raise UploadError(f"Part {index} was already stored with a different checksum", 409)
+            return session['next_part']
+        if index > session['next_part']:
+            raise UploadError(f"Expected part {session['next_part']}, got part {index}", 409)
+
+        ttl = _get_config('UPLOAD_SESSION_TTL', DEFAULT_UPLOAD_SESSION_TTL)
+        received, checksum = _stream_part(session, index, stream, expected_size, ttl, lock=lock)
+        if received > expected_size:
+            raise UploadError(f"Part {index} should be {expected_size} bytes, got more")
+        if received != expected_size:
+            raise UploadError(f"Part {index} should be {expected_size} bytes, got {received}")
+        if checksum != part_checksum.lower():
+            raise UploadError(f"Checksum mismatch for part {index}", 422)
+
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(_parts_key(upload_id), str(index), checksum)
+        pipe.expire(_parts_key(upload_id), ttl)
+        pipe.hset(_session_key(upload_id), 'next_part', index + 1)
+        pipe.execute()
+        return index + 1
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+def complete_upload(session):
+    """
+    Finish an upload once every part has been stored.
+
+    The whole-file SHA-256 and page count hint are computed by streaming
+    the stored parts one at a time, then the blob's manifest is written so
+    the worker can read it.
+
+    Returns:
+        The blob manifest (size, chunks, sha256, page_count_hint, ...)
+    """
+    upload_id = session['upload_id']
+    base_key = upload_blob_key(upload_id)
+    redis_client = get_redis()
+
+    existing = get_blob_manifest(redis_client, base_key)
+    if existing:
+        return existing
+
+    if session['next_part'] < session['parts']:
+        raise UploadError(f"Upload incomplete: {session['next_part']} of {session['parts']} parts received", 409)
+
+    manifest = {
+        'size': session['size'],
+        'chunk_size': session['segment_size'],
+        'chunks': _segment_count(session, session['size']),
+        'filename': session['filename']
+    }
+    inspector = PdfStreamInspector()
+    try:
+        for data in iter_blob(redis_client, base_key, manifest):
+            inspector.feed(data)
+        manifest.update(inspector.finish())
+    except InvalidUpload as e:
+        raise UploadError(str(e), 415)
+
+    if session['sha256'] and session['sha256'].lower() != manifest['sha256']:
+        raise UploadError("Checksum mismatch for the uploaded file", 422)
+
+    write_blob_manifest(redis_client, base_key, manifest,
+                        ttl=_get_config('UPLOAD_SESSION_TTL', DEFAULT_UPLOAD_SESSION_TTL))
+    logger.info(f"Completed upload {upload_id}: {manifest['size']} bytes, sha256 {manifest['sha256']}")
+    return manifest
+
+def upload_lock(upload_id):
+    """
+    Non-blocking lock serialising writes to one upload session.
+
+    It expires after UPLOAD_LOCK_TIMEOUT seconds unless extended, which
+    store_part does while a part is streaming in.
+    """
+    return get_redis().lock(_lock_key(upload_id), timeout=UPLOAD_LOCK_TIMEOUT, blocking=False)
+
+def mark_upload_submitted(upload_id, task_id, field='task_id'):
+    """
+    Remember the job started from an upload so completing it again returns the same job.
+
+    field is 'job_id' for multi-language jobs, whose id is not a task id.
+    """
+    get_redis().hset(_session_key(upload_id), field, task_id)
+
+def delete_upload(session):
+    """Delete an upload session and every part stored for it."""
+    upload_id = session['upload_id']
+    redis_client = get_redis()
+    base_key = upload_blob_key(upload_id)
+    if not delete_blob(redis_client, base_key):
+        # Stored parts, and whatever a failed attempt at the next one left behind
+        stored = min(session['next_part'] + 1, session['parts']) * session['part_size']
+        delete_blob_segments(redis_client, base_key, _segment_count(session, min(stored, session['size'])))
+    redis_client.delete(_session_key(upload_id), _parts_key(upload_id))
@@ -0,0 +1,71 @@
+import os
+import time
+import logging
+import threading
+from flask import current_app, has_app_context
+from app.utils.redis import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Per-process cache of user rows: user_id -> (expires_at, version, column values)
+_cache = {}
+_cache_lock = threading.Lock()
+
+DEFAULT_USER_CACHE_TTL = 60  # Seconds
+
+def _version_key(user_id):
+    return f"user_cache:version:{user_id}"
+
+def _get_ttl():
+    if has_app_context() and current_app.config.get('USER_CACHE_TTL') is not None:
+        return int(current_app.config['USER_CACHE_TTL'])
+    return int(os.environ.get('USER_CACHE_TTL', DEFAULT_USER_CACHE_TTL))
+
+def _get_version(user_id):
+    """Current invalidation version of a user, shared by all processes through Redis."""
+    value = get_redis().get(_version_key(user_id))
+    return int(value) if value else 0
+
+def get_cached_user(user_id):
+    """
+    Return the cached column values for a user, or None on a miss.
+
+    An entry is only used if it is younger than USER_CACHE_TTL and its
+    version still matches the one in Redis, so invalidations made by any
+    process take effect immediately.
+    """
+    entry = _cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, version, data = entry
+    if time.monotonic() > expires_at:
+        _cache.pop(user_id, None)
+        return None
+    try:
+        if _get_version(user_id) != version:
+            _cache.pop(user_id, None)
+            return None
+    except Exception as e:
+        # Without Redis we cannot tell whether the entry is stale
+        logger.warning(f"User cache version check failed for {user_id}: {str(e)}")
+        return None
+    return data
+
+def cache_user(user_id, data):
+    """Store a user's column values in the process cache."""
+    try:
+        version = _get_version(user_id)
+    except Exception as e:
+        logger.warning(f"Not caching user {user_id}, Redis unavailable: {str(e)}")
+        return
+    with _cache_lock:
+        _cache[user_id] = (time.monotonic() + _get_ttl(), version, data)
+
+def invalidate_user(user_id):
+    """Drop a user from this process's cache and bump its version for all other processes."""
+    _cache.pop(user_id, None)
+    try:
+        get_redis().incr(_version_key(user_id))
+    except Exception as e:
+        logger.error(f"Error invalidating cached user {user_id}: {str(e)}")
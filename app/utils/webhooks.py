@@ -0,0 +1,212 @@
+import os
+import hmac
+import json
+import socket
+import hashlib
+import logging
+import ipaddress
+from datetime import datetime
+from urllib.parse import urlparse
+from celery import shared_task
+from flask import current_app, has_app_context
+from app.utils.redis import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Callback URLs are kept as long as job groups
+DEFAULT_CALLBACK_TTL = 604800
+
+# Delivery attempts and the delay before the first retry (doubled on each retry)
+DEFAULT_CALLBACK_MAX_RETRIES = 6
+DEFAULT_CALLBACK_RETRY_DELAY = 30
+
+# Seconds to wait for the receiving server
+CALLBACK_TIMEOUT = 10
+
+SIGNATURE_HEADER = 'X-DocEcho-Signature'
+
+class CallbackError(Exception):
+    """A callback delivery failed; retryable is False when retrying cannot help."""
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+def _get_config(name, default):
+    if has_app_context() and current_app.config.get(name) is not None:
+        return current_app.config[name]
+    return os.environ.get(name, default)
+
+def _callbacks_key(task_id):
+    return f"callbacks:{task_id}"
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def validate_callback_url(url):
+    """
+    Check a callback URL submitted with a job.
+
+    Returns:
+        The URL
+
+    Raises:
+        ValueError: if it is not an absolute http(s) URL
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http or https URL")
+    if len(url) > 2048:
+        raise ValueError("callback_url is too long")
+    return url
+
+def _is_private_host(hostname):
+    """True if the host resolves to a loopback, private, link-local or reserved address."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(hostname, None)}
+    except socket.gaierror:
+        return False
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast:
+            return True
+    return False
+
+def register_callback(task_id, url):
+    """Ask for url to be called when task_id finishes. A task can have several callbacks."""
+    redis_client = get_redis()
+    redis_client.hset(_callbacks_key(task_id), url, datetime.utcnow().isoformat())
+    redis_client.expire(_callbacks_key(task_id), int(_get_config('CALLBACK_TTL', DEFAULT_CALLBACK_TTL)))
+
+def unregister_callback(task_id, url):
+    """Remove a callback that was not sent yet. Returns True if it was still registered."""
+    return bool(get_redis().hdel(_callbacks_key(task_id), url))
+
+def sign_payload(body, secret):
+    """Hex HMAC-SHA256 of a callback body, sent in the X-DocEcho-Signature header."""
+    return hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+def send_callback(url, payload, secret, allow_private=False, timeout=CALLBACK_TIMEOUT):
+    """
+    POST a signed JSON payload to a callback URL once.
+
+    Returns:
+        The HTTP status code
+
+    Raises:
+        CallbackError: if the delivery failed; retryable for connection
+            errors, timeouts, 429 and 5xx responses
+    """
+    import requests
+
+    hostname = urlparse(url).hostname
+    if not allow_private and _is_private_host(hostname):
+        raise CallbackError(f"Callback host {hostname} is not a public address", retryable=False)
+
+    body = json.dumps(payload, sort_keys=True).encode('utf-8')
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'DocEcho-Webhooks/1.0',
+        SIGNATURE_HEADER: f"sha256={sign_payload(body, secret)}"
+    }
+    try:
+        response = requests.post(url, data=body, headers=headers, timeout=timeout, allow_redirects=False)
+    except requests.RequestException as e:
+        raise CallbackError(f"Callback to {url} failed: {str(e)}")
+
+    if response.status_code == 429 or response.status_code >= 500:
+        raise CallbackError(f"Callback to {url} returned {response.status_code}")
+    if response.status_code >= 300:
+        raise CallbackError(f"Callback to {url} returned {response.status_code}", retryable=False)
+    return response.status_code
+
+def build_payload(task_id, status, error=None, file_types=(), event=None, **details):
+    """Body of a job.completed / job.failed callback, or of another event if given."""
+    base_url = str(_get_config('BASE_URL', '')).rstrip('/')
+    return dict(
+        details,
+        event=event or ('job.completed' if status == 'completed' else 'job.failed'),
+        task_id=task_id,
+        status=status,
+        error=error,
+        outputs={file_type: f"{base_url}/download/{task_id}/{file_type}" for file_type in file_types},
+        finished_at=datetime.utcnow().isoformat()
+    )
+
+def notify_task_finished(task_id, status, error=None, file_types=(), **details):
+    """
+    Queue deliveries to every callback registered for a finished task.
+
+    Never raises: a broken callback must not fail the job that triggered it.
+    """
+    try:
+        # Read and clear in one transaction, so a callback registered meanwhile is either sent or left in place
+        pipe = get_redis().pipeline()
+        pipe.hgetall(_callbacks_key(task_id))
+        pipe.delete(_callbacks_key(task_id))
+        registered, _deleted = pipe.execute()
+        urls = [_decode(url) for url in (registered or {})]
+        if not urls:
+            return 0
+
+        payload = build_payload(task_id, status, error, file_types, **details)
+        for url in urls:
+            deliver_callback.apply_async(kwargs={'url': url, 'payload': payload})
+        logger.info(f"[{task_id}] Queued {len(urls)} completion callbacks")
+        return len(urls)
+    except Exception as e:
+        logger.warning(f"[{task_id}] Could not queue completion callbacks: {str(e)}")
+        return 0
+
+def queue_callback(url, task_id, status, error=None, file_types=(), **details):
+    """Queue one job.completed / job.failed delivery to a single URL."""
+    payload = build_payload(task_id, status, error, file_types, **details)
+    deliver_callback.apply_async(kwargs={'url': url, 'payload': payload})
+
+def notify_output_ready(task_id, file_type, **details):
+    """
+    Queue a job.output_ready event for one output of a task that is still running.
+
+    The callbacks stay registered for the job.completed or job.failed event
+    that follows. Never raises.
+    """
+    try:
+        urls = [_decode(url) for url in (get_redis().hgetall(_callbacks_key(task_id)) or {})]
+        if not urls:
+            return 0
+
+        payload = build_payload(task_id, 'running', file_types=(file_type,), event='job.output_ready', **details)
+        for url in urls:
+            deliver_callback.apply_async(kwargs={'url': url, 'payload': payload})
+        logger.info(f"[{task_id}] Queued {len(urls)} callbacks for its {file_type} output")
+        return len(urls)
+    except Exception as e:
+        logger.warning(f"[{task_id}] Could not queue output callbacks: {str(e)}")
+        return 0
+
+@shared_task(bind=True, name='app.utils.webhooks.deliver_callback', max_retries=None)
+def deliver_callback(self, url, payload):
+    """Deliver one callback, retrying transient failures with exponential backoff."""
+    from app.utils.pdf_processor import get_worker_app
+
+    app = get_worker_app()
+    with app.app_context():
+        task_id = payload.get('task_id')
+        max_retries = int(app.config.get('CALLBACK_MAX_RETRIES', DEFAULT_CALLBACK_MAX_RETRIES))
+        try:
+            status_code = send_callback(
+                url,
+                payload,
+                app.config.get('CALLBACK_SIGNING_SECRET') or app.config['SECRET_KEY'],
+                allow_private=bool(app.config.get('CALLBACK_ALLOW_PRIVATE', False))
+            )
+        except CallbackError as e:
+            if not e.retryable or self.request.retries >= max_retries:
+                logger.error(f"[{task_id}] Giving up on callback to {url} after {self.request.retries + 1} attempts: {str(e)}")
+                return {'delivered': False, 'error': str(e)}
+            delay = int(app.config.get('CALLBACK_RETRY_DELAY', DEFAULT_CALLBACK_RETRY_DELAY)) * 2 ** self.request.retries
+            logger.warning(f"[{task_id}] {str(e)}, retrying in {delay}s")
+            raise self.retry(countdown=delay)
+
+        logger.info(f"[{task_id}] Delivered callback to {url} ({status_code})")
+        return {'delivered': True, 'status_code': status_code}
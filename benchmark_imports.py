@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Import and startup-time benchmark for DocEcho
+
+Measures, in a fresh interpreter per run, how long it takes to import the
+web entry point and the worker task module, and how long each process
+takes to be ready to serve (web: wsgi builds its app; worker: the task
+module plus its per-process Flask app). Also reports the resulting peak
+RSS and which heavy media/translation libraries ended up loaded. The web
+process should not load any of them.
+
+Usage:
+    python benchmark_imports.py [--runs 5]
+
+For a per-module breakdown use:
+    python -X importtime -c "import wsgi" 2> importtime.txt
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['PyPDF2', 'gtts', 'pydub', 'googletrans', 'reportlab', 'PIL', 'boto3', 'requests']
+
+TARGETS = {
+    'web-import': 'import app.routes.main',
+    'web-startup': 'import wsgi',
+    'worker-import': 'import celery_worker, app.utils.pdf_processor',
+    'worker-startup': 'import celery_worker, app.utils.pdf_processor; app.utils.pdf_processor.get_worker_app()',
+}
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss_kb //= 1024  # macOS reports bytes
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'rss_kb': rss_kb, 'heavy': heavy}}))
+"""
+
+def run_probe(statement):
+    """Import the target in a fresh interpreter and return its measurements."""
+    code = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'import failed')
+    # The probe prints its JSON result last; earlier lines are app output
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import/startup time and RSS of DocEcho entry points')
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh interpreters per target')
+    args = parser.parse_args()
+
+    print("DocEcho Import/Startup Benchmark")
+    print("--------------------------------")
+
+    for name, statement in TARGETS.items():
+        try:
+            samples = [run_probe(statement) for _ in range(args.runs)]
+        except Exception as e:
+            print(f"{name:<15} ❌ Error: {e}")
+            continue
+
+        times = sorted(sample['seconds'] for sample in samples)
+        median = times[len(times) // 2]
+        rss_mb = max(sample['rss_kb'] for sample in samples) / 1024
+        heavy = samples[-1]['heavy']
+        print(f"{name:<15} median {median * 1000:8.1f} ms   peak RSS {rss_mb:7.1f} MB   heavy modules: {', '.join(heavy) or 'none'}")
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,7 @@ def make_celery():
         'app',
         broker=redis_url,
         backend=redis_url,
-        include=['app.utils.pdf_processor']
+        include=['app.utils.pdf_processor', 'app.utils.janitor', 'app.utils.webhooks']
     )
     
     # Optional Celery configuration
@@ -32,6 +32,13 @@ def make_celery():
         task_track_started=True,  # Track when task starts
         task_time_limit=3600,  # 1 hour time limit
         task_soft_time_limit=3300,  # 55 minutes soft time limit
+        beat_schedule={
+            # Keeps the data volume, Redis blobs and S3 outputs within their budgets
+            'storage-janitor': {
+                'task': 'app.utils.janitor.run_storage_janitor',
+                'schedule': int(os.getenv('STORAGE_JANITOR_INTERVAL', 3600)),
+            },
+        },
     )
     
     return celery
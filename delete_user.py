@@ -15,6 +15,7 @@ import sys
 from dotenv import load_dotenv
 from app import create_app, db
 from app.models.user import User
+from app.utils.artifacts import evict_user_artifacts
 
 def delete_user(user_id):
     """Delete a specific user by ID"""
@@ -47,6 +48,8 @@ def delete_user(user_id):
         
         # Delete the user
         try:
+            # Stored outputs go first; the database only cascades their rows
+            evict_user_artifacts(user.id)
             db.session.delete(user)
             db.session.commit()
             print(f"\nSuccess! User {user.email} (ID: {user.id}) has been deleted.")
@@ -14,6 +14,7 @@ import sys
 from dotenv import load_dotenv
 from app import create_app, db
 from app.models.user import User
+from app.utils.artifacts import evict_user_artifacts
 
 def delete_all_users():
     """Delete all users from the database with confirmation"""
@@ -50,6 +51,9 @@ def delete_all_users():
         
         # Delete all users
         try:
+            # Stored outputs go first; the database only cascades their rows
+            for user in users:
+                evict_user_artifacts(user.id)
             User.query.delete()
             db.session.commit()
             print(f"\nSuccess! All {user_count} users have been deleted from the database.")
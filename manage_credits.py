@@ -24,6 +24,8 @@ import argparse
 from dotenv import load_dotenv
 from app import create_app, db
 from app.models.user import User
+from app.models.credit_ledger import CreditLedgerEntry
+from app.utils.credits import add_credits as apply_credit_change
 from sqlalchemy import or_
 
 def find_user_by_id(session, user_id):
@@ -35,15 +37,17 @@ def find_user_by_email(session, email):
     return session.query(User).filter_by(email=email).first()
 
 def add_credits(user, credits_to_add):
-    """Add credits to a user"""
+    """Add credits to a user and record the grant in the ledger"""
     original_credits = user.credits
-    user.credits += credits_to_add
+    apply_credit_change(user.id, credits_to_add, CreditLedgerEntry.TYPE_ADMIN_GRANT,
+                        description='Credits added by admin')
     return original_credits
 
 def set_credits(user, new_credits):
-    """Set a user's credits to a specific value"""
+    """Set a user's credits to a specific value, recorded as an adjustment of the difference"""
     original_credits = user.credits
-    user.credits = new_credits
+    apply_credit_change(user.id, new_credits - original_credits, CreditLedgerEntry.TYPE_ADMIN_GRANT,
+                        description=f'Balance set to {new_credits} by admin')
     return original_credits
 
 def list_users(session, limit=None):
@@ -103,7 +107,7 @@ def main():
         # Handle credit operations
         if user and args.add:
             original_credits = add_credits(user, args.add)
-            db.session.commit()
+            db.session.refresh(user)
             print(f"\nCredits added successfully!")
             print(f"User: {user.email} (ID: {user.id})")
             print(f"Original credits: {original_credits}")
@@ -112,7 +116,7 @@ def main():
             
         elif user and args.set is not None:
             original_credits = set_credits(user, args.set)
-            db.session.commit()
+            db.session.refresh(user)
             print(f"\nCredits updated successfully!")
             print(f"User: {user.email} (ID: {user.id})")
             print(f"Original credits: {original_credits}")
@@ -0,0 +1,26 @@
+"""Add index on task_progress.expires_at
+
+Revision ID: 3f9a1c2e7b4d
+Revises: b7d7b7d9dec7
+Create Date: 2026-10-19 10:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2e7b4d'
+down_revision = 'b7d7b7d9dec7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task_progress', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_task_progress_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task_progress', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_task_progress_expires_at'))
@@ -0,0 +1,29 @@
+"""Add artifacts.last_accessed_at for LRU eviction
+
+Revision ID: 7b2f5e8d1c46
+Revises: e41b9a7c2d53
+Create Date: 2026-10-19 15:20:13.482907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2f5e8d1c46'
+down_revision = 'e41b9a7c2d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows count as accessed now, so nothing is evicted straight after the upgrade
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_accessed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+        batch_op.create_index(batch_op.f('ix_artifacts_last_accessed_at'), ['last_accessed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_artifacts_last_accessed_at'))
+        batch_op.drop_column('last_accessed_at')
@@ -0,0 +1,25 @@
+"""Add functional index on lower(users.email)
+
+Revision ID: 8c4e2d1a9f06
+Revises: 3f9a1c2e7b4d
+Create Date: 2026-10-19 11:03:27.904116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2d1a9f06'
+down_revision = '3f9a1c2e7b4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Case-insensitive email lookups (auth.register, auth.forgot_password)
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
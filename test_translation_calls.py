@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Translation Call Count Test for DocEcho
+
+Runs the translation and TTS stages of the pipeline against counting
+stand-ins for googletrans and gTTS, and checks that each chunk is
+translated exactly once and that the TTS stage never calls the
+translation service.
+
+Usage:
+    python test_translation_calls.py
+    python -m pytest test_translation_calls.py
+"""
+
+import os
+import sys
+import tempfile
+import types
+
+class CountingTranslator:
+    """Stand-in for googletrans.Translator that counts outbound calls"""
+    calls = 0
+
+    def translate(self, text, src='auto', dest='en'):
+        CountingTranslator.calls += 1
+        return types.SimpleNamespace(text=f"[{dest}] {text}", src=src)
+
+class CountingTTS:
+    """Stand-in for gtts.gTTS that counts synthesis calls"""
+    calls = 0
+
+    def __init__(self, text, lang='en', tld='com'):
+        CountingTTS.calls += 1
+        self.text = text
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(b'ID3')
+
+# Install the stand-ins before the pipeline imports the real libraries
+sys.modules['googletrans'] = types.SimpleNamespace(Translator=CountingTranslator)
+sys.modules['gtts'] = types.SimpleNamespace(gTTS=CountingTTS)
+
+from app.utils import pdf_processor
+
+def test_translation_runs_once_per_chunk():
+    CountingTranslator.calls = 0
+    CountingTTS.calls = 0
+    # No need to wait on the rate limiter in a test
+    pdf_processor.translate_rate_limiter.max_requests_per_second = 10000
+
+    text_chunks = ["First sentence. Second sentence.", "Another chunk.", "x" * 3500]
+
+    translated, provenance = pdf_processor.translate_chunks(text_chunks, 'en', 'fr')
+    assert CountingTranslator.calls == len(text_chunks)
+    assert [record['chunk'] for record in provenance] == [0, 1, 2]
+    assert all(record['translated'] and not record['fallback'] for record in provenance)
+
+    audio_chunks = pdf_processor.split_for_audio(translated, provenance, audio_chunk_size=3000)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i, (chunk, record) in enumerate(audio_chunks):
+            path = pdf_processor.convert_text_to_audio(chunk, f"chunk_{i}.mp3", 'fr', 1.0, temp_dir, 'fr')
+            assert os.path.exists(path)
+
+    # The TTS stage must not translate again
+    assert CountingTranslator.calls == len(text_chunks)
+    assert CountingTTS.calls == len(audio_chunks)
+
+if __name__ == '__main__':
+    test_translation_runs_once_per_chunk()
+    print(f"✅ {CountingTranslator.calls} translation calls, {CountingTTS.calls} TTS calls")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Completion Webhook Test for DocEcho
+
+Delivers job callbacks to a local HTTP stand-in and checks that the body
+is signed with the configured secret, that transient failures (5xx) are
+reported as retryable and permanent ones (4xx) are not, and that private
+addresses are refused unless explicitly allowed.
+
+Usage:
+    python test_webhooks.py
+    python -m pytest test_webhooks.py
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from app.utils import webhooks
+
+SECRET = 'test-secret'
+
+class StandInReceiver(BaseHTTPRequestHandler):
+    """Records every callback and answers with the next queued status code"""
+    received = []
+    responses = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        StandInReceiver.received.append((dict(self.headers), body))
+        self.send_response(StandInReceiver.responses.pop(0) if StandInReceiver.responses else 200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_receiver():
+    server = HTTPServer(('127.0.0.1', 0), StandInReceiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/hook"
+
+def test_callback_is_signed_and_retried():
+    StandInReceiver.received = []
+    StandInReceiver.responses = [503, 200]
+    server, url = start_receiver()
+    try:
+        payload = webhooks.build_payload('task-1', 'completed', file_types=['audio'], credits_charged=2)
+
+        # A 5xx response is transient
+        try:
+            webhooks.send_callback(url, payload, SECRET, allow_private=True)
+            assert False, "expected a retryable CallbackError"
+        except webhooks.CallbackError as e:
+            assert e.retryable
+
+        # The retry succeeds
+        assert webhooks.send_callback(url, payload, SECRET, allow_private=True) == 200
+        assert len(StandInReceiver.received) == 2
+
+        headers, body = StandInReceiver.received[-1]
+        assert headers[webhooks.SIGNATURE_HEADER] == f"sha256={webhooks.sign_payload(body, SECRET)}"
+        event = json.loads(body)
+        assert event['event'] == 'job.completed'
+        assert event['task_id'] == 'task-1'
+        assert event['outputs']['audio'].endswith('/download/task-1/audio')
+    finally:
+        server.shutdown()
+
+def test_client_errors_and_private_hosts_are_not_retried():
+    StandInReceiver.received = []
+    StandInReceiver.responses = [410]
+    server, url = start_receiver()
+    try:
+        payload = webhooks.build_payload('task-2', 'error', error='boom')
+        try:
+            webhooks.send_callback(url, payload, SECRET, allow_private=True)
+            assert False, "expected a CallbackError"
+        except webhooks.CallbackError as e:
+            assert not e.retryable
+
+        # Loopback is refused by default and nothing is sent
+        try:
+            webhooks.send_callback(url, payload, SECRET)
+            assert False, "expected a CallbackError"
+        except webhooks.CallbackError as e:
+            assert not e.retryable
+        assert len(StandInReceiver.received) == 1
+    finally:
+        server.shutdown()
+
+def test_callback_urls_are_validated():
+    assert webhooks.validate_callback_url('https://example.com/hook') == 'https://example.com/hook'
+    for bad in ('ftp://example.com/hook', '/relative/hook', 'https://'):
+        try:
+            webhooks.validate_callback_url(bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+
+if __name__ == '__main__':
+    test_callback_is_signed_and_retried()
+    test_client_errors_and_private_hosts_are_not_retried()
+    test_callback_urls_are_validated()
+    print("✅ Webhook callbacks are signed, retried and validated")